@@ -10,13 +10,17 @@ Includes resilience features:
 - Graceful fallback to None when Supabase is unavailable
 """
 
+import atexit
 import logging
 import os
 import platform
+import threading
 import traceback
 from pathlib import Path
 from typing import Optional
 
+import httpx
+
 logger = logging.getLogger("om-apex-mcp")
 
 # Try to import dotenv, but don't fail if it's not available
@@ -34,6 +38,30 @@ _cortex_client = None
 # Timeout for Supabase operations (seconds)
 CORTEX_SUPABASE_TIMEOUT = int(os.environ.get("CORTEX_SUPABASE_TIMEOUT", "10"))
 
+# Shared keep-alive HTTP connection pool for PostgREST calls (created lazily,
+# under a lock so concurrent worker threads don't each build one)
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def _get_pooled_http_client():
+    """Return the module's pooled httpx.Client, creating it on first use.
+
+    One pool is kept for the life of the process (and survives client
+    re-creation), so TLS connections are reused across tool calls. Closed
+    at interpreter exit.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=httpx.Timeout(CORTEX_SUPABASE_TIMEOUT, connect=5.0),
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+                http2=False,  # HTTP/1.1 avoids stream reset errors
+            )
+            atexit.register(_http_client.close)
+    return _http_client
+
 
 def _get_cortex_config_path() -> Path:
     """Get path to Om Cortex Supabase config."""
@@ -102,32 +130,20 @@ def get_cortex_client():
             logger.warning(f"Supabase library not installed: {import_err}")
             return None
 
-        # Create client
-        logger.info(f"Creating Cortex Supabase client for URL: {url[:30]}...")
-        _cortex_client = create_client(url, key)
-
-        # Try to configure httpx for HTTP/1.1 and timeout
+        # Route every request through the shared keep-alive pool (HTTP/1.1, timeout).
+        # Best-effort: older supabase-py releases lack httpx_client and use their defaults.
+        options = None
         try:
-            import httpx
-
-            http_client = httpx.Client(
-                timeout=httpx.Timeout(CORTEX_SUPABASE_TIMEOUT),
-                http2=False,
-            )
-
-            if hasattr(_cortex_client, 'postgrest'):
-                postgrest = _cortex_client.postgrest
-                if hasattr(postgrest, '_client'):
-                    postgrest._client = http_client
-                    logger.info(f"Cortex Supabase client configured (timeout={CORTEX_SUPABASE_TIMEOUT}s, http2=False)")
-                else:
-                    logger.info("Cortex Supabase client initialized (default httpx settings)")
-            else:
-                logger.info("Cortex Supabase client initialized (default settings)")
-        except ImportError:
-            logger.info("httpx not available for custom configuration")
+            from supabase import ClientOptions
+            options = ClientOptions(httpx_client=_get_pooled_http_client())
         except Exception as config_err:
             logger.warning(f"Could not configure httpx: {config_err}")
+
+        logger.info(f"Creating Cortex Supabase client for URL: {url[:30]}...")
+        _cortex_client = create_client(url, key, options=options)
+        if options is not None:
+            logger.info(f"Cortex Supabase client configured (timeout={CORTEX_SUPABASE_TIMEOUT}s, http2=False)")
+        else:
             logger.info("Cortex Supabase client initialized (default settings)")
 
         # Test connection with prodsupport_incidents table
@@ -205,6 +221,78 @@ def create_incident_event(event: dict) -> dict:
     raise RuntimeError(f"Insert returned no data: {resp}")
 
 
+def create_incident_with_event(incident: dict, event: dict) -> dict:
+    """Insert a prodsupport_incidents row and its prodsupport_events row in one call.
+
+    Uses the create_incident_with_event RPC, so both inserts share one
+    round-trip and one transaction.
+
+    Args:
+        incident: Dict matching the prodsupport_incidents columns.
+        event: Dict matching the prodsupport_events columns, minus incident_id
+            (filled in from the new incident).
+
+    Returns:
+        The created incident row as a dict.
+
+    Raises:
+        RuntimeError: If Cortex Supabase is not available or the call returns nothing.
+    """
+    client = get_cortex_client()
+    if client is None:
+        raise RuntimeError("Cortex Supabase is not available")
+
+    resp = client.rpc("create_incident_with_event", {"incident": incident, "event": event}).execute()
+    data = resp.data[0] if isinstance(resp.data, list) and resp.data else resp.data
+    if data:
+        return data
+    raise RuntimeError(f"create_incident_with_event returned no data: {resp}")
+
+
+def create_incidents_bulk(incidents: list[dict]) -> list[dict]:
+    """Insert many prodsupport_incidents rows in a single request.
+
+    Args:
+        incidents: List of dicts matching the prodsupport_incidents columns.
+
+    Returns:
+        The created rows, in insert order.
+
+    Raises:
+        RuntimeError: If Cortex Supabase is not available or insert fails.
+    """
+    client = get_cortex_client()
+    if client is None:
+        raise RuntimeError("Cortex Supabase is not available")
+
+    resp = client.table("prodsupport_incidents").insert(incidents).execute()
+    if resp.data:
+        return resp.data
+    raise RuntimeError(f"Insert returned no data: {resp}")
+
+
+def create_incident_events_bulk(events: list[dict]) -> list[dict]:
+    """Insert many prodsupport_events rows (audit trail) in a single request.
+
+    Args:
+        events: List of dicts matching the prodsupport_events columns.
+
+    Returns:
+        The created rows.
+
+    Raises:
+        RuntimeError: If Cortex Supabase is not available or insert fails.
+    """
+    client = get_cortex_client()
+    if client is None:
+        raise RuntimeError("Cortex Supabase is not available")
+
+    resp = client.table("prodsupport_events").insert(events).execute()
+    if resp.data:
+        return resp.data
+    raise RuntimeError(f"Insert returned no data: {resp}")
+
+
 def list_incidents(
     status: Optional[str] = None,
     severity: Optional[str] = None,
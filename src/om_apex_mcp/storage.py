@@ -10,22 +10,57 @@ Error Handling:
 - The server continues running even if storage operations fail
 """
 
+import fnmatch
 import json
 import logging
+import mmap
 import os
+import re
 import platform
 import sys
 import traceback
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 
 logger = logging.getLogger("om-apex-mcp")
 
 
+def _read_file_bytes(filepath: Path) -> bytes:
+    """Read a whole file with raw os.open/os.read calls, skipping the buffered text layer.
+
+    Uses O_NOATIME where the platform and file ownership allow it. O_BINARY keeps
+    Windows from opening in text mode (CRLF translation, 0x1A ending the read).
+    """
+    flags = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+    noatime = getattr(os, "O_NOATIME", 0)
+    try:
+        fd = os.open(filepath, flags | noatime)
+    except PermissionError:
+        if not noatime:
+            raise
+        # O_NOATIME is only permitted on files we own
+        fd = os.open(filepath, flags)
+    try:
+        size = os.fstat(fd).st_size
+        chunks = []
+        while True:
+            chunk = os.read(fd, max(size, 65536))
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
 class StorageBackend(ABC):
     """Abstract storage backend for reading/writing data files."""
 
+    # How many reads callers may run in parallel threads; 1 means serial only
+    # (the Drive API client is not thread-safe)
+    max_concurrent_reads = 1
+
     @abstractmethod
     def load_json(self, filename: str) -> dict:
         """Load a JSON file from the mcp-data directory."""
@@ -41,6 +76,15 @@ class StorageBackend(ABC):
         """Read a text file by relative path from shared drive root. Returns None if not found."""
         ...
 
+    def iter_text(self, path: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Yield a text file in chunks of up to chunk_size characters. Yields nothing if not found.
+
+        The default reads the whole file; backends that can stream override it.
+        """
+        content = self.read_text(path)
+        if content:
+            yield content
+
     @abstractmethod
     def write_text(self, path: str, content: str) -> None:
         """Write a text file by relative path from shared drive root."""
@@ -51,9 +95,26 @@ class StorageBackend(ABC):
         """Append to a text file by relative path from shared drive root."""
         ...
 
+    def append_text_with(self, path: str, build: Callable[[Optional[str]], str]) -> None:
+        """Append build(existing content) to a text file, creating it if needed.
+
+        build gets the current content (None or "" if the file is new or empty)
+        and returns the text to append. Backends override this to do the read
+        and the write through a single handle.
+        """
+        existing = self.read_text(path)
+        addition = build(existing)
+        if existing:
+            self.append_text(path, addition)
+        else:
+            self.write_text(path, addition)
+
     @abstractmethod
-    def list_files(self, directory: str, pattern: str = "*.md") -> list[str]:
-        """List files in a directory matching a glob pattern. Returns relative paths."""
+    def list_files(self, directory: str, pattern: str = "*.md", prefix: Optional[str] = None) -> list[str]:
+        """List files in a directory matching a glob pattern. Returns relative paths.
+
+        prefix, if given, is a literal name prefix that backends can filter on natively.
+        """
         ...
 
     @abstractmethod
@@ -61,6 +122,38 @@ class StorageBackend(ABC):
         """Check if a file exists at the given relative path from shared drive root."""
         ...
 
+    def iter_files(self, directory: str, pattern: str = "*.md") -> Iterator[str]:
+        """Yield files in a directory matching a glob pattern, in list_files order.
+
+        Backends that page their listings override this so callers that stop
+        early don't fetch pages they never use.
+        """
+        yield from self.list_files(directory, pattern)
+
+    def search_files(self, directory: str, needle: str, pattern: str = "*.md") -> Optional[list[str]]:
+        """Find files in a directory whose content may contain needle, searching server-side.
+
+        Returns relative paths (newest name first), or None if the backend has no
+        native search and callers should scan files themselves. Hits are
+        candidates only: callers still check the content.
+        """
+        return None
+
+    def search_bytes(self, path: str, matcher: re.Pattern[bytes]) -> Optional[bool]:
+        """Search a file's raw bytes without decoding it, or return None if not supported.
+
+        Lets callers reject large non-matching files before reading them as text.
+        """
+        return None
+
+    def mtime_ns(self, path: str) -> Optional[tuple[int, int]]:
+        """Return a file's (modification time in nanoseconds, size), or None if unknown.
+
+        Callers use this to validate cached content; the size catches rewrites
+        within one mtime tick. None disables caching.
+        """
+        return None
+
 
 class LocalStorage(StorageBackend):
     """Local filesystem storage — reads/writes via Google Drive Desktop sync.
@@ -68,6 +161,8 @@ class LocalStorage(StorageBackend):
     All operations are wrapped in error handling to prevent crashes.
     """
 
+    max_concurrent_reads = 16
+
     def __init__(self, data_dir: Optional[Path] = None, shared_drive_root: Optional[Path] = None):
         """Initialize LocalStorage with paths to data directory and shared drive.
 
@@ -186,26 +281,41 @@ class LocalStorage(StorageBackend):
         """
         filepath = self.shared_drive_root / path
         try:
-            if filepath.exists():
-                with open(filepath, "r", encoding="utf-8") as f:
-                    return f.read()
-            else:
-                logger.debug(f"Text file not found: {filepath}")
-                return None
+            data = _read_file_bytes(filepath)
+        except FileNotFoundError:
+            logger.debug(f"Text file not found: {filepath}")
+            return None
         except PermissionError as e:
             logger.error(f"Permission denied reading {filepath}: {e}")
             return None
-        except UnicodeDecodeError as e:
-            logger.error(f"Encoding error reading {filepath}: {e}")
-            # Try with a different encoding
-            try:
-                with open(filepath, "r", encoding="latin-1") as f:
-                    return f.read()
-            except Exception:
-                return None
         except Exception as e:
             logger.error(f"Error reading text from {filepath}: {e}")
             return None
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            logger.error(f"Encoding error reading {filepath}: {e}")
+            # Fall back to a different encoding
+            text = data.decode("latin-1")
+        # Match text-mode reads, which translate \r\n and \r to \n
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def iter_text(self, path: str, chunk_size: int = 65536) -> Iterator[str]:
+        """Yield a text file in chunks without reading it all into memory.
+
+        Yields nothing if the file is not found; stops early on a read error.
+        """
+        filepath = self.shared_drive_root / path
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+        except FileNotFoundError:
+            logger.debug(f"Text file not found: {filepath}")
+        except Exception as e:
+            logger.error(f"Error streaming text from {filepath}: {e}")
 
     def write_text(self, path: str, content: str) -> None:
         """Write a text file by relative path from shared drive root."""
@@ -239,8 +349,31 @@ class LocalStorage(StorageBackend):
             logger.error(f"Traceback:\n{traceback.format_exc()}")
             raise
 
-    def list_files(self, directory: str, pattern: str = "*.md") -> list[str]:
-        """List files in a directory matching a glob pattern.
+    def append_text_with(self, path: str, build: Callable[[Optional[str]], str]) -> None:
+        """Read and append to a text file through one "a+b" handle."""
+        filepath = self.shared_drive_root / path
+        try:
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            with open(filepath, "a+b") as f:
+                f.seek(0)
+                data = f.read()
+                try:
+                    existing = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    existing = data.decode("latin-1")
+                # "a" mode always writes at the end, whatever the read position
+                f.write(build(existing).encode("utf-8"))
+            logger.debug(f"Appended text to {filepath}")
+        except PermissionError as e:
+            logger.error(f"Permission denied appending to {filepath}: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Error appending text to {filepath}: {e}")
+            logger.error(f"Traceback:\n{traceback.format_exc()}")
+            raise
+
+    def list_files(self, directory: str, pattern: str = "*.md", prefix: Optional[str] = None) -> list[str]:
+        """List files in a directory matching a glob pattern (and name prefix, if given).
 
         Returns empty list on error.
         """
@@ -249,10 +382,17 @@ class LocalStorage(StorageBackend):
             if not dir_path.exists():
                 logger.debug(f"Directory not found: {dir_path}")
                 return []
-            files = sorted(
-                [str(f.relative_to(self.shared_drive_root)) for f in dir_path.glob(pattern)],
-                reverse=True,
-            )
+            # scandir entries carry their type, so no per-file Path objects or stats
+            rel_dir = str(dir_path.relative_to(self.shared_drive_root)) + os.sep
+            prefix = prefix or ""
+            with os.scandir(dir_path) as it:
+                files = sorted(
+                    [
+                        rel_dir + e.name for e in it
+                        if e.name.startswith(prefix) and fnmatch.fnmatchcase(e.name, pattern) and e.is_file()
+                    ],
+                    reverse=True,
+                )
             logger.debug(f"Found {len(files)} files matching {pattern} in {directory}")
             return files
         except PermissionError as e:
@@ -270,6 +410,30 @@ class LocalStorage(StorageBackend):
             logger.error(f"Error checking file existence for {path}: {e}")
             return False
 
+    # Files at least this large are searched through mmap; smaller ones are
+    # cheaper to just read
+    MMAP_MIN_SIZE = 65536
+
+    def search_bytes(self, path: str, matcher: re.Pattern[bytes]) -> Optional[bool]:
+        """Search a large file through a read-only mmap; None for small or unreadable files."""
+        filepath = self.shared_drive_root / path
+        try:
+            with open(filepath, "rb") as f:
+                if os.fstat(f.fileno()).st_size < self.MMAP_MIN_SIZE:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return matcher.search(mm) is not None
+        except (OSError, ValueError):
+            return None
+
+    def mtime_ns(self, path: str) -> Optional[tuple[int, int]]:
+        """Return a file's (modification time in nanoseconds, size), or None if missing."""
+        try:
+            st = os.stat(self.shared_drive_root / path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
 
 class GoogleDriveStorage(StorageBackend):
     """Google Drive API storage for remote access via service account."""
@@ -470,7 +634,12 @@ class GoogleDriveStorage(StorageBackend):
             content = existing + content
         self._upload_content(path, content, mime_type="text/plain")
 
-    def list_files(self, directory: str, pattern: str = "*.md") -> list[str]:
+    def append_text_with(self, path: str, build: Callable[[Optional[str]], str]) -> None:
+        # One download, one upload (append_text would download again)
+        existing = self.read_text(path)
+        self._upload_content(path, (existing or "") + build(existing), mime_type="text/plain")
+
+    def list_files(self, directory: str, pattern: str = "*.md", prefix: Optional[str] = None) -> list[str]:
         try:
             folder_id = self._resolve_folder_id(directory)
         except FileNotFoundError:
@@ -488,6 +657,9 @@ class GoogleDriveStorage(StorageBackend):
             q = f"'{folder_id}' in parents and trashed = false"
             if suffix:
                 q += f" and name contains '{suffix}'"
+            if prefix:
+                # Drive matches name prefixes server-side; startswith below keeps it exact
+                q += f" and name contains '{prefix}'"
 
             response = self.service.files().list(
                 q=q,
@@ -503,7 +675,7 @@ class GoogleDriveStorage(StorageBackend):
             for f in response.get("files", []):
                 rel_path = f"{directory}/{f['name']}"
                 self._file_id_cache[rel_path] = f["id"]
-                if not suffix or f["name"].endswith(suffix):
+                if (not suffix or f["name"].endswith(suffix)) and (not prefix or f["name"].startswith(prefix)):
                     results.append(rel_path)
 
             page_token = response.get("nextPageToken")
@@ -512,5 +684,82 @@ class GoogleDriveStorage(StorageBackend):
 
         return sorted(results, reverse=True)
 
+    def iter_files(self, directory: str, pattern: str = "*.md") -> Iterator[str]:
+        try:
+            folder_id = self._resolve_folder_id(directory)
+        except FileNotFoundError:
+            return
+
+        suffix = pattern[1:] if pattern.startswith("*") else ""
+        q = f"'{folder_id}' in parents and trashed = false"
+        if suffix:
+            q += f" and name contains '{suffix}'"
+
+        # Drive sorts server-side, so pages arrive newest name first and are only
+        # fetched as the caller consumes them
+        page_token = None
+        while True:
+            response = self.service.files().list(
+                q=q,
+                spaces="drive",
+                fields="nextPageToken, files(id, name)",
+                orderBy="name desc",
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+                corpora="drive",
+                driveId=self.shared_drive_id,
+                pageToken=page_token,
+            ).execute()
+
+            for f in response.get("files", []):
+                rel_path = f"{directory}/{f['name']}"
+                self._file_id_cache[rel_path] = f["id"]
+                if not suffix or f["name"].endswith(suffix):
+                    yield rel_path
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+    def search_files(self, directory: str, needle: str, pattern: str = "*.md") -> Optional[list[str]]:
+        try:
+            folder_id = self._resolve_folder_id(directory)
+        except FileNotFoundError:
+            return []
+
+        suffix = pattern[1:] if pattern.startswith("*") else ""
+        escaped = needle.replace("\\", "\\\\").replace("'", "\\'")
+        q = f"'{folder_id}' in parents and trashed = false and fullText contains '{escaped}'"
+
+        results = []
+        page_token = None
+        try:
+            while True:
+                response = self.service.files().list(
+                    q=q,
+                    spaces="drive",
+                    fields="nextPageToken, files(id, name)",
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    corpora="drive",
+                    driveId=self.shared_drive_id,
+                    pageToken=page_token,
+                ).execute()
+
+                for f in response.get("files", []):
+                    rel_path = f"{directory}/{f['name']}"
+                    self._file_id_cache[rel_path] = f["id"]
+                    if not suffix or f["name"].endswith(suffix):
+                        results.append(rel_path)
+
+                page_token = response.get("nextPageToken")
+                if not page_token:
+                    break
+        except Exception as e:
+            logger.warning(f"Drive full-text search failed, falling back to scanning: {e}")
+            return None
+
+        return sorted(results, reverse=True)
+
     def file_exists(self, path: str) -> bool:
         return self._resolve_file_id(path) is not None
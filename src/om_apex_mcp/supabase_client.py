@@ -5,19 +5,25 @@ Loads credentials from centralized config folder.
 
 Includes resilience features:
 - Configurable timeout (default 10s)
+- Shared keep-alive connection pool for all requests, passed to create_client
+  (sized by SUPABASE_MAX_CONNECTIONS / SUPABASE_MAX_KEEPALIVE)
 - HTTP/1.1 fallback for environments with HTTP/2 issues
 - Comprehensive error handling to prevent crashes
 - Graceful fallback to None when Supabase is unavailable
 """
 
+import atexit
 import logging
 import os
 import platform
 import sys
+import threading
 import traceback
 from pathlib import Path
 from typing import Optional
 
+import httpx
+
 logger = logging.getLogger("om-apex-mcp")
 
 # Try to import dotenv, but don't fail if it's not available
@@ -38,6 +44,39 @@ _project_code_cache: dict[str, str] = {}
 # Timeout for Supabase operations (seconds)
 SUPABASE_TIMEOUT = int(os.environ.get("SUPABASE_TIMEOUT", "10"))
 
+# Connection pool sizing; tool calls run Supabase requests in worker threads,
+# so concurrent calls each need a connection rather than queueing for one
+SUPABASE_MAX_CONNECTIONS = int(os.environ.get("SUPABASE_MAX_CONNECTIONS", "32"))
+SUPABASE_MAX_KEEPALIVE = int(os.environ.get("SUPABASE_MAX_KEEPALIVE", "16"))
+
+# Shared keep-alive HTTP connection pool for PostgREST calls (created lazily,
+# under a lock so concurrent worker threads don't each build one)
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def _get_pooled_http_client():
+    """Return the module's pooled httpx.Client, creating it on first use.
+
+    One pool is kept for the life of the process (and survives client
+    re-creation), so TLS connections are reused across tool calls. Closed
+    at interpreter exit.
+    """
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+                    keepalive_expiry=30.0,
+                ),
+                http2=False,  # HTTP/1.1 avoids stream reset errors
+            )
+            atexit.register(_http_client.close)
+    return _http_client
+
 
 def _get_config_path() -> Path:
     """Get path to centralized config folder.
@@ -104,35 +143,20 @@ def get_supabase_client():
             logger.warning("Install with: pip install supabase")
             return None
 
-        # Create client with default settings first
-        logger.info(f"Creating Supabase client for URL: {url[:30]}...")
-        _supabase_client = create_client(url, key)
-
-        # Try to configure httpx for HTTP/1.1 and timeout (more reliable in containers)
-        # This is a best-effort optimization - client works without it
+        # Route every request through the shared keep-alive pool (HTTP/1.1, timeout).
+        # Best-effort: older supabase-py releases lack httpx_client and use their defaults.
+        options = None
         try:
-            import httpx
-
-            http_client = httpx.Client(
-                timeout=httpx.Timeout(SUPABASE_TIMEOUT),
-                http2=False,  # HTTP/1.1 avoids stream reset errors
-            )
-
-            # Apply to postgrest client if accessible
-            if hasattr(_supabase_client, 'postgrest'):
-                postgrest = _supabase_client.postgrest
-                if hasattr(postgrest, '_client'):
-                    postgrest._client = http_client
-                    logger.info(f"Supabase client configured (timeout={SUPABASE_TIMEOUT}s, http2=False)")
-                else:
-                    logger.info("Supabase client initialized (default httpx settings)")
-            else:
-                logger.info("Supabase client initialized (default settings)")
-        except ImportError:
-            logger.info("httpx not available for custom configuration")
+            from supabase import ClientOptions
+            options = ClientOptions(httpx_client=_get_pooled_http_client())
         except Exception as config_err:
-            # httpx configuration failed but client still works
             logger.warning(f"Could not configure httpx: {config_err}")
+
+        logger.info(f"Creating Supabase client for URL: {url[:30]}...")
+        _supabase_client = create_client(url, key, options=options)
+        if options is not None:
+            logger.info(f"Supabase client configured (timeout={SUPABASE_TIMEOUT}s, http2=False)")
+        else:
             logger.info("Supabase client initialized (default settings)")
 
         # Test connection with a simple query
@@ -159,11 +183,12 @@ def is_supabase_available() -> bool:
 # Task Operations
 # =============================================================================
 
-def get_task_by_id(task_id: str) -> Optional[dict]:
+def get_task_by_id(task_id: str, columns: str = "*") -> Optional[dict]:
     """Get a single task by ID.
 
     Args:
         task_id: The task ID (e.g., TASK-001)
+        columns: Columns to select (default all), e.g. "status,notes"
 
     Returns:
         Task dictionary or None if not found.
@@ -174,7 +199,7 @@ def get_task_by_id(task_id: str) -> Optional[dict]:
             logger.debug("get_task_by_id: Supabase not available")
             return None
 
-        response = client.table("tasks").select("*").eq("id", task_id).limit(1).execute()
+        response = client.table("tasks").select(columns).eq("id", task_id).limit(1).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         logger.error(f"Error fetching task {task_id}: {e}")
@@ -295,6 +320,8 @@ def update_task(task_id: str, updates: dict) -> Optional[dict]:
         if not client:
             raise RuntimeError("Supabase not available - cannot update task")
 
+        # One round-trip: PostgREST answers with the updated rows (UPDATE ... RETURNING *),
+        # and an empty result means no task had this ID
         response = client.table("tasks").update(updates).eq("id", task_id).execute()
         if response.data:
             logger.info(f"Task updated: {task_id}")
@@ -311,6 +338,52 @@ def update_task(task_id: str, updates: dict) -> Optional[dict]:
         raise RuntimeError(f"Failed to update task: {e}") from e
 
 
+# Task ID prefix by task_type; all prefixes share one number sequence
+_TASK_ID_PREFIXES = {
+    "enhancement": "DEV",
+    "feature-request": "DEV",
+    "dev": "DEV",
+    "manual": "DEV",
+    "issue": "ISSUE",
+}
+
+
+def add_task_with_id(task: dict, task_type: str = "enhancement") -> dict:
+    """Allocate the next task ID and insert the task in one call.
+
+    Uses the add_task_with_id RPC, which draws the number from the shared
+    tasks_id_seq sequence, so allocation and insert are one round-trip and
+    concurrent callers never get the same ID.
+
+    Args:
+        task: Task dictionary without an id.
+        task_type: Picks the ID prefix (DEV or ISSUE), as in get_next_task_id.
+
+    Returns:
+        The created task, including its new id.
+
+    Raises:
+        RuntimeError: If Supabase is not available or the call fails.
+    """
+    try:
+        client = get_supabase_client()
+        if not client:
+            raise RuntimeError("Supabase not available - cannot add task")
+
+        prefix = _TASK_ID_PREFIXES.get(task_type, "DEV")
+        response = client.rpc("add_task_with_id", {"task": task, "prefix": prefix}).execute()
+        data = response.data[0] if isinstance(response.data, list) and response.data else response.data
+        if not data:
+            raise RuntimeError(f"add_task_with_id returned no data: {response}")
+        logger.info(f"Task created: {data.get('id', 'unknown')}")
+        return data
+    except RuntimeError:
+        raise
+    except Exception as e:
+        logger.error(f"Error adding task via add_task_with_id: {e}")
+        raise RuntimeError(f"Failed to add task: {e}") from e
+
+
 def get_next_task_id(task_type: str = "enhancement") -> str:
     """Get the next available task ID with prefix based on task_type.
 
@@ -323,14 +396,7 @@ def get_next_task_id(task_type: str = "enhancement") -> str:
     Returns:
         Next task ID (e.g., DEV-506, ISSUE-507). Returns DEV-001 or ISSUE-001 on error.
     """
-    PREFIX_MAP = {
-        "enhancement": "DEV",
-        "feature-request": "DEV",
-        "dev": "DEV",
-        "manual": "DEV",
-        "issue": "ISSUE",
-    }
-    prefix = PREFIX_MAP.get(task_type, "DEV")
+    prefix = _TASK_ID_PREFIXES.get(task_type, "DEV")
 
     try:
         client = get_supabase_client()
@@ -463,6 +529,10 @@ def _get_project_id_to_code_map() -> dict[str, str]:
         return {}
 
 
+# get_task_queue keeps this many of the most recently updated tasks per project
+_QUEUE_PER_PROJECT = 2
+
+
 def get_task_queue(
     limit: int = 10,
     owner: Optional[str] = None,
@@ -502,6 +572,29 @@ def get_task_queue(
             logger.debug("get_task_queue: Supabase not available")
             return []
 
+        # Filter, group and truncate server-side when the get_task_queue RPC is deployed
+        try:
+            response = client.rpc("get_task_queue", {
+                "p_limit": limit,
+                "p_per_project": _QUEUE_PER_PROJECT,
+                "p_owner": owner,
+                "p_priority": priority,
+                "p_status": status,
+                "p_company": company,
+                "p_source": source,
+                "p_task_type": task_type,
+            }).execute()
+        except Exception as rpc_err:
+            if "PGRST202" not in str(rpc_err):
+                raise
+            logger.debug("get_task_queue RPC not deployed, grouping client-side")
+        else:
+            tasks = response.data or []
+            id_to_code = _get_project_id_to_code_map()
+            for t in tasks:
+                t["project_code"] = id_to_code.get(t.get("project_id", ""), "unassigned")
+            return tasks
+
         query = client.table("tasks").select(
             "id, description, priority, status, owner, company, "
             "updated_at, project_id, task_type"
@@ -539,7 +632,6 @@ def get_task_queue(
 
         # Group tasks by project_code, keeping top 2 per project
         # (sorted by updated_at desc — already sorted from DB query)
-        PER_PROJECT = 2
         groups: dict[str, list[dict]] = {}
         for t in tasks:
             project_code = id_to_code.get(t.get("project_id", ""), "unassigned")
@@ -547,7 +639,7 @@ def get_task_queue(
 
             if project_code not in groups:
                 groups[project_code] = []
-            if len(groups[project_code]) < PER_PROJECT:
+            if len(groups[project_code]) < _QUEUE_PER_PROJECT:
                 groups[project_code].append(t)
 
         # Flatten groups into a single list, ordered by the most recently
@@ -776,6 +868,23 @@ def upsert_document_template(template: dict) -> dict:
     return response.data[0] if response.data else template
 
 
+def upsert_document_templates_bulk(templates: list[dict]) -> list[dict]:
+    """Insert or update many document templates in a single request.
+
+    Args:
+        templates: List of template dicts with id, name, filename, content, etc.
+
+    Returns:
+        The upserted templates.
+    """
+    client = get_supabase_client()
+    if not client:
+        raise RuntimeError("Supabase not available")
+
+    response = client.table("document_templates").upsert(templates, on_conflict="id").execute()
+    return response.data or templates
+
+
 def has_document_templates_table() -> bool:
     """Check if document_templates table exists and is accessible."""
     client = get_supabase_client()
@@ -860,6 +969,23 @@ def upsert_company_config(config: dict) -> dict:
     return response.data[0] if response.data else config
 
 
+def upsert_company_configs_bulk(configs: list[dict]) -> list[dict]:
+    """Insert or update many company configs in a single request.
+
+    Args:
+        configs: List of config dicts with id, company_name, short_name, config (JSONB).
+
+    Returns:
+        The upserted configs.
+    """
+    client = get_supabase_client()
+    if not client:
+        raise RuntimeError("Supabase not available")
+
+    response = client.table("company_configs").upsert(configs, on_conflict="id").execute()
+    return response.data or configs
+
+
 def has_company_configs_table() -> bool:
     """Check if company_configs table exists and is accessible."""
     client = get_supabase_client()
@@ -125,7 +125,7 @@ def register(all_reading_tools: list[str], all_writing_tools: list[str]) -> Tool
 
         elif name == "get_claude_instructions":
             instructions = get_claude_instructions_data()
-            return [TextContent(type="text", text=json.dumps(instructions, indent=2))]
+            return [TextContent(type="text", text=json.dumps(dict(instructions), indent=2))]
 
         elif name == "get_full_context":
             # Use Supabase for tasks/decisions if available
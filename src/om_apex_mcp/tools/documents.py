@@ -9,10 +9,17 @@ Storage modes (TASK-164):
   - Supabase: Templates and configs read from Supabase (for cloud/remote access)
 """
 
+import asyncio
+import base64
+import functools
 import json
+import logging
+import os
 import re
-from pathlib import Path
-from typing import Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePath
+from typing import Iterator, Optional
 
 import markdown as md_lib
 
@@ -26,14 +33,18 @@ from ..supabase_client import (
     get_document_templates as sb_get_templates,
     get_document_template as sb_get_template,
     upsert_document_template as sb_upsert_template,
+    upsert_document_templates_bulk as sb_upsert_templates_bulk,
     delete_document_template as sb_delete_template,
     get_company_configs as sb_get_configs,
     get_company_config as sb_get_config,
     upsert_company_config as sb_upsert_config,
+    upsert_company_configs_bulk as sb_upsert_configs_bulk,
     has_document_templates_table,
     has_company_configs_table,
 )
 
+logger = logging.getLogger("om-apex-mcp")
+
 READING = ["list_company_configs", "list_document_templates", "view_document_template", "get_brand_assets"]
 WRITING = [
     "generate_branded_html",
@@ -52,6 +63,70 @@ COMPANY_CONFIG_PATHS = [
     "",  # root = Om Apex Holdings
 ]
 
+# Static error responses, built once; handlers return a fresh list over them
+_ERR_TEMPLATE_REQUIRED = (TextContent(type="text", text="Error: 'template' is required."),)
+_ERR_COMPANY_REQUIRED = (TextContent(type="text", text="Error: 'company' is required."),)
+_ERR_SUPABASE_UNCONFIGURED = (TextContent(type="text", text="Error: Supabase is not configured."),)
+_ERR_NOT_LOCAL_SYNC = (TextContent(type="text", text="Error: sync_templates_to_supabase requires local storage access."),)
+
+# Template/config ID normalization: lowercase ASCII and spaces -> dashes in one pass
+_SLUG_TABLE = str.maketrans({c: c + 32 for c in range(ord("A"), ord("Z") + 1)} | {ord(" "): ord("-")})
+
+
+def _slugify(s: str) -> str:
+    """Normalize a template or company name to its Supabase ID form."""
+    return s.translate(_SLUG_TABLE)
+
+
+# {{variable}} placeholders in templates
+_VAR_RE = re.compile(r"\{\{(\w+)\}\}")
+
+
+def _extract_variables(content: str) -> list[str]:
+    """Return the unique {{variable}} names in content, in first-seen order."""
+    return list(dict.fromkeys(_VAR_RE.findall(content)))
+
+
+# HTML post-processing patterns (bookmark anchors, TOC linking)
+_RE_DOTTED = re.compile(r"(\d+(?:\.\d+)+)")
+_RE_APP_DOTTED = re.compile(r"([A-Za-z])\.(\d+(?:\.\d+)*)")
+_RE_SLUG = re.compile(r"[^a-z0-9]+")
+_RE_DIGITS = re.compile(r"^\d+$")
+_RE_LETTER = re.compile(r"^[A-Za-z]$")
+# Headings | TOC rows (section cell, title cell, page cell) | </table>
+_RE_POSTPROCESS = re.compile(
+    r"(?i:<(h[1-6])([^>]*)>(.*?)</\1>)"
+    r"|<td>(\s*\w+\s*)</td>\s*<td>((?:(?!</td>).)+)</td>\s*<td>\s*\d+\s*</td>"
+    r"|(?i:</table>)",
+    re.DOTALL,
+)
+
+
+# Cover block: first "# " title line, then everything through a "---" line
+_RE_COVER_TITLE = re.compile(r"^[^\S\n]*# [^\n]*?\S", re.MULTILINE)
+_RE_COVER_END = re.compile(r"^[^\S\n]*---[^\S\n]*$\n?", re.MULTILINE)
+
+_MD_EXTENSIONS = ["tables", "fenced_code", "toc", "nl2br"]
+_md_local = threading.local()
+
+
+def _markdown_converter() -> md_lib.Markdown:
+    """Return this thread's reusable Markdown instance.
+
+    Building the extension registry dominates md_lib.markdown() on small and
+    medium documents, so the converter is built once per thread and reset()
+    between documents (Markdown instances are not thread-safe).
+    """
+    converter = getattr(_md_local, "converter", None)
+    if converter is None:
+        converter = _md_local.converter = md_lib.Markdown(extensions=_MD_EXTENSIONS)
+    return converter
+
+
+def _dump(obj, pretty: bool) -> str:
+    """Serialize tool output as JSON: compact by default, indented on request."""
+    return json.dumps(obj, indent=2 if pretty else None, separators=None if pretty else (",", ":"))
+
 
 def _is_local_storage() -> bool:
     """Check if we're using local storage (has filesystem access)."""
@@ -82,19 +157,111 @@ def _use_supabase_for_configs() -> bool:
     return is_supabase_available() and has_company_configs_table()
 
 
-def _find_company_config(start_path: str) -> dict:
-    """Walk up from start_path to find company-config.json."""
-    current = Path(start_path).resolve()
-    if current.is_file():
-        current = current.parent
+def _write_html_file(path: str, parts: list[str]) -> None:
+    """Write HTML fragments straight to path, creating parent directories."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(parts)
 
-    while current != current.parent:
-        config_file = current / "company-config.json"
-        if config_file.exists():
-            return json.loads(config_file.read_text(encoding="utf-8"))
-        current = current.parent
 
-    return _default_config()
+def _list_template_files(templates_dir: Path) -> list[Path]:
+    """List .md templates in a directory, sorted by name. Empty if the directory is missing."""
+    try:
+        return sorted(p for p in templates_dir.iterdir() if p.suffix == ".md" and p.is_file())
+    except FileNotFoundError:
+        return []
+
+
+def _read_template_files(files: list[Path]) -> list[tuple[Path, str | Exception]]:
+    """Read template files concurrently; shared drives add per-file latency.
+
+    Returns (path, content) pairs in input order. A failed read yields the
+    exception in place of the content so callers can report it per file.
+    """
+    def _read(f: Path) -> tuple[Path, str | Exception]:
+        try:
+            return f, f.read_text(encoding="utf-8")
+        except Exception as e:
+            return f, e
+
+    with ThreadPoolExecutor(max_workers=min(16, len(files) or 1)) as ex:
+        return list(ex.map(_read, files))
+
+
+def _upsert_rows(rows: list[tuple[str, str, dict]], upsert_bulk, upsert_one) -> tuple[list[str], list[str]]:
+    """Upsert (name, label, row) entries in one request, retrying per row on failure.
+
+    The per-row fallback only runs when the bulk request fails, so errors are
+    reported against the rows that actually caused them.
+
+    Returns:
+        (names synced, error messages)
+    """
+    if not rows:
+        return [], []
+    try:
+        upsert_bulk([row for _, _, row in rows])
+        return [name for name, _, _ in rows], []
+    except Exception as e:
+        logger.warning(f"Bulk upsert of {len(rows)} rows failed, retrying per row: {e}")
+
+    synced, errors = [], []
+    for name, label, row in rows:
+        try:
+            upsert_one(row)
+            synced.append(name)
+        except Exception as e:
+            errors.append(f"{label}: {e}")
+    return synced, errors
+
+
+# Parsed config JSON keyed by path, validated against (mtime_ns, size)
+_CONFIG_CACHE: dict[str, tuple[int, int, dict]] = {}
+_CONFIG_CACHE_MAX = 32
+
+
+def _load_json_cached(path: Path) -> dict:
+    """Load a JSON config file, reusing the parsed dict while the file is unchanged.
+
+    The returned dict is shared between callers and must not be mutated.
+    """
+    st = path.stat()
+    key = str(path)
+    cached = _CONFIG_CACHE.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if key not in _CONFIG_CACHE and len(_CONFIG_CACHE) >= _CONFIG_CACHE_MAX:
+        # FIFO eviction: dicts preserve insertion order
+        del _CONFIG_CACHE[next(iter(_CONFIG_CACHE))]
+    _CONFIG_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+    return data
+
+
+# Lowercased company name / short name -> company-config.json path, built
+# lazily from COMPANY_CONFIG_PATHS under the shared drive root it was built for.
+# Rebuilds swap in a new dict, so readers holding the old one are unaffected.
+_NAME_INDEX: dict[str, Path] = {}
+_NAME_INDEX_ROOT: Optional[Path] = None
+# (mtime_ns, size) of each indexed candidate config, None where missing
+_NAME_INDEX_SIG: tuple = ()
+
+
+def _config_paths(root: Path) -> list[Path]:
+    return [root / subdir / "company-config.json" if subdir else root / "company-config.json"
+            for subdir in COMPANY_CONFIG_PATHS]
+
+
+def _config_signature(paths: list[Path]) -> tuple:
+    sig = []
+    for path in paths:
+        try:
+            st = path.stat()
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
 
 
 def _find_company_config_by_name(company: str) -> Optional[dict]:
@@ -114,18 +281,47 @@ def _find_company_config_by_name(company: str) -> Optional[dict]:
     except RuntimeError:
         return None
 
-    for subdir in COMPANY_CONFIG_PATHS:
-        config_path = root / subdir / "company-config.json" if subdir else root / "company-config.json"
-        if config_path.exists():
+    query = company.lower()
+    fresh = _NAME_INDEX_ROOT != root
+    if fresh:
+        _build_name_index(root)
+    while True:
+        index = _NAME_INDEX
+        config_path = index.get(query)
+        if config_path is None:
+            # Substring match, in COMPANY_CONFIG_PATHS order
+            config_path = next((path for key, path in index.items() if query in key), None)
+        if config_path is not None:
             try:
-                config = json.loads(config_path.read_text(encoding="utf-8"))
-                name = config.get("company", {}).get("name", "").lower()
-                short = config.get("company", {}).get("short_name", "").lower()
-                if company.lower() in name or company.lower() in short:
+                config = _load_json_cached(config_path)
+                company_info = config.get("company", {})
+                if query in company_info.get("name", "").lower() or query in company_info.get("short_name", "").lower():
                     return config
             except Exception:
-                continue
-    return None
+                pass
+        # Miss or stale entry: rescan once, but only if a config file changed
+        if fresh or _config_signature(_config_paths(root)) == _NAME_INDEX_SIG:
+            return None
+        _build_name_index(root)
+        fresh = True
+
+
+def _build_name_index(root: Path) -> None:
+    global _NAME_INDEX, _NAME_INDEX_ROOT, _NAME_INDEX_SIG
+    paths = _config_paths(root)
+    sig = _config_signature(paths)
+    index: dict[str, Path] = {}
+    for config_path in paths:
+        try:
+            company = _load_json_cached(config_path).get("company", {})
+        except Exception:
+            continue
+        for key in (company.get("name", "").lower(), company.get("short_name", "").lower()):
+            if key:
+                index.setdefault(key, config_path)
+    _NAME_INDEX = index
+    _NAME_INDEX_SIG = sig
+    _NAME_INDEX_ROOT = root
 
 
 def _default_config() -> dict:
@@ -157,21 +353,87 @@ def _default_config() -> dict:
     }
 
 
+@functools.lru_cache(maxsize=128)
+def _resolve_cached(path_str: str) -> Path:
+    """Path(path_str).resolve(), memoized: the same document folders are walked repeatedly."""
+    return Path(path_str).resolve()
+
+
+def _start_dir(start_path: str) -> Path:
+    current = _resolve_cached(start_path)
+    return current.parent if current.is_file() else current
+
+
+# One directory in an upward walk, with its entry names keyed by casefolded name
+# (so lookups behave like exists() on case-insensitive filesystems)
+_Level = tuple[Path, dict[str, str]]
+
+
+def _iter_dirs(current: Path) -> Iterator[_Level]:
+    """Yield each directory from current up to (not including) the root, with its entry names."""
+    while current != current.parent:
+        try:
+            with os.scandir(current) as it:
+                names = {entry.name.casefold(): entry.name for entry in it}
+        except OSError as e:
+            logger.warning(f"Could not list {current}: {e}")
+            names = {}
+        yield current, names
+        current = current.parent
+
+
+def _iter_levels(start_path: str, levels: Optional[list[_Level]] = None) -> Iterator[_Level]:
+    """Yield the directories from start_path upward, reusing already-listed levels first.
+
+    levels, if given, is a prefix of the walk (as returned by _walk_for_artifacts);
+    directories above it are listed lazily, only if the caller keeps iterating.
+    """
+    if not levels:
+        yield from _iter_dirs(_start_dir(start_path))
+        return
+    yield from levels
+    yield from _iter_dirs(levels[-1][0].parent)
+
+
 def _find_document_config(start_path: str) -> Optional[dict]:
     """Walk up from start_path to find document-config.json."""
-    current = Path(start_path).resolve()
-    if current.is_file():
-        current = current.parent
+    current = _start_dir(start_path)
     while current != current.parent:
         config_file = current / "document-config.json"
         if config_file.exists():
-            return json.loads(config_file.read_text(encoding="utf-8"))
+            return _load_json_cached(config_file)
         current = current.parent
     return None
 
 
-def _resolve_logo_path(config: dict, start_path: str) -> str:
-    """Resolve the logo path from brand config or by walking up directories."""
+def _walk_for_artifacts(start_path: str) -> tuple[Optional[Path], Optional[Path], list[_Level]]:
+    """Walk up from start_path, listing each directory once, until both configs are found.
+
+    Returns the nearest company-config.json and document-config.json (None
+    if absent) and the directories visited with their entry names, which
+    _resolve_logo_path reuses (and extends if needed) once the brand config
+    is known.
+    """
+    company_file = doc_file = None
+    levels = []
+    for current, names in _iter_dirs(_start_dir(start_path)):
+        levels.append((current, names))
+        if company_file is None and "company-config.json" in names:
+            company_file = current / names["company-config.json"]
+        if doc_file is None and "document-config.json" in names:
+            doc_file = current / names["document-config.json"]
+        if company_file is not None and doc_file is not None:
+            break
+
+    return company_file, doc_file, levels
+
+
+def _resolve_logo_path(config: dict, start_path: str, levels: Optional[list[_Level]] = None) -> str:
+    """Resolve the logo path from brand config or by walking up directories.
+
+    Each level is listed once (or taken from _walk_for_artifacts' levels)
+    and checked for both logo_dir/<logo> and a bare <logo>.
+    """
     logo_filename = config["brand"]["logo"]
     logo_dir = config["brand"].get("logo_dir", "brand-assets")
 
@@ -184,24 +446,75 @@ def _resolve_logo_path(config: dict, start_path: str) -> str:
     except RuntimeError:
         pass
 
-    # Fall back to walking up from start_path
-    current = Path(start_path).resolve()
-    if current.is_file():
-        current = current.parent
-
-    check = current
-    while check != check.parent:
-        candidate = check / logo_dir / logo_filename
-        if candidate.exists():
-            return str(candidate.resolve())
-        candidate = check / logo_filename
+    # An absolute logo_dir names one place; probe it directly
+    logo_dir_parts = PurePath(logo_dir).parts if logo_dir else ()
+    if logo_dir and os.path.isabs(logo_dir):
+        candidate = Path(logo_dir) / logo_filename
         if candidate.exists():
             return str(candidate.resolve())
-        check = check.parent
+        logo_dir_parts = ()
+
+    # Fall back to walking up from start_path. A logo with a path separator
+    # can't be matched against one level's names, so probe it with exists()
+    nested_logo = len(PurePath(logo_filename).parts) > 1
+    for check, names in _iter_levels(start_path, levels):
+        if logo_dir_parts and logo_dir_parts[0].casefold() in names:
+            candidate = check.joinpath(names[logo_dir_parts[0].casefold()], *logo_dir_parts[1:], logo_filename)
+            if candidate.exists():
+                return str(candidate.resolve())
+        if nested_logo:
+            if (check / logo_filename).exists():
+                return str((check / logo_filename).resolve())
+        elif logo_filename.casefold() in names:
+            return str((check / names[logo_filename.casefold()]).resolve())
 
     return logo_filename
 
 
+def _logo_file_uri(logo_uri: str) -> str:
+    """Turn a resolved absolute logo path into a file:// URI; pass anything else through."""
+    if os.path.isabs(logo_uri) and os.path.exists(logo_uri):
+        return PurePath(logo_uri).as_uri()
+    return logo_uri
+
+
+_LOGO_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+}
+# Absolute logo path -> (mtime_ns, size, data URI)
+_LOGO_URI_CACHE: dict[str, tuple[int, int, str]] = {}
+
+
+def _logo_data_uri(logo_path: str) -> str:
+    """Embed a resolved logo file as a base64 data URI for generated HTML.
+
+    The document then renders without fetching the logo, and repeated
+    generations reuse the encoded URI until the file changes. Paths that
+    are not an existing image fall back to _logo_file_uri.
+    """
+    mime = _LOGO_MIME_TYPES.get(os.path.splitext(logo_path)[1].lower())
+    if not mime or not os.path.isabs(logo_path):
+        return _logo_file_uri(logo_path)
+    try:
+        st = os.stat(logo_path)
+    except OSError:
+        return logo_path
+
+    cached = _LOGO_URI_CACHE.get(logo_path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+
+    with open(logo_path, "rb") as f:
+        uri = f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+    _LOGO_URI_CACHE[logo_path] = (st.st_mtime_ns, st.st_size, uri)
+    return uri
+
+
 def _build_footer_left(config: dict) -> str:
     company = config["company"]
     if company.get("is_parent", False):
@@ -214,48 +527,126 @@ def _build_footer_left(config: dict) -> str:
         )
 
 
+# Rendered CSS/header/footer fragments keyed by the config fields they read.
+# Bounded like _CONFIG_CACHE; configs with unhashable values are not cached.
+_CSS_CACHE: dict[tuple, str] = {}
+_HEADER_CACHE: dict[tuple, str] = {}
+_FOOTER_CACHE: dict[tuple, str] = {}
+_FRAGMENT_CACHE_MAX = 32
+_LOGO_PLACEHOLDER = "__LOGO_URI__"
+_PREWARMED = False
+
+
+def _memoize_fragment(cache: dict, key: tuple, build) -> str:
+    """Return cache[key], calling build() and storing its result on a miss."""
+    try:
+        hit = cache.get(key)
+    except TypeError:
+        return build()
+    if hit is None:
+        hit = build()
+        if len(cache) >= _FRAGMENT_CACHE_MAX:
+            cache.pop(next(iter(cache)))
+        cache[key] = hit
+    return hit
+
+
 def _build_header_html(config: dict, logo_uri: str) -> str:
-    brand = config["brand"]
-    contact = config["contact"]
+    # Cached with a placeholder so one entry serves every logo URI
     company = config["company"]
+    key = (
+        company["display_name_line1"],
+        company["display_name_line2"],
+        tuple(sorted(config["contact"].items())),
+    )
+    header = _memoize_fragment(_HEADER_CACHE, key, lambda: _render_header_html(config, _LOGO_PLACEHOLDER))
+    return header.replace(_LOGO_PLACEHOLDER, logo_uri, 1)
 
-    return f"""<div class="doc-header-left">
+
+def _prewarm_fragments() -> None:
+    """Render CSS/header/footer for every known local company config once.
+
+    Called on the first document generation so later documents for any of
+    these companies only hit the fragment caches.
+    """
+    global _PREWARMED
+    _PREWARMED = True
+    if not _is_local_storage():
+        return
+    try:
+        root = _get_shared_drive_root()
+    except RuntimeError:
+        return
+    for subdir in COMPANY_CONFIG_PATHS:
+        config_path = root / subdir / "company-config.json" if subdir else root / "company-config.json"
+        try:
+            config = _load_json_cached(config_path)
+            _build_branded_css(config)
+            _build_header_html(config, "")
+            _build_footer_html(config)
+        except Exception as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Skipping fragment prewarm for {config_path}: {e}")
+
+
+_HEADER_TEMPLATE = """<div class="doc-header-left">
       <img class="doc-header-logo" src="{logo_uri}" alt="">
-      <span class="doc-header-company">{company['display_name_line1']}<br>{company['display_name_line2']}</span>
+      <span class="doc-header-company">{display_name_line1}<br>{display_name_line2}</span>
     </div>
     <div class="doc-header-address">
       <table>
         <tr style="vertical-align:top;">
           <td><svg width="14" height="14" viewBox="0 0 24 24"><path fill="#EA4335" d="M12 2C8.13 2 5 5.13 5 9c0 5.25 7 13 7 13s7-7.75 7-13c0-3.87-3.13-7-7-7zm0 9.5a2.5 2.5 0 1 1 0-5 2.5 2.5 0 0 1 0 5z"/></svg></td>
-          <td>{contact['address_line1']}<br>{contact['address_line2']}</td>
+          <td>{address_line1}<br>{address_line2}</td>
         </tr>
         <tr><td colspan="2" style="padding:1px 0;"><hr style="border:none;border-top:1px solid #D0D0D0;margin:0;"></td></tr>
         <tr>
           <td style="vertical-align:middle;">&#x260E;</td>
-          <td style="vertical-align:middle;">{contact['phone']}</td>
+          <td style="vertical-align:middle;">{phone}</td>
         </tr>
       </table>
     </div>"""
 
 
-def _build_footer_html(config: dict) -> str:
+def _render_header_html(config: dict, logo_uri: str) -> str:
     company = config["company"]
-    footer_left = _build_footer_left(config)
+    return _HEADER_TEMPLATE.format_map({
+        **config["contact"],
+        "display_name_line1": company["display_name_line1"],
+        "display_name_line2": company["display_name_line2"],
+        "logo_uri": logo_uri,
+    })
 
-    return f"""<span class="doc-footer-left">{footer_left}</span>
-    <span class="doc-footer-tagline">{company['tagline']}</span>
+
+def _build_footer_html(config: dict) -> str:
+    key = tuple(sorted(config["company"].items()))
+    return _memoize_fragment(_FOOTER_CACHE, key, lambda: _render_footer_html(config))
+
+
+_FOOTER_TEMPLATE = """<span class="doc-footer-left">{footer_left}</span>
+    <span class="doc-footer-tagline">{tagline}</span>
     <span class="doc-footer-page"></span>"""
 
 
+def _render_footer_html(config: dict) -> str:
+    return _FOOTER_TEMPLATE.format_map({
+        "footer_left": _build_footer_left(config),
+        "tagline": config["company"]["tagline"],
+    })
+
+
 def _build_branded_css(config: dict) -> str:
     """Build CSS for browser-based print-to-PDF rendering.
 
     Uses @media print with @page for proper pagination, and screen styles
     for preview. Header/footer are repeated via position:fixed for print.
+    Output depends only on config["brand"], so it is memoized on that.
     """
-    brand = config["brand"]
+    key = tuple(sorted(config["brand"].items()))
+    return _memoize_fragment(_CSS_CACHE, key, lambda: _render_branded_css(config["brand"]))
 
-    return f"""
+
+_CSS_TEMPLATE = """
     /* ── Screen preview: simulate pages ── */
     @media screen {{
         body {{
@@ -291,10 +682,10 @@ def _build_branded_css(config: dict) -> str:
             left: 0;
             right: 0;
             padding: 8px 60px 20px 60px;
-            border-top: 1px solid {brand["accent_color"]};
+            border-top: 1px solid {accent_color};
             background: #fff;
             font-size: 10px;
-            color: {brand["secondary_text_color"]};
+            color: {secondary_text_color};
             display: flex;
             justify-content: space-between;
             align-items: center;
@@ -302,15 +693,15 @@ def _build_branded_css(config: dict) -> str:
     }}
 
     body {{
-        font-family: {brand["body_font"]};
+        font-family: {body_font};
         line-height: 1.6;
-        color: {brand["body_text_color"]};
+        color: {body_text_color};
         font-size: 12px;
     }}
 
     /* ── Header styles ── */
     .page-header {{
-        border-bottom: 1px solid {brand["accent_color"]};
+        border-bottom: 1px solid {accent_color};
         padding-bottom: 8px;
         margin-bottom: 20px;
         display: flex;
@@ -329,15 +720,15 @@ def _build_branded_css(config: dict) -> str:
         width: auto;
     }}
     .doc-header-company {{
-        font-family: {brand["heading_font"]};
+        font-family: {heading_font};
         font-weight: 600;
         font-size: 18px;
-        color: {brand["primary_color"]};
+        color: {primary_color};
         letter-spacing: 1px;
         line-height: 1.2;
     }}
     .doc-header-address {{
-        color: {brand["secondary_text_color"]};
+        color: {secondary_text_color};
         font-size: 9px;
         line-height: 1.2;
     }}
@@ -358,13 +749,13 @@ def _build_branded_css(config: dict) -> str:
 
     /* ── Footer bar ── */
     .page-footer-bar {{
-        border-top: 1px solid {brand["accent_color"]};
+        border-top: 1px solid {accent_color};
         padding-top: 8px;
         margin-top: 30px;
         display: flex;
         justify-content: space-between;
         align-items: center;
-        color: {brand["secondary_text_color"]};
+        color: {secondary_text_color};
         font-size: 10px;
     }}
     .doc-footer-left {{
@@ -402,30 +793,30 @@ def _build_branded_css(config: dict) -> str:
         padding-top: 80px;
     }}
     .cover-title {{
-        font-family: {brand["heading_font"]};
+        font-family: {heading_font};
         font-size: 32px;
-        color: {brand["primary_color"]};
+        color: {primary_color};
         font-weight: 700;
         margin-bottom: 8px;
     }}
     .cover-tagline {{
         font-size: 13px;
-        color: {brand["accent_color"]};
+        color: {accent_color};
         font-style: italic;
         margin-bottom: 50px;
         letter-spacing: 0.5px;
     }}
     .cover-purpose {{
-        font-family: {brand["heading_font"]};
+        font-family: {heading_font};
         font-size: 18px;
-        color: {brand["primary_color"]};
+        color: {primary_color};
         font-weight: 400;
         margin-bottom: 10px;
     }}
     .cover-divider {{
         width: 80px;
         height: 2px;
-        background: {brand["accent_color"]};
+        background: {accent_color};
         margin: 20px auto;
     }}
     .cover-meta {{
@@ -433,7 +824,7 @@ def _build_branded_css(config: dict) -> str:
         color: #555;
         line-height: 1.4;
     }}
-    .cover-meta strong {{ color: {brand["body_text_color"]}; }}
+    .cover-meta strong {{ color: {body_text_color}; }}
 
     /* ── TOC section ── */
     .toc-section {{
@@ -445,13 +836,13 @@ def _build_branded_css(config: dict) -> str:
 
     /* ── Content styles ── */
     h1 {{
-        font-family: {brand["body_font"]};
+        font-family: {body_font};
         font-size: 22px;
         font-weight: 600;
-        color: {brand["primary_color"]};
+        color: {primary_color};
         margin-top: 16px;
         margin-bottom: 10px;
-        border-bottom: 0.5px solid {brand["accent_color"]};
+        border-bottom: 0.5px solid {accent_color};
         padding-bottom: 6px;
         line-height: 1.3;
         page-break-before: always;
@@ -460,18 +851,18 @@ def _build_branded_css(config: dict) -> str:
         page-break-before: avoid;
     }}
     h2 {{
-        font-family: {brand["body_font"]};
+        font-family: {body_font};
         font-size: 14px;
         font-weight: 600;
-        color: {brand["primary_color"]};
+        color: {primary_color};
         margin-top: 18px;
         margin-bottom: 8px;
     }}
     h3 {{
-        font-family: {brand["body_font"]};
+        font-family: {body_font};
         font-size: 12px;
         font-weight: 600;
-        color: {brand["primary_color"]};
+        color: {primary_color};
         margin-top: 14px;
         margin-bottom: 6px;
     }}
@@ -491,7 +882,7 @@ def _build_branded_css(config: dict) -> str:
         border-bottom: 1px solid #E8E8E8;
     }}
     th {{
-        background-color: {brand["primary_color"]};
+        background-color: {primary_color};
         color: white;
         font-weight: bold;
         font-size: 10px;
@@ -514,7 +905,7 @@ def _build_branded_css(config: dict) -> str:
         padding: 10px;
         border-radius: 4px;
         overflow-x: auto;
-        border-left: 3px solid {brand["primary_color"]};
+        border-left: 3px solid {primary_color};
         font-size: 8pt;
     }}
     pre code {{
@@ -538,19 +929,23 @@ def _build_branded_css(config: dict) -> str:
         font-weight: 600;
     }}
     blockquote {{
-        border-left: 3px solid {brand["accent_color"]};
+        border-left: 3px solid {accent_color};
         padding-left: 12px;
         color: #555;
         font-style: italic;
         margin: 10px 0;
     }}
     a {{
-        color: {brand["body_text_color"]};
+        color: {body_text_color};
         text-decoration: none;
     }}
     """
 
 
+def _render_branded_css(brand: dict) -> str:
+    return _CSS_TEMPLATE.format_map(brand)
+
+
 def _build_cover_page(doc_config: dict, brand: dict) -> str:
     product = doc_config.get("product", {})
     doc = doc_config.get("document", {})
@@ -592,91 +987,121 @@ def _build_cover_page(doc_config: dict, brand: dict) -> str:
 
 
 def _strip_cover_from_markdown(md_content: str) -> str:
-    """Remove the title and metadata block from markdown since cover page handles it."""
-    lines = md_content.strip().split("\n")
-    skip_until_separator = False
-    result_lines = []
-    found_first_heading = False
-
-    for line in lines:
-        stripped = line.strip()
-        if not found_first_heading and stripped.startswith("# "):
-            found_first_heading = True
-            skip_until_separator = True
-            continue
-        if skip_until_separator:
-            if stripped == "---":
-                skip_until_separator = False
-                continue
-            continue
-        result_lines.append(line)
-
-    return "\n".join(result_lines)
-
+    """Remove the title and metadata block from markdown since cover page handles it.
 
-def _add_bookmark_anchors(html: str) -> str:
-    """Auto-generate id attributes on heading tags for bookmark navigation."""
-    def _make_id(tag: str, text: str) -> str:
-        text = text.strip()
-        m = re.match(r"Section\s+(\d+)", text, re.IGNORECASE)
-        if m:
-            return f"section-{m.group(1)}"
-        m = re.match(r"Appendix\s+([A-Za-z])", text, re.IGNORECASE)
-        if m:
-            return f"appendix-{m.group(1).lower()}"
-        m = re.match(r"(\d+(?:\.\d+)+)", text)
+    Drops the first "# " heading line through the next "---" line (or to
+    the end if there is none), keeping whatever precedes and follows.
+    """
+    md_content = md_content.strip()
+    title = _RE_COVER_TITLE.search(md_content)
+    if not title:
+        return md_content
+    end = _RE_COVER_END.search(md_content, title.end())
+    head = md_content[:title.start()]
+    tail = md_content[end.end():] if end else ""
+    # head ends with the newline before the title line; drop it if nothing follows
+    return head + tail if tail else head[:-1]
+
+
+def _leading_digits(s: str) -> str:
+    i = 0
+    while i < len(s) and s[i].isdecimal():
+        i += 1
+    return s[:i]
+
+
+def _make_id(text: str) -> str:
+    """Derive a bookmark anchor id from heading text.
+
+    "Section N" / "Appendix X" prefixes are recognized with plain string
+    checks; the dotted-number patterns only run when the first characters
+    can start one.
+    """
+    text = text.strip()
+    lo = text[:9].lower()
+    if lo.startswith("section") and text[7:8].isspace():
+        num = _leading_digits(text[8:].lstrip())
+        if num:
+            return f"section-{num}"
+    elif lo.startswith("appendix") and text[8:9].isspace():
+        letter = text[9:].lstrip()[:1]
+        if letter.isascii() and letter.isalpha():
+            return f"appendix-{letter.lower()}"
+    head = text[:1]
+    if head.isdecimal():
+        m = _RE_DOTTED.match(text)
         if m:
             return "section-" + m.group(1).replace(".", "-")
-        m = re.match(r"([A-Za-z])\.(\d+(?:\.\d+)*)", text)
+    elif text[1:2] == "." and head.isascii() and head.isalpha():
+        m = _RE_APP_DOTTED.match(text)
         if m:
             return f"appendix-{m.group(1).lower()}-{m.group(2).replace('.', '-')}"
-        slug = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
-        return slug[:60]
-
-    def _replace_heading(match):
-        tag = match.group(1)
-        attrs = match.group(2) or ""
-        content = match.group(3)
-        if 'id="' in attrs or "id='" in attrs:
-            return match.group(0)
-        anchor_id = _make_id(tag, content)
-        return f"<{tag}{attrs} id=\"{anchor_id}\">{content}</{tag}>"
-
-    return re.sub(
-        r"<(h[1-6])([^>]*)>(.*?)</\1>",
-        _replace_heading,
-        html,
-        flags=re.IGNORECASE | re.DOTALL,
-    )
+    slug = _RE_SLUG.sub("-", text.lower()).strip("-")
+    return slug[:60]
 
 
-def _auto_link_toc(html: str) -> str:
-    """Make TOC table entries into clickable anchor links."""
-    def _link_toc_row(match):
-        full = match.group(0)
-        section_num = match.group(1).strip()
-        title = match.group(2).strip()
-        if not section_num or not title:
-            return full
-        if re.match(r"^\d+$", section_num):
-            anchor = f"section-{section_num}"
-        elif re.match(r"^[A-Za-z]$", section_num):
-            anchor = f"appendix-{section_num.lower()}"
-        else:
-            return full
-        if "<a " in title:
-            return full
-        return full.replace(
-            f"<td>{match.group(2)}</td>",
-            f'<td><a href="#{anchor}">{title}</a></td>',
-        )
+def _anchor_heading(full: str, tag: str, attrs: str, content: str) -> str:
+    """Add an id attribute to a heading tag unless it already has one."""
+    if 'id="' in attrs or "id='" in attrs:
+        return full
+    return f"<{tag}{attrs} id=\"{_make_id(content)}\">{content}</{tag}>"
 
-    return re.sub(
-        r"<td>(\s*\w+\s*)</td>\s*<td>((?:(?!</td>).)+)</td>\s*<td>\s*\d+\s*</td>",
-        _link_toc_row,
-        html,
-        flags=re.DOTALL,
-    )
+
+def _link_toc_row(full: str, section_cell: str, title_cell: str, title_at: int) -> str:
+    """Make a TOC table row's title cell link to its section/appendix anchor.
+
+    title_at is the offset of title_cell within full, so the link is spliced
+    in by slicing rather than searching the row again.
+    """
+    section_num = section_cell.strip()
+    title = title_cell.strip()
+    if not section_num or not title:
+        return full
+    if _RE_DIGITS.match(section_num):
+        anchor = f"section-{section_num}"
+    elif _RE_LETTER.match(section_num):
+        anchor = f"appendix-{section_num.lower()}"
+    else:
+        return full
+    if "<a " in title:
+        return full
+    return f'{full[:title_at]}<a href="#{anchor}">{title}</a>{full[title_at + len(title_cell):]}'
+
+
+def _postprocess_html(html: str) -> str:
+    """Add heading bookmark anchors, link TOC rows and wrap the TOC, in one pass.
+
+    The TOC wrap covers the first "Table of Contents" <h2> through the next
+    </table>, so it can page-break as a unit.
+    """
+    return "".join(_postprocess_parts(html))
+
+
+def _postprocess_parts(html: str) -> list[str]:
+    """_postprocess_html, returning the output fragments unjoined."""
+    out: list[str] = []
+    pos = 0
+    toc_start = -1  # index in out where the TOC heading begins, until wrapped
+    toc_done = False
+    for m in _RE_POSTPROCESS.finditer(html):
+        out.append(html[pos:m.start()])
+        pos = m.end()
+        tag = m.group(1)
+        if tag:
+            content = m.group(3)
+            if not toc_done and toc_start < 0 and tag.lower() == "h2" and content.lower() == "table of contents":
+                toc_start = len(out)
+            out.append(_anchor_heading(m.group(0), tag, m.group(2) or "", content))
+        elif m.group(4) is not None:
+            out.append(_link_toc_row(m.group(0), m.group(4), m.group(5), m.start(5) - m.start()))
+        else:
+            out.append(m.group(0))
+            if toc_start >= 0 and not toc_done:
+                out.insert(toc_start, '<div class="toc-section">')
+                out.append("</div>")
+                toc_done = True
+    out.append(html[pos:])
+    return out
 
 
 def _resolve_template_variables(content: str, config: dict) -> str:
@@ -749,6 +1174,16 @@ def _markdown_to_branded_html(
     doc_config: Optional[dict] = None,
 ) -> str:
     """Convert markdown content to branded HTML with header/footer."""
+    return "".join(_branded_html_parts(md_content, config, logo_uri, doc_config))
+
+
+def _branded_html_parts(
+    md_content: str,
+    config: dict,
+    logo_uri: str,
+    doc_config: Optional[dict] = None,
+) -> list[str]:
+    """Branded HTML as ordered fragments, so it can be written without joining."""
     # Resolve {{variable}} placeholders from company config
     md_content = _resolve_template_variables(md_content, config)
 
@@ -761,42 +1196,28 @@ def _markdown_to_branded_html(
         cover_html = _build_cover_page(doc_config, config["brand"])
         md_content = _strip_cover_from_markdown(md_content)
 
-    # Strip YAML frontmatter
-    if md_content.strip().startswith("---"):
-        parts = md_content.split("---", 2)
-        if len(parts) >= 3:
-            md_content = parts[2]
-
-    html_content = md_lib.markdown(
-        md_content,
-        extensions=["tables", "fenced_code", "toc", "nl2br"],
-    )
-
-    html_content = _add_bookmark_anchors(html_content)
-    html_content = _auto_link_toc(html_content)
-
-    # Wrap TOC in page-break div
-    html_content = re.sub(
-        r'(<h2[^>]*>Table of Contents</h2>.*?</table>)',
-        r'<div class="toc-section">\1</div>',
-        html_content,
-        count=1,
-        flags=re.DOTALL | re.IGNORECASE,
-    )
-
-    return f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <style>{css}</style>
-</head>
-<body>
-    <div class="page-header">{header_html}</div>
-    {cover_html}
-    {html_content}
-    <div class="page-footer-bar">{footer_html}</div>
-</body>
-</html>"""
+    # Strip YAML frontmatter: everything up to and including the second "---"
+    open_fence = md_content.find("---")
+    if open_fence != -1 and (open_fence == 0 or md_content[:open_fence].isspace()):
+        close_fence = md_content.find("---", open_fence + 3)
+        if close_fence != -1:
+            md_content = md_content[close_fence + 3:]
+
+    html_content = _markdown_converter().reset().convert(md_content)
+
+    return [
+        '<!DOCTYPE html>\n<html>\n<head>\n    <meta charset="utf-8">\n    <style>',
+        css,
+        '</style>\n</head>\n<body>\n    <div class="page-header">',
+        header_html,
+        "</div>\n    ",
+        cover_html,
+        "\n    ",
+        *_postprocess_parts(html_content),
+        '\n    <div class="page-footer-bar">',
+        footer_html,
+        "</div>\n</body>\n</html>",
+    ]
 
 
 def register() -> ToolModule:
@@ -854,7 +1275,13 @@ def register() -> ToolModule:
         Tool(
             name="list_document_templates",
             description="List available document templates.",
-            inputSchema={"type": "object", "properties": {}, "required": []},
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pretty": {"type": "boolean", "description": "Indent the JSON output for readability (default: false, compact)"},
+                },
+                "required": [],
+            },
         ),
         Tool(
             name="get_brand_assets",
@@ -866,6 +1293,7 @@ def register() -> ToolModule:
                         "type": "string",
                         "description": "Company name, e.g. 'Om Apex Holdings', 'Om AI Solutions', 'Om Luxe Properties', 'Om Supply Chain'",
                     },
+                    "pretty": {"type": "boolean", "description": "Indent the JSON output for readability (default: false, compact)"},
                 },
                 "required": ["company"],
             },
@@ -873,12 +1301,24 @@ def register() -> ToolModule:
         Tool(
             name="list_company_configs",
             description="List company configs with branding and legal info summary.",
-            inputSchema={"type": "object", "properties": {}, "required": []},
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pretty": {"type": "boolean", "description": "Indent the JSON output for readability (default: false, compact)"},
+                },
+                "required": [],
+            },
         ),
         Tool(
             name="sync_templates_to_supabase",
             description="Sync templates and company configs from local Google Drive to Supabase.",
-            inputSchema={"type": "object", "properties": {}, "required": []},
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "pretty": {"type": "boolean", "description": "Indent the JSON output for readability (default: false, compact)"},
+                },
+                "required": [],
+            },
         ),
         Tool(
             name="create_document_template",
@@ -954,39 +1394,46 @@ def register() -> ToolModule:
             if not md_content and not md_file_path:
                 return [TextContent(type="text", text="Error: Provide either md_content or md_file_path")]
 
-            # Load markdown from file if path given
+            if not _PREWARMED:
+                await asyncio.to_thread(_prewarm_fragments)
+
             search_start = md_file_path or str(_get_shared_drive_root())
             if md_file_path:
                 md_path = Path(md_file_path)
                 if not md_path.exists():
                     return [TextContent(type="text", text=f"Error: File not found: {md_file_path}")]
-                md_content = md_path.read_text(encoding="utf-8")
                 if not output_path:
                     output_path = str(md_path.with_suffix(".html"))
 
             if not output_path:
                 return [TextContent(type="text", text="Error: output_path is required when using md_content directly")]
 
-            # Find company config
+            # Blocking I/O runs off the event loop: read the markdown (if from a
+            # file) while the config/logo directory walk runs alongside it
+            read_md = asyncio.to_thread(md_path.read_text, encoding="utf-8") if md_file_path else asyncio.sleep(0, md_content)
+            md_content, (company_file, doc_file, levels) = await asyncio.gather(
+                read_md, asyncio.to_thread(_walk_for_artifacts, search_start)
+            )
+
             if company_name:
-                config = _find_company_config_by_name(company_name) or _default_config()
+                config = await asyncio.to_thread(_find_company_config_by_name, company_name) or _default_config()
+            elif company_file:
+                config = await asyncio.to_thread(_load_json_cached, company_file)
             else:
-                config = _find_company_config(search_start)
-
-            logo_uri = _resolve_logo_path(config, search_start)
-            logo_path = Path(logo_uri)
-            if logo_path.is_absolute() and logo_path.exists():
-                logo_uri = logo_path.as_uri()
+                config = _default_config()
 
-            doc_config = _find_document_config(search_start)
+            logo_path, doc_config = await asyncio.gather(
+                asyncio.to_thread(_resolve_logo_path, config, search_start, levels),
+                asyncio.to_thread(_load_json_cached, doc_file) if doc_file else asyncio.sleep(0),
+            )
+            logo_uri = await asyncio.to_thread(_logo_data_uri, logo_path)
 
             try:
-                html_output = _markdown_to_branded_html(md_content, config, logo_uri, doc_config)
+                html_parts = _branded_html_parts(md_content, config, logo_uri, doc_config)
             except Exception as e:
                 return [TextContent(type="text", text=f"Error generating HTML: {e}")]
 
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            Path(output_path).write_text(html_output, encoding="utf-8")
+            await asyncio.to_thread(_write_html_file, output_path, html_parts)
 
             return [TextContent(type="text", text=f"HTML generated successfully: {output_path}\n\nOpen in browser and use Print (Cmd+P) -> Save as PDF for final output.")]
 
@@ -998,20 +1445,23 @@ def register() -> ToolModule:
             if not template_name or not company_name:
                 return [TextContent(type="text", text="Error: Both 'template' and 'company' are required.")]
 
+            if not _PREWARMED:
+                await asyncio.to_thread(_prewarm_fragments)
+
             md_content = None
             template_source = "local"
 
             # Try Supabase first if not using local storage
             if _use_supabase_for_templates():
                 # Normalize template name to ID format
-                template_id = template_name.lower().replace(" ", "-")
+                template_id = _slugify(template_name)
                 if not template_id.endswith("-template"):
                     template_id = f"{template_id}-template"
 
                 template = sb_get_template(template_id)
                 if not template:
                     # Try without -template suffix
-                    template = sb_get_template(template_name.lower().replace(" ", "-"))
+                    template = sb_get_template(_slugify(template_name))
 
                 if template:
                     md_content = template["content"]
@@ -1032,7 +1482,7 @@ def register() -> ToolModule:
                     # Try without assuming .md was stripped
                     template_path = root / "document-templates" / template_name
                     if not template_path.exists():
-                        available = [f.stem for f in (root / "document-templates").glob("*.md")]
+                        available = [f.stem for f in _list_template_files(root / "document-templates")]
                         return [TextContent(type="text", text=f"Error: Template not found: {template_name}\nAvailable: {', '.join(available)}")]
 
                 md_content = template_path.read_text(encoding="utf-8")
@@ -1047,10 +1497,8 @@ def register() -> ToolModule:
             if _is_local_storage():
                 try:
                     root = _get_shared_drive_root()
-                    logo_uri = _resolve_logo_path(config, str(root / "document-templates"))
-                    logo_path = Path(logo_uri)
-                    if logo_path.is_absolute() and logo_path.exists():
-                        logo_uri = logo_path.as_uri()
+                    logo_path = await asyncio.to_thread(_resolve_logo_path, config, str(root / "document-templates"))
+                    logo_uri = await asyncio.to_thread(_logo_data_uri, logo_path)
                 except RuntimeError:
                     pass
 
@@ -1070,11 +1518,11 @@ def register() -> ToolModule:
                 doc_config = _find_document_config(str(root / "document-templates"))
 
                 try:
-                    html_output = _markdown_to_branded_html(md_content, config, logo_uri, doc_config)
+                    html_parts = _branded_html_parts(md_content, config, logo_uri, doc_config)
                 except Exception as e:
                     return [TextContent(type="text", text=f"Error generating HTML: {e}")]
 
-                output_path.write_text(html_output, encoding="utf-8")
+                _write_html_file(str(output_path), html_parts)
 
                 return [TextContent(type="text", text=(
                     f"Document generated successfully!\n\n"
@@ -1090,23 +1538,28 @@ def register() -> ToolModule:
                 except Exception as e:
                     return [TextContent(type="text", text=f"Error generating HTML: {e}")]
 
-                return [TextContent(type="text", text=(
+                # HTML goes in its own content item so the (possibly large) document
+                # is not copied into a combined f-string with the summary
+                header = (
                     f"Document generated (template from {template_source})!\n\n"
                     f"Company: {config['company']['name']}\n"
                     f"Template: {template_name}\n"
                     f"Suggested filename: {output_filename}\n\n"
                     f"Note: Running in remote mode - cannot write to filesystem.\n"
-                    f"HTML content returned below. Save it locally and open in browser for Print-to-PDF.\n\n"
-                    f"---HTML START---\n{html_output}\n---HTML END---"
-                ))]
+                    f"HTML content returned below. Save it locally and open in browser for Print-to-PDF.\n"
+                )
+                return [
+                    TextContent(type="text", text=header),
+                    TextContent(type="text", text=html_output),
+                ]
 
         elif name == "view_document_template":
             template_name = arguments.get("template", "")
             if not template_name:
-                return [TextContent(type="text", text="Error: 'template' is required.")]
+                return list(_ERR_TEMPLATE_REQUIRED)
 
             # Normalize template name to ID format for Supabase lookup
-            template_id = template_name.lower().replace(" ", "-")
+            template_id = _slugify(template_name)
 
             # Try local storage first if available
             local_found = False
@@ -1119,7 +1572,7 @@ def register() -> ToolModule:
                     if template_path.exists():
                         local_found = True
                         content = template_path.read_text(encoding="utf-8")
-                        variables = sorted(set(re.findall(r"\{\{(\w+)\}\}", content)))
+                        variables = _extract_variables(content)
                         return [TextContent(type="text", text=(
                             f"**Template:** {template_path.name} (local)\n\n"
                             f"**Variables used ({len(variables)}):** {', '.join(variables)}\n\n"
@@ -1146,7 +1599,7 @@ def register() -> ToolModule:
 
                 if template:
                     content = template["content"]
-                    variables = template.get("variables", []) or sorted(set(re.findall(r"\{\{(\w+)\}\}", content)))
+                    variables = template.get("variables", []) or _extract_variables(content)
                     source = "supabase"
                     return [TextContent(type="text", text=(
                         f"**Template:** {template['filename']} ({source})\n\n"
@@ -1159,7 +1612,7 @@ def register() -> ToolModule:
             if _is_local_storage():
                 try:
                     root = _get_shared_drive_root()
-                    available.extend([f.stem for f in (root / "document-templates").glob("*.md")])
+                    available.extend([f.stem for f in _list_template_files(root / "document-templates")])
                 except RuntimeError:
                     pass
             if is_supabase_available():
@@ -1178,7 +1631,7 @@ def register() -> ToolModule:
                     root = _get_shared_drive_root()
                     templates_dir = root / "document-templates"
                     if templates_dir.exists():
-                        for f in sorted(templates_dir.glob("*.md")):
+                        for f in _list_template_files(templates_dir):
                             templates.append({
                                 "name": f.stem,
                                 "filename": f.name,
@@ -1207,12 +1660,12 @@ def register() -> ToolModule:
                     return [TextContent(type="text", text="Error: No storage available. Neither local storage nor Supabase is configured.")]
                 return [TextContent(type="text", text="No templates found in local storage or Supabase.")]
 
-            return [TextContent(type="text", text=json.dumps(templates, indent=2))]
+            return [TextContent(type="text", text=_dump(templates, arguments.get("pretty", False)))]
 
         elif name == "get_brand_assets":
             company_name = arguments.get("company", "")
             if not company_name:
-                return [TextContent(type="text", text="Error: 'company' is required.")]
+                return list(_ERR_COMPANY_REQUIRED)
 
             config = _find_company_config_by_name(company_name)
             if not config:
@@ -1227,10 +1680,7 @@ def register() -> ToolModule:
             logo_uri = brand.get("logo", "")
             if _is_local_storage():
                 try:
-                    logo_uri = _resolve_logo_path(config, str(_get_shared_drive_root()))
-                    logo_path = Path(logo_uri)
-                    if logo_path.is_absolute() and logo_path.exists():
-                        logo_uri = logo_path.as_uri()
+                    logo_uri = _logo_file_uri(_resolve_logo_path(config, str(_get_shared_drive_root())))
                 except RuntimeError:
                     pass  # Non-local, keep original logo filename
 
@@ -1244,7 +1694,7 @@ def register() -> ToolModule:
                 "legal": legal,
             }
 
-            return [TextContent(type="text", text=json.dumps(output, indent=2))]
+            return [TextContent(type="text", text=_dump(output, arguments.get("pretty", False)))]
 
         elif name == "list_company_configs":
             # Try Supabase first if not using local storage
@@ -1269,7 +1719,7 @@ def register() -> ToolModule:
                             "ein": legal.get("ein", ""),
                             "formation_date": legal.get("formation_date", ""),
                         })
-                    return [TextContent(type="text", text=json.dumps(result, indent=2))]
+                    return [TextContent(type="text", text=_dump(result, arguments.get("pretty", False)))]
                 return [TextContent(type="text", text="No company configs in Supabase. Use sync_templates_to_supabase to upload configs.")]
 
             # Fall back to local storage
@@ -1283,7 +1733,7 @@ def register() -> ToolModule:
                 config_path = root / subdir / "company-config.json" if subdir else root / "company-config.json"
                 if config_path.exists():
                     try:
-                        data = json.loads(config_path.read_text(encoding="utf-8"))
+                        data = _load_json_cached(config_path)
                         company = data.get("company", {})
                         brand = data.get("brand", {})
                         legal = data.get("legal", {})
@@ -1305,63 +1755,67 @@ def register() -> ToolModule:
             if not configs:
                 return [TextContent(type="text", text="No company-config.json files found in known paths.")]
 
-            return [TextContent(type="text", text=json.dumps(configs, indent=2))]
+            return [TextContent(type="text", text=_dump(configs, arguments.get("pretty", False)))]
 
         elif name == "sync_templates_to_supabase":
             if not _is_local_storage():
-                return [TextContent(type="text", text="Error: sync_templates_to_supabase requires local storage access.")]
+                return list(_ERR_NOT_LOCAL_SYNC)
 
             if not is_supabase_available():
-                return [TextContent(type="text", text="Error: Supabase is not configured.")]
+                return list(_ERR_SUPABASE_UNCONFIGURED)
 
             root = _get_shared_drive_root()
             results = {"templates_synced": [], "configs_synced": [], "errors": []}
 
-            # Sync document templates
+            # Collect document templates
+            templates_to_upload = []
             templates_dir = root / "document-templates"
             if templates_dir.exists():
-                for f in templates_dir.glob("*.md"):
-                    try:
-                        content = f.read_text(encoding="utf-8")
-                        variables = sorted(set(re.findall(r"\{\{(\w+)\}\}", content)))
-                        template_id = f.stem.lower().replace(" ", "-")
-                        template = {
-                            "id": template_id,
-                            "name": f.stem,
-                            "filename": f.name,
-                            "content": content,
-                            "variables": variables,
-                        }
-                        sb_upsert_template(template)
-                        results["templates_synced"].append(f.stem)
-                    except Exception as e:
-                        results["errors"].append(f"Template {f.name}: {e}")
-
-            # Sync company configs
+                files = _list_template_files(templates_dir)
+                for f, content in _read_template_files(files):
+                    if isinstance(content, Exception):
+                        results["errors"].append(f"Template {f.name}: {content}")
+                        continue
+                    variables = _extract_variables(content)
+                    templates_to_upload.append((f.stem, f"Template {f.name}", {
+                        "id": _slugify(f.stem),
+                        "name": f.stem,
+                        "filename": f.name,
+                        "content": content,
+                        "variables": variables,
+                    }))
+
+            # Collect company configs
+            configs_to_upload = []
             for subdir in COMPANY_CONFIG_PATHS:
                 config_path = root / subdir / "company-config.json" if subdir else root / "company-config.json"
                 if config_path.exists():
                     try:
-                        data = json.loads(config_path.read_text(encoding="utf-8"))
+                        data = _load_json_cached(config_path)
                         company_name = data.get("company", {}).get("name", "Unknown")
                         short_name = data.get("company", {}).get("short_name", "")
-                        config_id = short_name.lower().replace(" ", "-") if short_name else company_name.lower().replace(" ", "-")
-                        config_row = {
-                            "id": config_id,
+                        configs_to_upload.append((company_name, f"Config {config_path.name}", {
+                            "id": _slugify(short_name or company_name),
                             "company_name": company_name,
                             "short_name": short_name,
                             "config": data,
-                        }
-                        sb_upsert_config(config_row)
-                        results["configs_synced"].append(company_name)
+                        }))
                     except Exception as e:
                         results["errors"].append(f"Config {config_path.name}: {e}")
 
+            # One request per table; per-row retry only if the bulk upsert fails
+            synced, errors = _upsert_rows(templates_to_upload, sb_upsert_templates_bulk, sb_upsert_template)
+            results["templates_synced"].extend(synced)
+            results["errors"].extend(errors)
+            synced, errors = _upsert_rows(configs_to_upload, sb_upsert_configs_bulk, sb_upsert_config)
+            results["configs_synced"].extend(synced)
+            results["errors"].extend(errors)
+
             summary = f"Synced {len(results['templates_synced'])} templates and {len(results['configs_synced'])} configs to Supabase."
             if results["errors"]:
                 summary += f"\n\nErrors ({len(results['errors'])}):\n" + "\n".join(results["errors"])
 
-            return [TextContent(type="text", text=summary + "\n\n" + json.dumps(results, indent=2))]
+            return [TextContent(type="text", text=summary + "\n\n" + _dump(results, arguments.get("pretty", False)))]
 
         elif name == "create_document_template":
             template_name = arguments.get("name", "").strip()
@@ -1377,7 +1831,7 @@ def register() -> ToolModule:
                 return [TextContent(type="text", text="Error: Supabase is not configured. Templates require Supabase storage.")]
 
             # Generate template ID from name
-            template_id = template_name.lower().replace(" ", "-")
+            template_id = _slugify(template_name)
 
             # Check if template already exists
             existing = sb_get_template(template_id)
@@ -1388,7 +1842,7 @@ def register() -> ToolModule:
                 ))]
 
             # Extract variables from content
-            variables = sorted(set(re.findall(r"\{\{(\w+)\}\}", content)))
+            variables = _extract_variables(content)
 
             # Create the template
             template = {
@@ -1448,7 +1902,7 @@ def register() -> ToolModule:
 
             # Recalculate variables if content changed
             content_for_vars = new_content if new_content else existing.get("content", "")
-            updated["variables"] = sorted(set(re.findall(r"\{\{(\w+)\}\}", content_for_vars)))
+            updated["variables"] = _extract_variables(content_for_vars)
 
             try:
                 sb_upsert_template(updated)
@@ -4,11 +4,15 @@ Saves session handoffs to history and retrieves them per project.
 Local handoff.md files are the primary handoff mechanism; this is the archive.
 """
 
+import asyncio
+import hashlib
 import json
 import logging
-import traceback
+import time
+from typing import Optional
 
 from mcp.types import Tool, TextContent
+from pydantic import BaseModel
 
 from . import ToolModule
 from ..supabase_client import (
@@ -22,147 +26,230 @@ logger = logging.getLogger("om-apex-mcp")
 READING = ["get_handoff_history"]
 WRITING = ["save_session_handoff"]
 
+_SAVED_TEMPLATE = (
+    "Session handoff saved to history.\n"
+    "- Project: {project_code}\n"
+    "- By: {person}\n"
+    "- Via: {interface}"
+)
+_UNCHANGED_TEMPLATE = (
+    "Session handoff identical to the project's latest saved handoff; nothing written.\n"
+    "- Project: {project_code}\n"
+    "- By: {person}\n"
+    "- Via: {interface}"
+)
 
-def register() -> ToolModule:
-    tools = [
-        Tool(
-            name="get_handoff_history",
-            description=(
-                "Get previous session handoffs from history for a project. "
-                "Optionally filter by created_by to retrieve entries from a specific "
-                "instance or person (e.g., 'Nishad-2'). "
-                "Useful for instance-aware context when multiple Claude instances are running."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_code": {
-                        "type": "string",
-                        "description": "Project code to filter by (e.g., 'ai-quorum', 'mcp-server')",
-                    },
-                    "created_by": {
-                        "type": "string",
-                        "description": "Filter to only return handoffs by this instance/person (e.g., 'Nishad-2')",
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Max number of records to return (default: 5)",
-                    },
+
+class HandoffHistoryArgs(BaseModel):
+    project_code: str
+    limit: int = 5
+    created_by: Optional[str] = None
+
+
+class SaveHandoffArgs(BaseModel):
+    project_code: str
+    person: str = "Unknown"
+    interface: str = "unknown"
+    content: str = ""
+
+
+# History rows only change when a handoff is saved, so session-start polls
+# are served from memory for a short TTL. Keyed by (project_code, limit,
+# created_by); a save through this server drops that project's entries.
+_HISTORY_TTL = 30.0
+_HISTORY_CACHE_MAX = 128
+_history_cache: dict[tuple, tuple[float, list]] = {}
+
+
+def _get_history_cached(project_code: str, limit: int, created_by) -> list:
+    key = (project_code, limit, created_by)
+    cached = _history_cache.get(key)
+    now = time.monotonic()
+    if cached:
+        if now - cached[0] < _HISTORY_TTL:
+            return cached[1]
+        del _history_cache[key]  # expired
+    records = sb_get_history(project_code=project_code, limit=limit, created_by=created_by)
+    if records:  # an empty list may be a swallowed fetch error; don't pin it
+        if len(_history_cache) >= _HISTORY_CACHE_MAX:
+            # FIFO eviction: dicts preserve insertion order
+            del _history_cache[next(iter(_history_cache))]
+        _history_cache[key] = (now, records)
+    return records
+
+
+# SHA-256 of the last handoff this server saved per project_code, over person,
+# interface and content. Other instances, the portal and Cortex agents write
+# history too, so a match is only a hint: it is confirmed against the project's
+# newest history row before a save is skipped.
+_last_saved_hash: dict[str, bytes] = {}
+
+
+def _is_latest_handoff(project_code: str, person: str, interface: str, content: str) -> bool:
+    latest = sb_get_history(project_code=project_code, limit=1)
+    return bool(latest) and (
+        latest[0].get("created_by"), latest[0].get("interface"), latest[0].get("content")
+    ) == (person, interface, content)
+
+
+def _invalidate_history(project_code: str) -> None:
+    for key in [k for k in _history_cache if k[0] == project_code]:
+        del _history_cache[key]
+
+
+_TOOLS = [
+    Tool(
+        name="get_handoff_history",
+        description=(
+            "Get previous session handoffs from history for a project. "
+            "Optionally filter by created_by to retrieve entries from a specific "
+            "instance or person (e.g., 'Nishad-2'). "
+            "Useful for instance-aware context when multiple Claude instances are running."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_code": {
+                    "type": "string",
+                    "description": "Project code to filter by (e.g., 'ai-quorum', 'mcp-server')",
+                },
+                "created_by": {
+                    "type": "string",
+                    "description": "Filter to only return handoffs by this instance/person (e.g., 'Nishad-2')",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Max number of records to return (default: 5)",
                 },
-                "required": ["project_code"],
             },
+            "required": ["project_code"],
+        },
+    ),
+    Tool(
+        name="save_session_handoff",
+        description=(
+            "Save a session handoff to history. Inserts directly into history table. "
+            "Include: current state, deployment status, last session summary, active work by person, "
+            "blockers, key constants, recent decisions, git status, and system improvements."
         ),
-        Tool(
-            name="save_session_handoff",
-            description=(
-                "Save a session handoff to history. Inserts directly into history table. "
-                "Include: current state, deployment status, last session summary, active work by person, "
-                "blockers, key constants, recent decisions, git status, and system improvements."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "person": {
-                        "type": "string",
-                        "description": "Who is writing this handoff: Nishad or Sumedha",
-                    },
-                    "interface": {
-                        "type": "string",
-                        "description": "Which Claude interface: code, code-app, chat, or cowork",
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": (
-                            "Full markdown handoff content. Should include sections: "
-                            "Current State, Deployment Status, Last Session Summary, "
-                            "Active Work by Person, Blockers, Key Constants, "
-                            "Recent Decisions, Git Status, System Improvements (if any)"
-                        ),
-                    },
-                    "project_code": {
-                        "type": "string",
-                        "description": "Project code for this handoff (e.g., 'ai-quorum', 'mcp-server')",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "person": {
+                    "type": "string",
+                    "description": "Who is writing this handoff: Nishad or Sumedha",
+                },
+                "interface": {
+                    "type": "string",
+                    "description": "Which Claude interface: code, code-app, chat, or cowork",
+                },
+                "content": {
+                    "type": "string",
+                    "description": (
+                        "Full markdown handoff content. Should include sections: "
+                        "Current State, Deployment Status, Last Session Summary, "
+                        "Active Work by Person, Blockers, Key Constants, "
+                        "Recent Decisions, Git Status, System Improvements (if any)"
+                    ),
+                },
+                "project_code": {
+                    "type": "string",
+                    "description": "Project code for this handoff (e.g., 'ai-quorum', 'mcp-server')",
                 },
-                "required": ["person", "interface", "content", "project_code"],
             },
-        ),
-    ]
-
-    async def handler(name: str, arguments: dict):
-        if name == "get_handoff_history":
-            try:
-                if not is_supabase_available():
-                    return [TextContent(
-                        type="text",
-                        text="Handoff history unavailable (Supabase offline).",
-                    )]
-
-                project_code = arguments["project_code"]
-                limit = arguments.get("limit", 5)
-                created_by = arguments.get("created_by")
-                records = sb_get_history(project_code=project_code, limit=limit, created_by=created_by)
-
-                if not records:
-                    filter_note = f" for '{created_by}'" if created_by else ""
-                    return [TextContent(
-                        type="text",
-                        text=f"No handoff history found for project '{project_code}'{filter_note}.",
-                    )]
-
-                lines = []
-                filter_note = f" (filtered by: {created_by})" if created_by else ""
-                lines.append(f"Handoff history for '{project_code}' — {len(records)} record(s){filter_note}:\n")
-                for i, record in enumerate(records, 1):
-                    meta = (
-                        f"[{i}] Created: {record.get('created_at', 'unknown')} | "
-                        f"By: {record.get('created_by', 'unknown')} | "
-                        f"Via: {record.get('interface', 'unknown')}"
-                    )
-                    content = record.get("content", "").strip()
-                    lines.append(f"{meta}\n{content}\n")
-
-                return [TextContent(type="text", text="\n".join(lines))]
-            except Exception as e:
-                logger.error(f"Error in get_handoff_history: {e}")
-                logger.error(f"Traceback:\n{traceback.format_exc()}")
-                return [TextContent(type="text", text=f"Error fetching handoff history: {e}")]
-
-        elif name == "save_session_handoff":
-            try:
-                person = arguments.get("person", "Unknown")
-                interface = arguments.get("interface", "unknown")
-                content = arguments.get("content", "")
-                project_code = arguments["project_code"]
-
-                if not content:
-                    return [TextContent(type="text", text="Error: content is required")]
-
-                if not is_supabase_available():
-                    return [TextContent(
-                        type="text",
-                        text="Cannot save handoff (Supabase offline). "
-                             "Save content to .pending-sync.md in git and sync later.",
-                    )]
-
-                result = sb_save_handoff(content, person, interface, project_code)
-                return [TextContent(
-                    type="text",
-                    text=f"Session handoff saved to history.\n"
-                         f"- Project: {project_code}\n"
-                         f"- By: {person}\n"
-                         f"- Via: {interface}",
-                )]
-            except Exception as e:
-                logger.error(f"Error in save_session_handoff: {e}")
-                logger.error(f"Traceback:\n{traceback.format_exc()}")
-                return [TextContent(type="text", text=f"Error saving handoff: {e}")]
-
-        return None
+            "required": ["person", "interface", "content", "project_code"],
+        },
+    ),
+]
+
+
+async def _handle_get_handoff_history(arguments: dict) -> list[TextContent]:
+    try:
+        if not is_supabase_available():
+            return [TextContent(
+                type="text",
+                text="Handoff history unavailable (Supabase offline).",
+            )]
+
+        args = HandoffHistoryArgs.model_validate(arguments)
+        project_code, limit, created_by = args.project_code, args.limit, args.created_by
+        records = await asyncio.to_thread(_get_history_cached, project_code, limit, created_by)
+
+        if not records:
+            filter_note = f" for '{created_by}'" if created_by else ""
+            return [TextContent(
+                type="text",
+                text=f"No handoff history found for project '{project_code}'{filter_note}.",
+            )]
+
+        lines = []
+        filter_note = f" (filtered by: {created_by})" if created_by else ""
+        lines.append(f"Handoff history for '{project_code}' — {len(records)} record(s){filter_note}:\n")
+        for i, record in enumerate(records, 1):
+            meta = (
+                f"[{i}] Created: {record.get('created_at', 'unknown')} | "
+                f"By: {record.get('created_by', 'unknown')} | "
+                f"Via: {record.get('interface', 'unknown')}"
+            )
+            content = record.get("content", "").strip()
+            lines.append(f"{meta}\n{content}\n")
+
+        return [TextContent(type="text", text="\n".join(lines))]
+    except Exception as e:
+        logger.exception("Error in get_handoff_history")
+        return [TextContent(type="text", text=f"Error fetching handoff history: {e}")]
+
+
+async def _handle_save_session_handoff(arguments: dict) -> list[TextContent]:
+    try:
+        args = SaveHandoffArgs.model_validate(arguments)
+        person, interface, content, project_code = args.person, args.interface, args.content, args.project_code
+
+        if not content:
+            return [TextContent(type="text", text="Error: content is required")]
+
+        # Re-submitting the project's newest handoff is a no-op
+        digest = hashlib.sha256("\0".join((person, interface, content)).encode("utf-8")).digest()
+        if _last_saved_hash.get(project_code) == digest and await asyncio.to_thread(
+            _is_latest_handoff, project_code, person, interface, content,
+        ):
+            return [TextContent(type="text", text=_UNCHANGED_TEMPLATE.format(
+                project_code=project_code, person=person, interface=interface,
+            ))]
+
+        if not is_supabase_available():
+            return [TextContent(
+                type="text",
+                text="Cannot save handoff (Supabase offline). "
+                     "Save content to .pending-sync.md in git and sync later.",
+            )]
+
+        result = await asyncio.to_thread(sb_save_handoff, content, person, interface, project_code)
+        _last_saved_hash[project_code] = digest
+        _invalidate_history(project_code)
+        return [TextContent(type="text", text=_SAVED_TEMPLATE.format(
+            project_code=project_code, person=person, interface=interface,
+        ))]
+    except Exception as e:
+        logger.exception("Error in save_session_handoff")
+        return [TextContent(type="text", text=f"Error saving handoff: {e}")]
+
+
+_DISPATCH = {
+    "get_handoff_history": _handle_get_handoff_history,
+    "save_session_handoff": _handle_save_session_handoff,
+}
+
+
+async def _handler(name: str, arguments: dict):
+    fn = _DISPATCH.get(name)
+    return await fn(arguments) if fn else None
+
 
+def register() -> ToolModule:
     return ToolModule(
-        tools=tools,
-        handler=handler,
+        tools=_TOOLS,
+        handler=_handler,
         reading_tools=READING,
         writing_tools=WRITING,
     )
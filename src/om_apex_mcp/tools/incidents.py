@@ -4,16 +4,25 @@ Allows Claude Code to file bugs directly as production incidents during sessions
 bridging the gap between conversational bug reports and the Cortex incident system.
 """
 
+import asyncio
 import json
-import random
-import string
+import secrets
 from datetime import datetime, timezone
+from typing import Literal, Optional
 
 from mcp.types import Tool, TextContent
+from pydantic import BaseModel, Field, ValidationError
+
+# Use orjson for responses when installed, but don't require it
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from . import ToolModule
-from ..cortex_supabase import is_cortex_available, get_cortex_client, reset_cortex_client, \
-    create_incident, create_incident_event, list_incidents
+from ..cortex_supabase import is_cortex_available, reset_cortex_client, \
+    create_incident, create_incident_event, create_incident_with_event, list_incidents, \
+    create_incidents_bulk, create_incident_events_bulk
 
 
 READING = [
@@ -21,133 +30,215 @@ READING = [
 ]
 WRITING = [
     "incident_create",
+    "incident_create_batch",
 ]
 
+# Upper bound on incident_list's limit, to keep responses bounded
+_LIST_LIMIT_MAX = 50
+
+
+class IncidentCreateArgs(BaseModel):
+    title: str
+    severity: Literal["SEV-1", "SEV-2", "SEV-3"]
+    project: str = "ai-quorum"
+    category: Literal["frontend_error", "backend_error", "performance", "ux_anomaly"] = "backend_error"
+    component: Optional[str] = None
+    description: Optional[str] = None
+    steps_to_reproduce: Optional[str] = None
+    expected_behavior: Optional[str] = None
+    actual_behavior: Optional[str] = None
+    reported_by: str = "claude-code"
+
+
+class IncidentBatchArgs(BaseModel):
+    incidents: list[IncidentCreateArgs]
+
+
+class IncidentListArgs(BaseModel):
+    status: Optional[str] = None
+    severity: Optional[str] = None
+    project: Optional[str] = None
+    limit: int = Field(10, ge=1)
+    pretty: bool = False
+
+
+# Properties shared by incident_create and each item of incident_create_batch
+_INCIDENT_PROPERTIES = {
+    "title": {
+        "type": "string",
+        "description": "Short descriptive title",
+    },
+    "severity": {
+        "type": "string",
+        "enum": ["SEV-1", "SEV-2", "SEV-3"],
+        "description": "Severity level: SEV-1 (critical), SEV-2 (major), SEV-3 (minor)",
+    },
+    "project": {
+        "type": "string",
+        "description": "Which product is affected (default: ai-quorum)",
+    },
+    "category": {
+        "type": "string",
+        "enum": ["frontend_error", "backend_error", "performance", "ux_anomaly"],
+        "description": "Error category (default: backend_error)",
+    },
+    "component": {
+        "type": "string",
+        "description": "Affected component (e.g., auth, api, admin-ui, orchestrator)",
+    },
+    "description": {
+        "type": "string",
+        "description": "Detailed description / diagnosis of the issue",
+    },
+    "steps_to_reproduce": {
+        "type": "string",
+        "description": "Steps to reproduce the issue",
+    },
+    "expected_behavior": {
+        "type": "string",
+        "description": "What should happen",
+    },
+    "actual_behavior": {
+        "type": "string",
+        "description": "What actually happens",
+    },
+    "reported_by": {
+        "type": "string",
+        "description": "Who filed it (default: claude-code)",
+    },
+}
+
+_CREATED_TEMPLATE = (
+    "Incident created successfully.\n\n"
+    "**ID:** {id}\n"
+    "**Title:** {title}\n"
+    "**Severity:** {severity}\n"
+    "**Project:** {project}\n"
+    "**Status:** open\n"
+    "**Fingerprint:** {fingerprint}\n"
+    "**Assigned to:** cortex"
+)
+
 
 def _require_cortex() -> None:
-    """Ensure Om Cortex Supabase is available. Resets cached client on 401 errors."""
+    """Ensure Om Cortex Supabase is configured.
+
+    No liveness probe here: a stale key surfaces as a 401 from the actual
+    query, which _cortex_call handles by resetting the client and retrying.
+    """
     if not is_cortex_available():
         raise RuntimeError(
             "Om Cortex Supabase is not available. "
             "Check that CORTEX_SUPABASE_URL and CORTEX_SUPABASE_SERVICE_KEY are set, "
             "or that ~/om-apex/config/.env.cortex exists."
         )
-    # Verify the cached client still works
-    client = get_cortex_client()
+
+
+async def _cortex_call(fn, *args, **kwargs):
+    """Run a blocking Cortex DB helper in a thread; on 401, reset the cached client and retry once."""
     try:
-        client.table("prodsupport_incidents").select("id").limit(1).execute()
+        return await asyncio.to_thread(fn, *args, **kwargs)
     except Exception as e:
-        if "401" in str(e) or "Invalid API key" in str(e):
-            reset_cortex_client()
-            if not is_cortex_available():
-                raise RuntimeError("Om Cortex Supabase: key reset failed. Check .env.cortex.")
-        else:
+        if "401" not in str(e) and "Invalid API key" not in str(e):
             raise
+        reset_cortex_client()
+        if not is_cortex_available():
+            raise RuntimeError("Om Cortex Supabase: key reset failed. Check .env.cortex.") from e
+        return await asyncio.to_thread(fn, *args, **kwargs)
 
 
-def _json_response(data) -> list[TextContent]:
-    """Return data as formatted JSON TextContent."""
-    return [TextContent(type="text", text=json.dumps(data, indent=2, default=str))]
+def _json_response(data, pretty: bool = True) -> list[TextContent]:
+    """Return data as JSON TextContent, indented or compact."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        text = orjson.dumps(data, default=str, option=option).decode()
+    else:
+        text = json.dumps(data, indent=2 if pretty else None, separators=None if pretty else (",", ":"), default=str)
+    return [TextContent(type="text", text=text)]
 
 
-def register() -> ToolModule:
-    tools = [
-        Tool(
-            name="incident_create",
-            description=(
-                "Create a production incident in Om Cortex prodsupport_incidents table. "
-                "Use this to file bugs discovered during Claude Code sessions."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "title": {
-                        "type": "string",
-                        "description": "Short descriptive title",
-                    },
-                    "severity": {
-                        "type": "string",
-                        "enum": ["SEV-1", "SEV-2", "SEV-3"],
-                        "description": "Severity level: SEV-1 (critical), SEV-2 (major), SEV-3 (minor)",
-                    },
-                    "project": {
-                        "type": "string",
-                        "description": "Which product is affected (default: ai-quorum)",
-                    },
-                    "category": {
-                        "type": "string",
-                        "enum": ["frontend_error", "backend_error", "performance", "ux_anomaly"],
-                        "description": "Error category (default: backend_error)",
-                    },
-                    "component": {
-                        "type": "string",
-                        "description": "Affected component (e.g., auth, api, admin-ui, orchestrator)",
-                    },
-                    "description": {
-                        "type": "string",
-                        "description": "Detailed description / diagnosis of the issue",
-                    },
-                    "steps_to_reproduce": {
-                        "type": "string",
-                        "description": "Steps to reproduce the issue",
-                    },
-                    "expected_behavior": {
-                        "type": "string",
-                        "description": "What should happen",
-                    },
-                    "actual_behavior": {
-                        "type": "string",
-                        "description": "What actually happens",
-                    },
-                    "reported_by": {
-                        "type": "string",
-                        "description": "Who filed it (default: claude-code)",
+_TOOLS = [
+    Tool(
+        name="incident_create",
+        description=(
+            "Create a production incident in Om Cortex prodsupport_incidents table. "
+            "Use this to file bugs discovered during Claude Code sessions."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": _INCIDENT_PROPERTIES,
+            "required": ["title", "severity"],
+        },
+    ),
+    Tool(
+        name="incident_create_batch",
+        description=(
+            "Create several production incidents at once in Om Cortex prodsupport_incidents. "
+            "Use for bulk filing (imports, triage); writes all incidents and their audit events in two requests."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "incidents": {
+                    "type": "array",
+                    "description": "Incidents to create, each with the same fields as incident_create",
+                    "items": {
+                        "type": "object",
+                        "properties": _INCIDENT_PROPERTIES,
+                        "required": ["title", "severity"],
                     },
+                    "minItems": 1,
                 },
-                "required": ["title", "severity"],
             },
+            "required": ["incidents"],
+        },
+    ),
+    Tool(
+        name="incident_list",
+        description=(
+            "List production incidents from Om Cortex prodsupport_incidents table. "
+            "Check what incidents are open without needing the Cortex agent."
         ),
-        Tool(
-            name="incident_list",
-            description=(
-                "List production incidents from Om Cortex prodsupport_incidents table. "
-                "Check what incidents are open without needing the Cortex agent."
-            ),
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "status": {
-                        "type": "string",
-                        "description": "Filter by status: open, investigating, fix_in_progress, deployed, resolved, ignored",
-                    },
-                    "severity": {
-                        "type": "string",
-                        "description": "Filter by severity: SEV-1, SEV-2, SEV-3",
-                    },
-                    "project": {
-                        "type": "string",
-                        "description": "Filter by project name",
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Max incidents to return (default 10)",
-                    },
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "status": {
+                    "type": "string",
+                    "description": "Filter by status: open, investigating, fix_in_progress, deployed, resolved, ignored",
+                },
+                "severity": {
+                    "type": "string",
+                    "description": "Filter by severity: SEV-1, SEV-2, SEV-3",
+                },
+                "project": {
+                    "type": "string",
+                    "description": "Filter by project name",
+                },
+                "limit": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "description": f"Max incidents to return (default 10, capped at {_LIST_LIMIT_MAX})",
+                },
+                "pretty": {
+                    "type": "boolean",
+                    "description": "Indent the JSON output for readability (default: false, compact)",
                 },
-                "required": [],
             },
-        ),
-    ]
+            "required": [],
+        },
+    ),
+]
+
+
+async def _handler(name: str, arguments: dict):
+    fn = _DISPATCH.get(name)
+    return await fn(arguments) if fn else None
 
-    async def handler(name: str, arguments: dict):
-        if name == "incident_create":
-            return _handle_incident_create(arguments)
-        elif name == "incident_list":
-            return _handle_incident_list(arguments)
-        return None
 
+def register() -> ToolModule:
     return ToolModule(
-        tools=tools,
-        handler=handler,
+        tools=_TOOLS,
+        handler=_handler,
         reading_tools=READING,
         writing_tools=WRITING,
     )
@@ -157,105 +248,147 @@ def register() -> ToolModule:
 # Handler implementations
 # =============================================================================
 
-def _handle_incident_create(args: dict) -> list[TextContent]:
-    _require_cortex()
-
-    title = args["title"]
-    severity = args["severity"]
-    project = args.get("project", "ai-quorum")
-    category = args.get("category", "backend_error")
-    component = args.get("component")
-    description = args.get("description")
-    steps_to_reproduce = args.get("steps_to_reproduce")
-    expected_behavior = args.get("expected_behavior")
-    actual_behavior = args.get("actual_behavior")
-    reported_by = args.get("reported_by", "claude-code")
-
+def _build_incident(a: IncidentCreateArgs) -> tuple[dict, dict]:
+    """Build the prodsupport_incidents row and its "created" audit event (minus incident_id)."""
     # Build metadata from optional fields
     metadata = {}
-    if steps_to_reproduce:
-        metadata["steps_to_reproduce"] = steps_to_reproduce
-    if expected_behavior:
-        metadata["expected_behavior"] = expected_behavior
-    if actual_behavior:
-        metadata["actual_behavior"] = actual_behavior
+    if a.steps_to_reproduce:
+        metadata["steps_to_reproduce"] = a.steps_to_reproduce
+    if a.expected_behavior:
+        metadata["expected_behavior"] = a.expected_behavior
+    if a.actual_behavior:
+        metadata["actual_behavior"] = a.actual_behavior
 
     # Generate fingerprint: manual:{timestamp}-{random6}
     now = datetime.now(timezone.utc)
     ts = now.strftime("%Y%m%d%H%M%S")
-    rand6 = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
+    rand6 = secrets.token_hex(3)
     fingerprint = f"manual:{ts}-{rand6}"
 
     # Build incident row
     incident = {
         "fingerprint": fingerprint,
-        "title": title,
-        "project": project,
+        "title": a.title,
+        "project": a.project,
         "source": "manual",
-        "severity": severity,
-        "category": category,
+        "severity": a.severity,
+        "category": a.category,
         "status": "open",
         "assigned_to": "cortex",
         "metadata": metadata,
     }
-    if component:
-        incident["component"] = component
-    if description:
-        incident["diagnosis"] = description
+    if a.component:
+        incident["component"] = a.component
+    if a.description:
+        incident["diagnosis"] = a.description
 
-    # Insert incident
-    created = create_incident(incident)
+    event = {
+        "event_type": "created",
+        "actor": a.reported_by,
+        "details": {
+            "source": "manual",
+            "severity": a.severity,
+            "filed_via": "mcp-server",
+        },
+    }
+
+    return incident, event
 
-    # Insert audit event
+
+async def _handle_incident_create(args: dict) -> list[TextContent]:
     try:
-        create_incident_event({
-            "incident_id": created["id"],
-            "event_type": "created",
-            "actor": reported_by,
-            "details": {
-                "source": "manual",
-                "severity": severity,
-                "filed_via": "mcp-server",
-            },
-        })
-    except Exception:
-        # Don't fail the whole operation if the audit event fails
-        pass
-
-    return [TextContent(
-        type="text",
-        text=(
-            f"Incident created successfully.\n\n"
-            f"**ID:** {created['id']}\n"
-            f"**Title:** {title}\n"
-            f"**Severity:** {severity}\n"
-            f"**Project:** {project}\n"
-            f"**Status:** open\n"
-            f"**Fingerprint:** {fingerprint}\n"
-            f"**Assigned to:** cortex"
-        ),
-    )]
+        a = IncidentCreateArgs.model_validate(args)
+    except ValidationError as e:
+        return [TextContent(type="text", text=f"Error: invalid incident_create arguments: {e}")]
+    _require_cortex()
 
+    incident, event = _build_incident(a)
+
+    # Insert incident + audit event in one transaction
+    try:
+        created = await _cortex_call(create_incident_with_event, incident, event)
+    except Exception as e:
+        if "PGRST202" not in str(e):
+            raise
+        # RPC not deployed on this Cortex project yet: fall back to two inserts
+        created = await _cortex_call(create_incident, incident)
+        try:
+            await _cortex_call(create_incident_event, {"incident_id": created["id"], **event})
+        except Exception:
+            # Don't fail the whole operation if the audit event fails
+            pass
+
+    return [TextContent(type="text", text=_CREATED_TEMPLATE.format(
+        id=created["id"], title=a.title, severity=a.severity, project=a.project, fingerprint=incident["fingerprint"],
+    ))]
+
+
+async def _handle_incident_create_batch(args: dict) -> list[TextContent]:
+    try:
+        a = IncidentBatchArgs.model_validate(args)
+    except ValidationError as e:
+        return [TextContent(type="text", text=f"Error: invalid incident_create_batch arguments: {e}")]
+    if not a.incidents:
+        return [TextContent(type="text", text="Error: incidents must contain at least one incident.")]
+    _require_cortex()
+
+    built = [_build_incident(item) for item in a.incidents]
+
+    # One array insert for the incidents, one for their audit events
+    created = await _cortex_call(create_incidents_bulk, [incident for incident, _ in built])
+    lines = [f"Created {len(created)} incidents.", ""]
+    if len(created) != len(built):
+        # Rows can't be paired with their events, so record none rather than misattribute them
+        lines.insert(1, f"Warning: sent {len(built)} incidents but {len(created)} rows came back; "
+                        "audit events were not recorded.")
+    else:
+        events = [{"incident_id": row["id"], **event} for row, (_, event) in zip(created, built, strict=True)]
+        try:
+            await _cortex_call(create_incident_events_bulk, events)
+        except Exception:
+            # Don't fail the whole operation if the audit events fail
+            pass
+
+    lines.extend(
+        f"- {row['id']} [{row.get('severity')}] {row.get('title')} ({row.get('fingerprint')})"
+        for row in created
+    )
+    return [TextContent(type="text", text="\n".join(lines))]
+
+
+async def _handle_incident_list(args: dict) -> list[TextContent]:
+    try:
+        a = IncidentListArgs.model_validate(args)
+    except ValidationError as e:
+        return [TextContent(type="text", text=f"Error: invalid incident_list arguments: {e}")]
+    limit = min(a.limit, _LIST_LIMIT_MAX)
 
-def _handle_incident_list(args: dict) -> list[TextContent]:
     _require_cortex()
 
-    rows = list_incidents(
-        status=args.get("status"),
-        severity=args.get("severity"),
-        project=args.get("project"),
-        limit=args.get("limit", 10),
+    rows = await _cortex_call(
+        list_incidents,
+        status=a.status,
+        severity=a.severity,
+        project=a.project,
+        limit=limit,
     )
 
     if not rows:
         filters = []
-        if args.get("status"):
-            filters.append(f"status={args['status']}")
-        if args.get("severity"):
-            filters.append(f"severity={args['severity']}")
-        if args.get("project"):
-            filters.append(f"project={args['project']}")
+        if a.status:
+            filters.append(f"status={a.status}")
+        if a.severity:
+            filters.append(f"severity={a.severity}")
+        if a.project:
+            filters.append(f"project={a.project}")
         filter_str = f" (filters: {', '.join(filters)})" if filters else ""
         return [TextContent(type="text", text=f"No incidents found{filter_str}.")]
 
-    return _json_response(rows)
+    return _json_response(rows, pretty=a.pretty)
+
+
+_DISPATCH = {
+    "incident_create": _handle_incident_create,
+    "incident_create_batch": _handle_incident_create_batch,
+    "incident_list": _handle_incident_list,
+}
@@ -6,15 +6,26 @@ Error Handling:
 - Backend operations handle missing files gracefully
 """
 
+import asyncio
 import json
 import logging
 import re
+import threading
 import traceback
 from datetime import datetime
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional
 
 from mcp.types import Tool, TextContent
 
+# Use orjson for search results when installed, but don't require it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from . import ToolModule
+from ..storage import StorageBackend
 from .helpers import get_backend, DAILY_PROGRESS_REL
 
 logger = logging.getLogger("om-apex-mcp")
@@ -22,6 +33,168 @@ logger = logging.getLogger("om-apex-mcp")
 READING = ["get_daily_progress", "search_daily_progress"]
 WRITING = ["add_daily_progress"]
 
+# Session headings in a daily progress file, e.g. "## Session 3 (code) ..."
+_SESSION_RE = re.compile(r"## Session (\d+)")
+
+# Daily progress file text keyed by (backend, path), validated against the
+# backend's mtime_ns: ((mtime_ns, size), content)
+_CONTENT_CACHE: dict[tuple, tuple[tuple[int, int], str]] = {}
+_CONTENT_CACHE_MAX = 256
+# Searches fill the cache from several to_thread workers at once
+_CONTENT_CACHE_LOCK = threading.Lock()
+
+
+def _last_session_number(content: str) -> int:
+    """Return the number of the last session heading in content, or 0 if none.
+
+    Sessions are appended in increasing order, so the last heading is the
+    highest; searching backwards from the end only touches the tail of the file.
+    """
+    idx = content.rfind("## Session ")
+    while idx != -1:
+        match = _SESSION_RE.match(content, idx)
+        if match:
+            return int(match.group(1))
+        idx = content.rfind("## Session ", 0, idx)
+    return 0
+
+
+_FILE_HEADER_TEMPLATE = "# Daily Progress - {today}\n"
+_SESSION_HEADER_TEMPLATE = "\n---\n\n## Session {n} ({iface}) (by {person}) ({ts}) - {title}\n"
+_LOGGED_TEMPLATE = (
+    "Daily progress logged successfully:\n"
+    "- File: {file}\n"
+    "- Session: {n}\n"
+    "- Person: {person}\n"
+    "- Interface: {iface}\n"
+    "- Title: {title}"
+)
+
+# Session entry sections in output order: (argument key, heading, items are "ID: Description")
+_SECTIONS = (
+    ("completed", "Completed", False),
+    ("decisions", "Decisions Recorded", True),
+    ("tasks_completed", "Tasks Completed", True),
+    ("tasks_created", "Tasks Created", True),
+    ("files_modified", "Files Created/Modified", False),
+    ("notes", "Notes", False),
+)
+
+
+def _format_id_item(item: str) -> str:
+    """Format an 'ID: Description' entry as a bullet with the ID in bold."""
+    key, sep, rest = item.partition(":")
+    return f"- **{key}**: {rest.strip()}\n" if sep else f"- **{item}**\n"
+
+
+def _format_id_list(items: list[str]) -> str:
+    """Format 'ID: Description' entries as a markdown bullet list."""
+    return "".join([_format_id_item(item) for item in items])
+
+
+# search_daily_progress returns this many characters either side of a match,
+# and at most _FALLBACK_MAX_CHARS of each log when nothing matches
+_SNIPPET_RADIUS = 500
+_FALLBACK_MAX_CHARS = 4096
+
+
+def _snippet(content: str, matcher: re.Pattern, radius: int = _SNIPPET_RADIUS) -> str:
+    """Return the text around matcher's first match in content, with '...' marking cut ends."""
+    match = matcher.search(content)
+    if match is None:
+        return content[:2 * radius]
+    start = max(0, match.start() - radius)
+    end = match.end() + radius
+    return ("..." if start else "") + content[start:end] + ("..." if end < len(content) else "")
+
+
+def _dumps(data) -> str:
+    """Serialize search results as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _compile_search(search_text: str) -> re.Pattern:
+    """Compile search_text into a literal, case-insensitive matcher."""
+    return re.compile(re.escape(search_text), re.IGNORECASE)
+
+
+def _compile_bytes_search(search_text: str) -> Optional[re.Pattern]:
+    """Compile an ASCII search_text into a case-insensitive bytes matcher, else None.
+
+    Bytes patterns only fold ASCII case, so non-ASCII text can't be matched this way.
+    """
+    if not search_text.isascii():
+        return None
+    return re.compile(re.escape(search_text.encode("ascii")), re.IGNORECASE)
+
+
+def _unique(paths: Iterable[str]) -> Iterator[str]:
+    """Yield paths in order, skipping any already yielded."""
+    seen = set()
+    for path in paths:
+        if path not in seen:
+            seen.add(path)
+            yield path
+
+
+def _file_contains(backend, path: str, matcher: re.Pattern, overlap: int, chunk_size: int = 65536) -> bool:
+    """Check whether a file matches matcher, reading it in chunks.
+
+    Stops at the first chunk with a match; consecutive chunks overlap by
+    `overlap` characters (the search text's length - 1) so matches spanning
+    a boundary are found.
+    """
+    tail = ""
+    for chunk in backend.iter_text(path, chunk_size):
+        window = tail + chunk
+        if matcher.search(window):
+            return True
+        tail = window[-overlap:] if overlap else ""
+    return False
+
+
+def _read_and_match(
+    backend, path: str, matcher: re.Pattern, overlap: int, bytes_matcher: Optional[re.Pattern] = None,
+) -> tuple[Optional[str], bool]:
+    """Return (content, whether it matches matcher) for a file.
+
+    Backends that report mtimes get their file text cached across searches.
+    Others that can stream are scanned with _file_contains and only read in
+    full on a match, so content is None for their non-matching files (and for
+    missing files); the rest are read once and matched in memory.
+    On a cache miss, bytes_matcher lets the backend reject a large file from
+    its raw bytes (content None) before it is read and decoded.
+    """
+    version = backend.mtime_ns(path)
+    if version is None:
+        if type(backend).iter_text is StorageBackend.iter_text:
+            # The default iter_text is a full read; don't read the file a second time on a match
+            content = backend.read_text(path)
+            return content, content is not None and matcher.search(content) is not None
+        if _file_contains(backend, path, matcher, overlap):
+            content = backend.read_text(path)
+            return content, content is not None
+        return None, False
+
+    key = (backend, path)
+    cached = _CONTENT_CACHE.get(key)
+    if cached and cached[0] == version:
+        content = cached[1]
+    else:
+        if bytes_matcher is not None and backend.search_bytes(path, bytes_matcher) is False:
+            return None, False
+        content = backend.read_text(path)
+        if content is None:
+            return None, False
+        with _CONTENT_CACHE_LOCK:
+            if key not in _CONTENT_CACHE and len(_CONTENT_CACHE) >= _CONTENT_CACHE_MAX:
+                # FIFO eviction: dicts preserve insertion order
+                del _CONTENT_CACHE[next(iter(_CONTENT_CACHE))]
+            _CONTENT_CACHE[key] = (version, content)
+    return content, matcher.search(content) is not None
+
 
 def register() -> ToolModule:
     tools = [
@@ -57,7 +230,7 @@ def register() -> ToolModule:
         ),
         Tool(
             name="search_daily_progress",
-            description="Search through all daily progress logs for relevant content. Returns matching file contents for Claude to analyze semantically.",
+            description="Search through all daily progress logs for relevant content. Returns a snippet around the first match in each matching log; if nothing matches, returns the start of the most recent logs for Claude to analyze semantically.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -91,7 +264,7 @@ def register() -> ToolModule:
                     return [TextContent(type="text", text=content)]
 
                 # Try fuzzy match via listing
-                files = backend.list_files(DAILY_PROGRESS_REL, f"{date}*.md")
+                files = backend.list_files(DAILY_PROGRESS_REL, f"{date}*.md", prefix=date)
                 if files:
                     content = backend.read_text(files[0])
                     if content is not None:
@@ -110,81 +283,40 @@ def register() -> ToolModule:
                 interface = arguments.get("interface", "unknown").lower()
                 title = arguments.get("title", "Untitled Session")
 
-                today = datetime.now().strftime("%Y-%m-%d")
-                timestamp = datetime.now().strftime("%I:%M %p EST").lstrip("0")
+                now = datetime.now()
+                today = now.strftime("%Y-%m-%d")
+                timestamp = now.strftime("%I:%M %p EST").lstrip("0")
 
                 filepath = f"{DAILY_PROGRESS_REL}/{today}.md"
 
+                session_parts = []
+                for key, header, has_ids in _SECTIONS:
+                    items = arguments.get(key)
+                    if items:
+                        body = _format_id_list(items) if has_ids else "".join([f"- {item}\n" for item in items])
+                        session_parts.append(f"\n### {header}\n{body}")
+                sections = "".join(session_parts)
+
                 session_num = 1
-                existing_content = backend.read_text(filepath)
 
-                if existing_content:
-                    session_matches = re.findall(r"## Session (\d+)", existing_content)
-                    if session_matches:
-                        session_num = max(int(n) for n in session_matches) + 1
+                def build_entry(existing_content):
+                    # Runs against the content read through the same handle the entry is appended with
+                    nonlocal session_num
+                    session_num = _last_session_number(existing_content) + 1 if existing_content else 1
+                    session_entry = _SESSION_HEADER_TEMPLATE.format_map({
+                        "n": session_num, "iface": interface, "person": person, "ts": timestamp, "title": title,
+                    }) + sections
+                    if existing_content:
+                        return session_entry
+                    return _FILE_HEADER_TEMPLATE.format(today=today) + session_entry
 
-                session_parts = []
-                session_parts.append(f"\n---\n")
-                session_parts.append(f"\n## Session {session_num} ({interface}) (by {person}) ({timestamp}) - {title}\n")
-
-                completed = arguments.get("completed", [])
-                if completed:
-                    session_parts.append("\n### Completed\n")
-                    for item in completed:
-                        session_parts.append(f"- {item}\n")
-
-                decisions = arguments.get("decisions", [])
-                if decisions:
-                    session_parts.append("\n### Decisions Recorded\n")
-                    for item in decisions:
-                        if ":" in item:
-                            parts = item.split(":", 1)
-                            session_parts.append(f"- **{parts[0]}**: {parts[1].strip()}\n")
-                        else:
-                            session_parts.append(f"- **{item}**\n")
-
-                tasks_completed = arguments.get("tasks_completed", [])
-                if tasks_completed:
-                    session_parts.append("\n### Tasks Completed\n")
-                    for item in tasks_completed:
-                        if ":" in item:
-                            parts = item.split(":", 1)
-                            session_parts.append(f"- **{parts[0]}**: {parts[1].strip()}\n")
-                        else:
-                            session_parts.append(f"- **{item}**\n")
-
-                tasks_created = arguments.get("tasks_created", [])
-                if tasks_created:
-                    session_parts.append("\n### Tasks Created\n")
-                    for item in tasks_created:
-                        if ":" in item:
-                            parts = item.split(":", 1)
-                            session_parts.append(f"- **{parts[0]}**: {parts[1].strip()}\n")
-                        else:
-                            session_parts.append(f"- **{item}**\n")
-
-                files_modified = arguments.get("files_modified", [])
-                if files_modified:
-                    session_parts.append("\n### Files Created/Modified\n")
-                    for item in files_modified:
-                        session_parts.append(f"- {item}\n")
-
-                notes = arguments.get("notes", [])
-                if notes:
-                    session_parts.append("\n### Notes\n")
-                    for item in notes:
-                        session_parts.append(f"- {item}\n")
-
-                session_entry = "".join(session_parts)
-
-                if existing_content:
-                    backend.append_text(filepath, session_entry)
-                else:
-                    file_header = f"# Daily Progress - {today}\n"
-                    backend.write_text(filepath, file_header + session_entry)
+                backend.append_text_with(filepath, build_entry)
+                _CONTENT_CACHE.pop((backend, filepath), None)
 
                 filename = filepath.rsplit("/", 1)[-1]
-                return [TextContent(type="text", text=f"Daily progress logged successfully:\n- File: {filename}\n- Session: {session_num}\n- Person: {person}\n- Interface: {interface}\n- Title: {title}")]
+                return [TextContent(type="text", text=_LOGGED_TEMPLATE.format(
+                    file=filename, n=session_num, person=person, iface=interface, title=title,
+                ))]
             except Exception as e:
                 logger.error(f"Error in add_daily_progress: {e}")
                 logger.error(f"Traceback:\n{traceback.format_exc()}")
@@ -198,38 +330,66 @@ def register() -> ToolModule:
                 if not search_text:
                     return [TextContent(type="text", text="Error: search_text is required")]
 
-                md_files = backend.list_files(DAILY_PROGRESS_REL, "*.md")
-
-                if not md_files:
-                    return [TextContent(type="text", text=f"No daily progress logs found")]
-
+                # Backends with native search check their hits first. Those are token
+                # matches, so they can miss substring matches (e.g. "handoffs" for
+                # "handoff"); the most recent logs, listed lazily newest first, are
+                # scanned after them until `limit` matches are found.
+                hits = backend.search_files(DAILY_PROGRESS_REL, search_text, "*.md") or []
+                listed = []
+
+                def newest_first():
+                    for fp in islice(backend.iter_files(DAILY_PROGRESS_REL, "*.md"), limit * 2):
+                        listed.append(fp)
+                        yield fp
+
+                candidates = _unique(chain(islice(hits, limit * 2), newest_first()))
+                matcher = _compile_search(search_text)
+                overlap = len(search_text) - 1
+                bytes_matcher = _compile_bytes_search(search_text)
+
+                # Check candidates in batches of parallel threads (as many as the
+                # backend allows), stopping once `limit` matches are in hand
+                batch_size = backend.max_concurrent_reads
+                # Every path checked, with its content when it was read in full
+                scanned = {}
                 results = []
-                for filepath in md_files[:limit * 2]:
-                    try:
-                        content = backend.read_text(filepath)
-                        if content is None:
+                while len(results) < limit:
+                    batch = list(islice(candidates, batch_size))
+                    if not batch:
+                        break
+                    checked = await asyncio.gather(
+                        *(asyncio.to_thread(_read_and_match, backend, fp, matcher, overlap, bytes_matcher) for fp in batch),
+                        return_exceptions=True,
+                    )
+                    for filepath, outcome in zip(batch, checked, strict=True):
+                        if isinstance(outcome, Exception):
+                            logger.error(f"Error reading {filepath}: {outcome}")
+                            scanned[filepath] = None
                             continue
-
-                        if search_text in content.lower():
-                            filename = filepath.rsplit("/", 1)[-1]
-                            stem = filename.rsplit(".", 1)[0]
-                            results.append({
-                                "file": filename,
-                                "date": stem.split("_")[0] if "_" in stem else stem,
-                                "content": content
-                            })
-
-                            if len(results) >= limit:
-                                break
-                    except Exception as e:
-                        logger.error(f"Error reading {filepath}: {e}")
-                        continue
+                        content, matched = outcome
+                        scanned[filepath] = content
+                        if not matched:
+                            continue
+                        filename = filepath.rsplit("/", 1)[-1]
+                        stem = filename.rsplit(".", 1)[0]
+                        results.append({
+                            "file": filename,
+                            "date": stem.split("_")[0] if "_" in stem else stem,
+                            "snippet": _snippet(content, matcher),
+                        })
+
+                        if len(results) >= limit:
+                            break
+
+                if not scanned:
+                    return [TextContent(type="text", text=f"No daily progress logs found")]
 
                 if not results:
-                    results = []
-                    for filepath in md_files[:limit]:
+                    # Every candidate was checked, so the listing is complete up to limit * 2
+                    for filepath in listed[:limit]:
                         try:
-                            content = backend.read_text(filepath)
+                            # Reuse text the search pass already read
+                            content = scanned.get(filepath) or backend.read_text(filepath)
                             if content is None:
                                 continue
                             filename = filepath.rsplit("/", 1)[-1]
@@ -237,14 +397,15 @@ def register() -> ToolModule:
                             results.append({
                                 "file": filename,
                                 "date": stem.split("_")[0] if "_" in stem else stem,
-                                "content": content
+                                "content": content[:_FALLBACK_MAX_CHARS],
+                                "truncated": len(content) > _FALLBACK_MAX_CHARS,
                             })
                         except Exception:
                             continue
 
-                    return [TextContent(type="text", text=f"No exact matches for '{search_text}'. Returning {len(results)} recent logs for semantic analysis:\n\n" + json.dumps(results, indent=2))]
+                    return [TextContent(type="text", text=f"No exact matches for '{search_text}'. Returning {len(results)} recent logs for semantic analysis:\n\n" + _dumps(results))]
 
-                return [TextContent(type="text", text=f"Found {len(results)} matching logs:\n\n" + json.dumps(results, indent=2))]
+                return [TextContent(type="text", text=f"Found {len(results)} matching logs:\n\n" + _dumps(results))]
             except Exception as e:
                 logger.error(f"Error in search_daily_progress: {e}")
                 logger.error(f"Traceback:\n{traceback.format_exc()}")
@@ -8,12 +8,22 @@ user-testing), source tracking, planning artifact paths, approval tracking,
 force_complete, advance_task with history, get_schedule.
 """
 
+import asyncio
 import json
 import re
+import time
 from datetime import datetime
+from itertools import chain, islice
+from typing import Iterator
 
 from mcp.types import Tool, TextContent
 
+# Use orjson for responses when installed, but don't require it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from . import ToolModule
 from ..supabase_client import (
     is_supabase_available,
@@ -22,6 +32,7 @@ from ..supabase_client import (
     get_task_by_id as sb_get_task_by_id,
     get_task_queue as sb_get_task_queue,
     add_task as sb_add_task,
+    add_task_with_id as sb_add_task_with_id,
     update_task as sb_update_task,
     get_next_task_id,
     resolve_project_code,
@@ -42,8 +53,45 @@ VALID_STATUSES = [
 
 VALID_PRIORITIES = ["Critical", "High", "Medium", "Low"]
 
+# Hashed lookups for the write-path guards; the lists above keep their order for tool descriptions
+_STATUSES = frozenset(VALID_STATUSES)
+_PRIORITIES = frozenset(VALID_PRIORITIES)
+
+# Columns update_task copies straight from its arguments, in the order they are reported
+_UPDATABLE = (
+    "description", "notes", "priority", "category", "company", "owner",
+    "due", "duration_days", "prd_path", "plan_folder", "approved_by", "approved_at",
+)
+_NUMERIC_UPDATABLE = frozenset({"duration_days"})
+
+# get_task_queue splits its output into blocks of _QUEUE_CHUNK_LINES lines
+# once it lists more than _QUEUE_CHUNK_THRESHOLD tasks
+_QUEUE_CHUNK_THRESHOLD = 500
+_QUEUE_CHUNK_LINES = 200
+
+# Trailing "(Owner)" on an add_task description, with surrounding whitespace
+_OWNER_RE = re.compile(r"\s*\(([A-Za-z]+)\)\s*$")
+
 VALID_SOURCES = ["nishad", "user-report", "claude-code", "sentry", "posthog"]
 
+
+def _dumps(data) -> str:
+    """Serialize a task payload as indented JSON."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
+def _compact_result(result: dict, changed_keys) -> dict:
+    """Reduce a written task row to its id plus the columns the write changed."""
+    return {"id": result["id"], **{k: result[k] for k in changed_keys if k in result}}
+
+
+def _receipt(result: dict, changed_keys, arguments: dict) -> str:
+    """Serialize a write's result: the changed columns, or the full row when verbose."""
+    return _dumps(result if arguments.get("verbose") else _compact_result(result, changed_keys))
+
+
 # Cached status progression from DB (loaded on first access)
 _progression_cache: dict | None = None
 
@@ -138,10 +186,50 @@ READING = ["get_pending_tasks", "get_task_queue", "get_task_history", "get_sched
 WRITING = ["add_task", "complete_task", "update_task_status", "update_task",
            "force_complete", "advance_task", "send_back"]
 
+# get_pending_tasks / get_task_queue results are served from memory for a
+# short TTL, keyed by (tool name, non-null arguments). Any write through this
+# module clears the cache; edits made elsewhere show up once entries expire.
+_READ_TTL = 5.0
+_READ_CACHE_MAX = 256
+_CACHED_READS = frozenset({"get_pending_tasks", "get_task_queue"})
+_read_cache: dict[tuple, tuple[float, list]] = {}
+
+
+# Set once Supabase has been seen available; failures are never cached
+_supabase_seen_ok = False
+
+
+def _supabase_ok() -> bool:
+    """Whether Supabase is available, re-checked until the first success.
+
+    Once it is up, later calls skip is_supabase_available(), which re-reads the
+    .env file and retries client creation. A failed check (network blip, config
+    not synced yet) is retried on the next call instead of disabling the tools.
+    """
+    global _supabase_seen_ok
+    if not _supabase_seen_ok:
+        _supabase_seen_ok = is_supabase_available()
+    return _supabase_seen_ok
+
+
+def _fmt_row(t: dict) -> str:
+    """Format one get_task_queue line: id, priority, status, description and owner."""
+    return (
+        f"  {t['id']} [{t.get('priority', '?')}] ({t.get('status', '?')}) "
+        f"{t.get('description', '')}{(' @' + t['owner']) if t.get('owner') else ''}"
+    )
+
+
+def _queue_lines(by_project: dict[str, list[dict]]) -> Iterator[str]:
+    """Yield get_task_queue lines: a [project] heading followed by its task rows."""
+    for project, group in by_project.items():
+        yield f"[{project}]"
+        yield from map(_fmt_row, group)
+
 
 def _require_supabase() -> None:
     """Ensure Supabase is available. Raises RuntimeError if not."""
-    if not is_supabase_available():
+    if not _supabase_ok():
         raise RuntimeError(
             "Supabase is not available. Task operations require Supabase. "
             "Check that .env.supabase.omapex-dashboard exists at ~/om-apex/config/ "
@@ -189,631 +277,673 @@ def _record_status_change(task_id: str, from_status: str | None,
         return None  # History recording is best-effort
 
 
-def register() -> ToolModule:
-    tools = [
-        Tool(
-            name="get_pending_tasks",
-            description="Get tasks with filters. At least one filter is required. Excludes complete tasks by default. Default limit 10, max 50.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "company": {"type": "string", "description": "Filter by company name (optional)"},
-                    "category": {"type": "string", "description": "Filter by category (optional)"},
-                    "status": {"type": "string", "description": f"Filter by status: {', '.join(VALID_STATUSES)} (optional, defaults to all non-complete)"},
-                    "owner": {"type": "string", "description": "Filter by owner name (e.g., Nishad, Sumedha, Both, Claude, Scroggin, etc.)"},
-                    "task_type": {"type": "string", "description": "Filter by task type: issue, dev, manual, enhancement, feature-request (optional)"},
-                    "source": {"type": "string", "description": "Filter by source: nishad, user-report, claude-code, sentry, posthog (optional)"},
-                    "search": {"type": "string", "description": "Text search across description and notes fields (optional)"},
-                    "task_id": {"type": "string", "description": "Fetch a single task by exact ID, e.g. TASK-382 (bypasses other filters)"},
-                    "limit": {"type": "integer", "description": "Max results to return (default 10, max 50)"},
-                },
-                "required": [],
+_TOOLS = [
+    Tool(
+        name="get_pending_tasks",
+        description="Get tasks with filters. At least one filter is required. Excludes complete tasks by default. Default limit 10, max 50.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "company": {"type": "string", "description": "Filter by company name (optional)"},
+                "category": {"type": "string", "description": "Filter by category (optional)"},
+                "status": {"type": "string", "description": f"Filter by status: {', '.join(VALID_STATUSES)} (optional, defaults to all non-complete)"},
+                "owner": {"type": "string", "description": "Filter by owner name (e.g., Nishad, Sumedha, Both, Claude, Scroggin, etc.)"},
+                "task_type": {"type": "string", "description": "Filter by task type: issue, dev, manual, enhancement, feature-request (optional)"},
+                "source": {"type": "string", "description": "Filter by source: nishad, user-report, claude-code, sentry, posthog (optional)"},
+                "search": {"type": "string", "description": "Text search across description and notes fields (optional)"},
+                "task_id": {"type": "string", "description": "Fetch a single task by exact ID, e.g. TASK-382 (bypasses other filters)"},
+                "limit": {"type": "integer", "description": "Max results to return (default 10, max 50)"},
             },
-        ),
-        Tool(
-            name="get_task_queue",
-            description="Get a compact task listing grouped by project (top 2 per project, most recently updated first). Excludes 'manual' tasks by default. Returns: id, description (80 chars), priority, status, owner, project_code.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "limit": {"type": "integer", "description": "Max total tasks to return across all projects (default 10)"},
-                    "owner": {"type": "string", "description": "Filter by owner name (optional)"},
-                    "priority": {"type": "string", "description": f"Filter by priority: {', '.join(VALID_PRIORITIES)} (optional)"},
-                    "status": {"type": "string", "description": f"Filter by status: {', '.join(VALID_STATUSES)} (optional, defaults to all non-complete)"},
-                    "company": {"type": "string", "description": "Filter by company name (optional)"},
-                    "source": {"type": "string", "description": "Filter by source: nishad, user-report, claude-code, sentry, posthog (optional)"},
-                    "task_type": {"type": "string", "description": "Filter by task type: issue, dev, manual, enhancement, feature-request (optional). When omitted, 'manual' tasks are excluded by default."},
-                },
-                "required": [],
+            "required": [],
+        },
+    ),
+    Tool(
+        name="get_task_queue",
+        description="Get a compact task listing grouped by project (top 2 per project, most recently updated first). Excludes 'manual' tasks by default. Returns: id, description (80 chars), priority, status, owner, project_code.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "limit": {"type": "integer", "description": "Max total tasks to return across all projects (default 10)"},
+                "owner": {"type": "string", "description": "Filter by owner name (optional)"},
+                "priority": {"type": "string", "description": f"Filter by priority: {', '.join(VALID_PRIORITIES)} (optional)"},
+                "status": {"type": "string", "description": f"Filter by status: {', '.join(VALID_STATUSES)} (optional, defaults to all non-complete)"},
+                "company": {"type": "string", "description": "Filter by company name (optional)"},
+                "source": {"type": "string", "description": "Filter by source: nishad, user-report, claude-code, sentry, posthog (optional)"},
+                "task_type": {"type": "string", "description": "Filter by task type: issue, dev, manual, enhancement, feature-request (optional). When omitted, 'manual' tasks are excluded by default."},
             },
-        ),
-        Tool(
-            name="add_task",
-            description="Add a new task to the pending tasks list. Owner can be specified in parentheses at end of description, e.g. 'Build website (Sumedha)' or 'Call attorney (Scroggin)'",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "description": {"type": "string", "description": "Description of the task. Include owner in parentheses at end, e.g. 'Build website (Sumedha)' or 'Follow up on quote (Scroggin)'"},
-                    "category": {"type": "string", "description": "Category: Technical, Marketing, Legal, Operations, Administrative, Content"},
-                    "company": {"type": "string", "description": "Company: Om Apex Holdings, Om Luxe Properties, Om AI Solutions, Om Supply Chain"},
-                    "priority": {"type": "string", "description": f"Priority: {', '.join(VALID_PRIORITIES)}"},
-                    "notes": {"type": "string", "description": "Additional notes (optional)"},
-                    "task_type": {"type": "string", "description": "Task type: issue, dev, manual, enhancement, feature-request (default: manual)", "enum": ["issue", "dev", "manual", "enhancement", "feature-request"]},
-                    "source": {"type": "string", "description": "Task source: nishad (default), user-report, claude-code, sentry, posthog"},
-                    "prd_path": {"type": "string", "description": "Relative path to PRD file, e.g. 'docs/plans/TASK-nnn/PRD-nnn.md' (optional)"},
-                    "commit_refs": {"type": "array", "items": {"type": "string"}, "description": "Git commit SHAs associated with this task (optional)"},
-                    "issue_ref": {"type": "string", "description": "GitHub issue reference, e.g. 'om-apex/repo#123' (optional)"},
-                    "project_code": {"type": "string", "description": "Project code (e.g., mcp-server, portal, ai-quorum, root). Required."},
-                },
-                "required": ["description", "category", "company", "priority", "project_code"],
+            "required": [],
+        },
+    ),
+    Tool(
+        name="add_task",
+        description="Add a new task to the pending tasks list. Owner can be specified in parentheses at end of description, e.g. 'Build website (Sumedha)' or 'Call attorney (Scroggin)'",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "description": {"type": "string", "description": "Description of the task. Include owner in parentheses at end, e.g. 'Build website (Sumedha)' or 'Follow up on quote (Scroggin)'"},
+                "category": {"type": "string", "description": "Category: Technical, Marketing, Legal, Operations, Administrative, Content"},
+                "company": {"type": "string", "description": "Company: Om Apex Holdings, Om Luxe Properties, Om AI Solutions, Om Supply Chain"},
+                "priority": {"type": "string", "description": f"Priority: {', '.join(VALID_PRIORITIES)}", "enum": VALID_PRIORITIES},
+                "notes": {"type": "string", "description": "Additional notes (optional)"},
+                "task_type": {"type": "string", "description": "Task type: issue, dev, manual, enhancement, feature-request (default: manual)", "enum": ["issue", "dev", "manual", "enhancement", "feature-request"]},
+                "source": {"type": "string", "description": "Task source: nishad (default), user-report, claude-code, sentry, posthog"},
+                "prd_path": {"type": "string", "description": "Relative path to PRD file, e.g. 'docs/plans/TASK-nnn/PRD-nnn.md' (optional)"},
+                "commit_refs": {"type": "array", "items": {"type": "string"}, "description": "Git commit SHAs associated with this task (optional)"},
+                "issue_ref": {"type": "string", "description": "GitHub issue reference, e.g. 'om-apex/repo#123' (optional)"},
+                "project_code": {"type": "string", "description": "Project code (e.g., mcp-server, portal, ai-quorum, root). Required."},
+                "verbose": {"type": "boolean", "description": "Return the full task row instead of only the changed fields (optional)"},
             },
-        ),
-        Tool(
-            name="complete_task",
-            description="Mark a task as completed with optional completion notes. Task must be at 'ready-for-manual-review' or 'user-testing' status. Use force_complete for manual override.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
-                    "notes": {"type": "string", "description": "Completion notes - what was done, outcome, follow-up needed (optional)"},
-                },
-                "required": ["task_id"],
+            "required": ["description", "category", "company", "priority", "project_code"],
+        },
+    ),
+    Tool(
+        name="complete_task",
+        description="Mark a task as completed with optional completion notes. Task must be at 'ready-for-manual-review' or 'user-testing' status. Use force_complete for manual override.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
+                "notes": {"type": "string", "description": "Completion notes - what was done, outcome, follow-up needed (optional)"},
+                "verbose": {"type": "boolean", "description": "Return the full task row instead of only the changed fields (optional)"},
             },
-        ),
-        Tool(
-            name="update_task_status",
-            description="Update the status of a task",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
-                    "status": {"type": "string", "description": f"New status: {', '.join(VALID_STATUSES)}"},
-                },
-                "required": ["task_id", "status"],
+            "required": ["task_id"],
+        },
+    ),
+    Tool(
+        name="update_task_status",
+        description="Update the status of a task",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
+                "status": {"type": "string", "description": f"New status: {', '.join(VALID_STATUSES)}", "enum": VALID_STATUSES},
+                "verbose": {"type": "boolean", "description": "Return the full task row instead of only the changed fields (optional)"},
             },
-        ),
-        Tool(
-            name="update_task",
-            description="Update any field of an existing task (description, notes, priority, category, company, owner, due, duration_days, prd_path, plan_folder, approved_by, approved_at)",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
-                    "description": {"type": "string", "description": "New description for the task (optional)"},
-                    "notes": {"type": "string", "description": "New or updated notes (optional)"},
-                    "priority": {"type": "string", "description": f"New priority: {', '.join(VALID_PRIORITIES)} (optional)"},
-                    "category": {"type": "string", "description": "New category: Technical, Marketing, Legal, Operations, Administrative, Content (optional)"},
-                    "company": {"type": "string", "description": "New company: Om Apex Holdings, Om Luxe Properties, Om AI Solutions, Om Supply Chain (optional)"},
-                    "owner": {"type": "string", "description": "New owner name (optional)"},
-                    "due": {"type": "string", "description": "Due date in YYYY-MM-DD format (optional)"},
-                    "duration_days": {"type": "integer", "description": "Estimated duration in days (optional)"},
-                    "prd_path": {"type": "string", "description": "Relative path to PRD file (optional)"},
-                    "plan_folder": {"type": "string", "description": "Relative path to plan folder (optional)"},
-                    "approved_by": {"type": "string", "description": "Name of approver (optional)"},
-                    "approved_at": {"type": "string", "description": "Approval timestamp in ISO format (optional)"},
-                    "project_code": {"type": "string", "description": "Project code to associate with task (e.g., mcp-server, portal, ai-quorum, root). Optional."},
-                },
-                "required": ["task_id"],
+            "required": ["task_id", "status"],
+        },
+    ),
+    Tool(
+        name="update_task",
+        description="Update any field of an existing task (description, notes, priority, category, company, owner, due, duration_days, prd_path, plan_folder, approved_by, approved_at)",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
+                "description": {"type": "string", "description": "New description for the task (optional)"},
+                "notes": {"type": "string", "description": "New or updated notes (optional)"},
+                "priority": {"type": "string", "description": f"New priority: {', '.join(VALID_PRIORITIES)} (optional)", "enum": VALID_PRIORITIES},
+                "category": {"type": "string", "description": "New category: Technical, Marketing, Legal, Operations, Administrative, Content (optional)"},
+                "company": {"type": "string", "description": "New company: Om Apex Holdings, Om Luxe Properties, Om AI Solutions, Om Supply Chain (optional)"},
+                "owner": {"type": "string", "description": "New owner name (optional)"},
+                "due": {"type": "string", "description": "Due date in YYYY-MM-DD format (optional)"},
+                "duration_days": {"type": "integer", "description": "Estimated duration in days (optional)"},
+                "prd_path": {"type": "string", "description": "Relative path to PRD file (optional)"},
+                "plan_folder": {"type": "string", "description": "Relative path to plan folder (optional)"},
+                "approved_by": {"type": "string", "description": "Name of approver (optional)"},
+                "approved_at": {"type": "string", "description": "Approval timestamp in ISO format (optional)"},
+                "project_code": {"type": "string", "description": "Project code to associate with task (e.g., mcp-server, portal, ai-quorum, root). Optional."},
+                "verbose": {"type": "boolean", "description": "Return the full task row instead of only the changed fields (optional)"},
             },
-        ),
-        Tool(
-            name="force_complete",
-            description="Force-complete any task regardless of current status. Bypasses prerequisite checks. For Owner Portal manual overrides only — Claude Code should use complete_task instead.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
-                    "notes": {"type": "string", "description": "Reason for force completion (optional)"},
-                },
-                "required": ["task_id"],
+            "required": ["task_id"],
+        },
+    ),
+    Tool(
+        name="force_complete",
+        description="Force-complete any task regardless of current status. Bypasses prerequisite checks. For Owner Portal manual overrides only — Claude Code should use complete_task instead.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The task ID (e.g., TASK-001)"},
+                "notes": {"type": "string", "description": "Reason for force completion (optional)"},
             },
-        ),
-        Tool(
-            name="advance_task",
-            description="Move a task to its next valid status based on workflow rules. Records status change history. Enforces approval gates and SDLC requirements.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The task ID (e.g., DEV-531)"},
-                    "notes": {"type": "string", "description": "What was completed at this stage"},
-                    "changed_by": {"type": "string", "description": "Who is advancing: 'claude' or 'nishad'", "enum": ["claude", "nishad"]},
-                    "target_status": {"type": "string", "description": "Target status (optional — if omitted, auto-determines the next status). Required when multiple transitions are valid."},
-                    "review_passed": {"type": "boolean", "description": "Required when advancing to ready-for-manual-review: confirms review skill was run"},
-                    "docs_passed": {"type": "boolean", "description": "Required when advancing to ready-for-manual-review: confirms project-documentation skill was run"},
-                },
-                "required": ["task_id", "changed_by"],
+            "required": ["task_id"],
+        },
+    ),
+    Tool(
+        name="advance_task",
+        description="Move a task to its next valid status based on workflow rules. Records status change history. Enforces approval gates and SDLC requirements.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The task ID (e.g., DEV-531)"},
+                "notes": {"type": "string", "description": "What was completed at this stage"},
+                "changed_by": {"type": "string", "description": "Who is advancing: 'claude' or 'nishad'", "enum": ["claude", "nishad"]},
+                "target_status": {"type": "string", "description": "Target status (optional — if omitted, auto-determines the next status). Required when multiple transitions are valid."},
+                "review_passed": {"type": "boolean", "description": "Required when advancing to ready-for-manual-review: confirms review skill was run"},
+                "docs_passed": {"type": "boolean", "description": "Required when advancing to ready-for-manual-review: confirms project-documentation skill was run"},
             },
-        ),
-        Tool(
-            name="get_task_history",
-            description="Get the full status change history for a task, showing every transition with who changed it, when, and notes.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task_id": {"type": "string", "description": "The task ID (e.g., DEV-531)"},
-                },
-                "required": ["task_id"],
+            "required": ["task_id", "changed_by"],
+        },
+    ),
+    Tool(
+        name="get_task_history",
+        description="Get the full status change history for a task, showing every transition with who changed it, when, and notes.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task_id": {"type": "string", "description": "The task ID (e.g., DEV-531)"},
             },
-        ),
-        Tool(
-            name="get_schedule",
-            description="Get tasks with due dates for the next N days, grouped by date. Shows what's due today, tomorrow, this week.",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "project_code": {"type": "string", "description": "Filter by project code (optional — omit for all projects)"},
-                    "days": {"type": "integer", "description": "Number of days to look ahead (default 7, max 30)"},
-                },
-                "required": [],
+            "required": ["task_id"],
+        },
+    ),
+    Tool(
+        name="get_schedule",
+        description="Get tasks with due dates for the next N days, grouped by date. Shows what's due today, tomorrow, this week.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "project_code": {"type": "string", "description": "Filter by project code (optional — omit for all projects)"},
+                "days": {"type": "integer", "description": "Number of days to look ahead (default 7, max 30)"},
             },
-        ),
-    ]
-
-    async def handler(name: str, arguments: dict):
-        if name == "get_pending_tasks":
-            _require_supabase()
-
-            filter_keys = ["company", "category", "status", "owner", "task_type", "source", "search", "task_id"]
-            has_filter = any(arguments.get(k) for k in filter_keys)
-            if not has_filter:
-                return [TextContent(type="text", text=(
-                    "Error: get_pending_tasks requires at least one filter. "
-                    "Provide one or more of: status, company, owner, category, task_type, source, search, or task_id."
-                ))]
-
-            tasks = sb_get_tasks(
-                company=arguments.get("company"),
-                category=arguments.get("category"),
-                status=arguments.get("status"),
-                owner=arguments.get("owner"),
-                task_type=arguments.get("task_type"),
-                source=arguments.get("source"),
-                limit=arguments.get("limit", 10),
-                search=arguments.get("search"),
-                task_id=arguments.get("task_id"),
-            )
-            return [TextContent(type="text", text=json.dumps(tasks, indent=2))]
-
-        elif name == "get_task_queue":
-            _require_supabase()
-            tasks = sb_get_task_queue(
-                limit=arguments.get("limit", 10),
-                owner=arguments.get("owner"),
-                priority=arguments.get("priority"),
-                status=arguments.get("status"),
-                company=arguments.get("company"),
-                source=arguments.get("source"),
-                task_type=arguments.get("task_type"),
-            )
-            if not tasks:
-                return [TextContent(type="text", text="Task Queue: No tasks found.")]
-
-            projects_seen: dict[str, list[str]] = {}
-            for t in tasks:
-                project = t.get("project_code", "unassigned")
-                owner_str = f" @{t['owner']}" if t.get("owner") else ""
-                line = (
-                    f"  {t['id']} [{t.get('priority', '?')}] ({t.get('status', '?')}) "
-                    f"{t.get('description', '')}{owner_str}"
-                )
-                if project not in projects_seen:
-                    projects_seen[project] = []
-                projects_seen[project].append(line)
-
-            project_count = len(projects_seen)
-            lines = [f"Task Queue ({len(tasks)} tasks across {project_count} projects):"]
-            for project, task_lines in projects_seen.items():
-                lines.append(f"[{project}]")
-                lines.extend(task_lines)
-            return [TextContent(type="text", text="\n".join(lines))]
-
-        elif name == "add_task":
-            _require_supabase()
-
-            project_code = arguments["project_code"]
-            try:
-                project_id = resolve_project_code(project_code)
-            except ValueError as e:
-                return [TextContent(type="text", text=f"Error: {e}")]
-
-            description = arguments["description"]
-            owner = None
-            owner_match = re.search(r'\(([A-Za-z]+)\)\s*$', description)
-            if owner_match:
-                owner = owner_match.group(1).capitalize()
-                description = re.sub(r'\s*\([A-Za-z]+\)\s*$', '', description)
-
-            task_type = arguments.get("task_type", "enhancement")
-            new_id = get_next_task_id(task_type)
-            new_task = {
-                "id": new_id,
-                "description": description,
-                "category": arguments["category"],
-                "company": arguments["company"],
-                "priority": arguments["priority"],
-                "status": "created",
-                "created_at": datetime.now().isoformat(),
-                "project_id": project_id,
-            }
-            if owner:
-                new_task["owner"] = owner
-            if arguments.get("notes"):
-                new_task["notes"] = arguments["notes"]
-            if task_type:
-                new_task["task_type"] = task_type
-            if arguments.get("source"):
-                new_task["source"] = arguments["source"]
-            if arguments.get("prd_path"):
-                new_task["prd_path"] = arguments["prd_path"]
-            if arguments.get("commit_refs"):
-                new_task["commit_refs"] = arguments["commit_refs"]
-            if arguments.get("issue_ref"):
-                new_task["issue_ref"] = arguments["issue_ref"]
-
-            result = sb_add_task(new_task)
-
-            # Record initial status in history
-            _record_status_change(new_id, None, "created", "system",
-                                  f"Task created: {description[:80]}")
-
-            return [TextContent(type="text", text=f"Task created successfully:\n{json.dumps(result, indent=2)}")]
-
-        elif name == "complete_task":
-            _require_supabase()
-            task_id = arguments["task_id"]
-            completion_notes = arguments.get("notes")
-
-            existing_task = sb_get_task_by_id(task_id)
-            if not existing_task:
-                return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-            current_status = existing_task.get("status")
-            if current_status not in ("ready-for-manual-review", "user-testing"):
-                return [TextContent(type="text", text=(
-                    f"Task {task_id} cannot be completed: status is '{current_status}', "
-                    f"must be 'ready-for-manual-review' or 'user-testing'. Use force_complete for manual override."
-                ))]
-
-            updates = {
-                "status": "complete",
-                "completed_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-            }
-
-            if completion_notes:
-                existing_notes = existing_task.get("notes", "") or ""
-                if existing_notes:
-                    updates["completion_notes"] = completion_notes
-                    updates["notes"] = f"{existing_notes}\n\n[Completed] {completion_notes}"
-                else:
-                    updates["completion_notes"] = completion_notes
-                    updates["notes"] = f"[Completed] {completion_notes}"
-
-            result = sb_update_task(task_id, updates)
-            if result:
-                _record_status_change(task_id, current_status, "complete",
-                                      "nishad", completion_notes)
-                return [TextContent(type="text", text=f"Task {task_id} marked as complete:\n{json.dumps(result, indent=2)}")]
-            return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-        elif name == "update_task_status":
-            _require_supabase()
-            task_id = arguments["task_id"]
-            new_status = arguments["status"]
-
-            if new_status not in VALID_STATUSES:
-                return [TextContent(type="text", text=(
-                    f"Invalid status: {new_status}. "
-                    f"Must be one of: {', '.join(VALID_STATUSES)}"
-                ))]
-
-            # Get current status for history
-            existing = sb_get_task_by_id(task_id)
-            old_status = existing.get("status") if existing else None
-
-            updates = {
-                "status": new_status,
-                "updated_at": datetime.now().isoformat(),
-            }
-            if new_status == "complete":
-                updates["completed_at"] = datetime.now().isoformat()
-
-            result = sb_update_task(task_id, updates)
-            if result:
-                _record_status_change(task_id, old_status, new_status, "manual")
-                return [TextContent(type="text", text=f"Task {task_id} status updated to {new_status}:\n{json.dumps(result, indent=2)}")]
-            return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-        elif name == "update_task":
-            _require_supabase()
-            task_id = arguments["task_id"]
-
-            updates = {}
-            updated_fields = []
-
-            if arguments.get("description"):
-                updates["description"] = arguments["description"]
-                updated_fields.append("description")
-            if arguments.get("notes"):
-                updates["notes"] = arguments["notes"]
-                updated_fields.append("notes")
-            if arguments.get("priority"):
-                if arguments["priority"] not in VALID_PRIORITIES:
-                    return [TextContent(type="text", text=f"Invalid priority: {arguments['priority']}. Must be one of: {', '.join(VALID_PRIORITIES)}")]
-                updates["priority"] = arguments["priority"]
-                updated_fields.append("priority")
-            if arguments.get("category"):
-                updates["category"] = arguments["category"]
-                updated_fields.append("category")
-            if arguments.get("company"):
-                updates["company"] = arguments["company"]
-                updated_fields.append("company")
-            if arguments.get("owner"):
-                updates["owner"] = arguments["owner"]
-                updated_fields.append("owner")
-            if arguments.get("due"):
-                updates["due"] = arguments["due"]
-                updated_fields.append("due")
-            if arguments.get("duration_days") is not None:
-                updates["duration_days"] = arguments["duration_days"]
-                updated_fields.append("duration_days")
-            if arguments.get("prd_path"):
-                updates["prd_path"] = arguments["prd_path"]
-                updated_fields.append("prd_path")
-            if arguments.get("plan_folder"):
-                updates["plan_folder"] = arguments["plan_folder"]
-                updated_fields.append("plan_folder")
-            if arguments.get("approved_by"):
-                updates["approved_by"] = arguments["approved_by"]
-                updated_fields.append("approved_by")
-            if arguments.get("approved_at"):
-                updates["approved_at"] = arguments["approved_at"]
-                updated_fields.append("approved_at")
-            if arguments.get("project_code"):
-                try:
-                    project_uuid = resolve_project_code(arguments["project_code"])
-                    updates["project_id"] = project_uuid
-                    updated_fields.append("project_id")
-                except ValueError as e:
-                    return [TextContent(type="text", text=f"Error: {e}")]
-
-            if not updates:
-                return [TextContent(type="text", text=f"No updates provided for task {task_id}")]
-
-            updates["updated_at"] = datetime.now().isoformat()
-            result = sb_update_task(task_id, updates)
-
-            if result:
-                return [TextContent(type="text", text=f"Task {task_id} updated successfully.\nUpdated fields: {', '.join(updated_fields)}\n\n{json.dumps(result, indent=2)}")]
-            return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-        elif name == "force_complete":
-            _require_supabase()
-            task_id = arguments["task_id"]
-            force_notes = arguments.get("notes", "")
-
-            existing_task = sb_get_task_by_id(task_id)
-            if not existing_task:
-                return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-            old_status = existing_task.get("status")
-            timestamp = datetime.now().isoformat()
-            override_note = f"[Force Complete at {timestamp}]"
-            if force_notes:
-                override_note += f" {force_notes}"
-
-            existing_notes = existing_task.get("notes", "") or ""
-            new_notes = f"{existing_notes}\n\n{override_note}".strip() if existing_notes else override_note
-
-            updates = {
-                "status": "complete",
-                "completed_at": timestamp,
-                "updated_at": timestamp,
-                "notes": new_notes,
-                "completion_notes": force_notes or "Force completed via Owner Portal",
-            }
-
-            result = sb_update_task(task_id, updates)
-            if result:
-                _record_status_change(task_id, old_status, "complete",
-                                      "nishad", f"Force complete: {force_notes}")
-                return [TextContent(type="text", text=f"Task {task_id} force-completed:\n{json.dumps(result, indent=2)}")]
-            return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-        elif name == "advance_task":
-            _require_supabase()
-            task_id = arguments["task_id"]
-            changed_by = arguments["changed_by"]
-            notes = arguments.get("notes", "")
-            target_status = arguments.get("target_status")
-            review_passed = arguments.get("review_passed", False)
-            docs_passed = arguments.get("docs_passed", False)
-
-            existing = sb_get_task_by_id(task_id)
-            if not existing:
-                return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-            current_status = existing.get("status")
-            transitions = STATUS_TRANSITIONS.get(current_status, [])
-
-            if not transitions:
-                return [TextContent(type="text", text=(
-                    f"Task {task_id} at '{current_status}' has no valid next status. "
-                    f"It may already be complete."
-                ))]
-
-            # Filter to transitions this actor can make
-            valid = [(s, who) for s, who in transitions if who == changed_by]
-
-            if not valid:
-                # Show who CAN advance
-                needed_by = set(who for _, who in transitions)
-                return [TextContent(type="text", text=(
-                    f"Task {task_id} at '{current_status}' cannot be advanced by {changed_by}. "
-                    f"This transition requires: {', '.join(needed_by)}. "
-                    f"Valid next statuses: {', '.join(s for s, _ in transitions)}"
-                ))]
-
-            # Determine target
-            if target_status:
-                match = [(s, who) for s, who in valid if s == target_status]
-                if not match:
-                    return [TextContent(type="text", text=(
-                        f"Invalid target '{target_status}' for {changed_by}. "
-                        f"Valid options from '{current_status}': {', '.join(s for s, _ in valid)}"
-                    ))]
-                next_status = target_status
-            elif len(valid) == 1:
-                next_status = valid[0][0]
-            else:
-                options = ", ".join(f"'{s}'" for s, _ in valid)
-                return [TextContent(type="text", text=(
-                    f"Task {task_id} at '{current_status}' has multiple valid next statuses for {changed_by}: {options}. "
-                    f"Specify target_status to choose."
-                ))]
-
-            # SDLC gate enforcement for ready-for-manual-review
-            if next_status == "ready-for-manual-review":
-                if not review_passed:
-                    return [TextContent(type="text", text=(
-                        f"Cannot advance {task_id} to ready-for-manual-review: "
-                        f"review_passed=true is required. Run review/SKILL.md first."
-                    ))]
-                if not docs_passed:
-                    return [TextContent(type="text", text=(
-                        f"Cannot advance {task_id} to ready-for-manual-review: "
-                        f"docs_passed=true is required. Run project-documentation/SKILL.md first."
-                    ))]
-
-            # Execute the transition
-            updates = {
-                "status": next_status,
-                "updated_at": datetime.now().isoformat(),
-            }
-            if next_status == "complete":
-                updates["completed_at"] = datetime.now().isoformat()
-
-            result = sb_update_task(task_id, updates)
-            if result:
-                _record_status_change(task_id, current_status, next_status,
-                                      changed_by, notes)
-                return [TextContent(type="text", text=(
-                    f"Task {task_id} advanced: {current_status} -> {next_status}\n"
-                    f"Changed by: {changed_by}\n"
-                    f"Notes: {notes or '(none)'}\n\n"
-                    f"{json.dumps(result, indent=2)}"
-                ))]
-            return [TextContent(type="text", text=f"Task {task_id} not found")]
-
-        elif name == "get_task_history":
-            _require_supabase()
-            task_id = arguments["task_id"]
-
-            client = get_supabase_client()
-            if not client:
-                return [TextContent(type="text", text="Supabase not available")]
-
-            try:
-                result = (client.table("task_status_history")
-                          .select("*")
-                          .eq("task_id", task_id)
-                          .order("created_at")
-                          .execute())
-
-                if not result.data:
-                    return [TextContent(type="text", text=f"No history found for {task_id}")]
-
-                lines = [f"Status History for {task_id} ({len(result.data)} transitions):\n"]
-                for h in result.data:
-                    from_s = h.get("from_status") or "(created)"
-                    to_s = h.get("to_status")
-                    by = h.get("changed_by", "?")
-                    at = h.get("created_at", "?")[:19]
-                    dur = h.get("duration_minutes")
-                    dur_str = f" ({dur}min in prev status)" if dur else ""
-                    note = h.get("notes", "")
-                    note_str = f"\n    Notes: {note}" if note else ""
-                    lines.append(f"  {at} | {from_s} -> {to_s} | by {by}{dur_str}{note_str}")
-
-                return [TextContent(type="text", text="\n".join(lines))]
-            except Exception as e:
-                return [TextContent(type="text", text=f"Error fetching history: {e}")]
-
-        elif name == "get_schedule":
-            _require_supabase()
-            days = min(arguments.get("days", 7), 30)
-            project_code = arguments.get("project_code")
-
-            client = get_supabase_client()
-            if not client:
-                return [TextContent(type="text", text="Supabase not available")]
+            "required": [],
+        },
+    ),
+]
 
-            try:
-                from datetime import timedelta
-                today = datetime.now().date()
-                end_date = today + timedelta(days=days)
-
-                query = (client.table("tasks")
-                         .select("id, description, priority, status, due, owner, project_id")
-                         .neq("status", "complete")
-                         .not_.is_("due", "null")
-                         .lte("due", end_date.isoformat())
-                         .order("due"))
-
-                result = query.execute()
-                tasks = result.data or []
-
-                # Filter by project if specified
-                if project_code and tasks:
-                    try:
-                        project_uuid = resolve_project_code(project_code)
-                        tasks = [t for t in tasks if t.get("project_id") == project_uuid]
-                    except ValueError:
-                        pass
-
-                if not tasks:
-                    return [TextContent(type="text", text=f"No tasks with due dates in the next {days} days.")]
-
-                # Group by date
-                from collections import defaultdict
-                by_date: dict[str, list] = defaultdict(list)
-                overdue = []
-
-                for t in tasks:
-                    due = t.get("due", "")
-                    if due and due < today.isoformat():
-                        overdue.append(t)
-                    else:
-                        by_date[due].append(t)
-
-                lines = [f"Schedule — next {days} days ({len(tasks)} tasks):\n"]
-
-                if overdue:
-                    lines.append("OVERDUE:")
-                    for t in overdue:
-                        lines.append(f"  {t['id']} [{t.get('priority','?')}] ({t.get('status','?')}) due {t['due']} — {t.get('description','')[:60]}")
-                    lines.append("")
-
-                for date_str in sorted(by_date.keys()):
-                    label = date_str
-                    if date_str == today.isoformat():
-                        label = f"{date_str} (TODAY)"
-                    elif date_str == (today + timedelta(days=1)).isoformat():
-                        label = f"{date_str} (TOMORROW)"
-                    lines.append(f"{label}:")
-                    for t in by_date[date_str]:
-                        lines.append(f"  {t['id']} [{t.get('priority','?')}] ({t.get('status','?')}) — {t.get('description','')[:60]}")
-                    lines.append("")
-
-                return [TextContent(type="text", text="\n".join(lines))]
-            except Exception as e:
-                return [TextContent(type="text", text=f"Error fetching schedule: {e}")]
 
+async def _handler(name: str, arguments: dict):
+    fn = _DISPATCH.get(name)
+    if fn is None:
         return None
+    if name in _CACHED_READS:
+        return await _cached_read(name, fn, arguments)
+    if name in WRITING:
+        try:
+            return await fn(arguments)
+        finally:
+            _read_cache.clear()
+    return await fn(arguments)
+
+
+async def _cached_read(name: str, fn, arguments: dict):
+    key = (name, tuple(sorted((k, v) for k, v in arguments.items() if v is not None)))
+    try:
+        cached = _read_cache.get(key)
+    except TypeError:  # unhashable argument value; skip the cache
+        return await fn(arguments)
+    now = time.monotonic()
+    if cached and now - cached[0] < _READ_TTL:
+        return cached[1]
+    result = await fn(arguments)
+    if len(_read_cache) >= _READ_CACHE_MAX:
+        del _read_cache[next(iter(_read_cache))]
+    _read_cache[key] = (now, result)
+    return result
+
 
+def register() -> ToolModule:
     return ToolModule(
-        tools=tools,
-        handler=handler,
+        tools=_TOOLS,
+        handler=_handler,
         reading_tools=READING,
         writing_tools=WRITING,
     )
+
+
+# =============================================================================
+# Handler implementations
+# =============================================================================
+
+async def _handle_get_pending_tasks(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+
+    filter_keys = ["company", "category", "status", "owner", "task_type", "source", "search", "task_id"]
+    has_filter = any(arguments.get(k) for k in filter_keys)
+    if not has_filter:
+        return [TextContent(type="text", text=(
+            "Error: get_pending_tasks requires at least one filter. "
+            "Provide one or more of: status, company, owner, category, task_type, source, search, or task_id."
+        ))]
+
+    tasks = await asyncio.to_thread(
+        sb_get_tasks,
+        company=arguments.get("company"),
+        category=arguments.get("category"),
+        status=arguments.get("status"),
+        owner=arguments.get("owner"),
+        task_type=arguments.get("task_type"),
+        source=arguments.get("source"),
+        limit=arguments.get("limit", 10),
+        search=arguments.get("search"),
+        task_id=arguments.get("task_id"),
+    )
+    return [TextContent(type="text", text=_dumps(tasks))]
+
+
+async def _handle_get_task_queue(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    tasks = await asyncio.to_thread(
+        sb_get_task_queue,
+        limit=arguments.get("limit", 10),
+        owner=arguments.get("owner"),
+        priority=arguments.get("priority"),
+        status=arguments.get("status"),
+        company=arguments.get("company"),
+        source=arguments.get("source"),
+        task_type=arguments.get("task_type"),
+    )
+    if not tasks:
+        return [TextContent(type="text", text="Task Queue: No tasks found.")]
+
+    by_project: dict[str, list[dict]] = {}
+    for t in tasks:
+        by_project.setdefault(t.get("project_code", "unassigned"), []).append(t)
+
+    lines = chain(
+        [f"Task Queue ({len(tasks)} tasks across {len(by_project)} projects):"],
+        _queue_lines(by_project),
+    )
+    if len(tasks) <= _QUEUE_CHUNK_THRESHOLD:
+        return [TextContent(type="text", text="\n".join(lines))]
+
+    # Very large queues go out as several TextContent blocks of bounded size
+    chunks = []
+    while batch := list(islice(lines, _QUEUE_CHUNK_LINES)):
+        chunks.append(TextContent(type="text", text="\n".join(batch)))
+    return chunks
+
+
+async def _handle_add_task(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+
+    project_code = arguments["project_code"]
+    try:
+        project_id = await asyncio.to_thread(resolve_project_code, project_code)
+    except ValueError as e:
+        return [TextContent(type="text", text=f"Error: {e}")]
+
+    description = arguments["description"]
+    owner = None
+    owner_match = _OWNER_RE.search(description)
+    if owner_match:
+        owner = owner_match.group(1).capitalize()
+        description = description[:owner_match.start()]
+
+    task_type = arguments.get("task_type", "enhancement")
+    new_task = {
+        "description": description,
+        "category": arguments["category"],
+        "company": arguments["company"],
+        "priority": arguments["priority"],
+        "status": "created",
+        "created_at": datetime.now().isoformat(),
+        "project_id": project_id,
+    }
+    if owner:
+        new_task["owner"] = owner
+    if arguments.get("notes"):
+        new_task["notes"] = arguments["notes"]
+    if task_type:
+        new_task["task_type"] = task_type
+    if arguments.get("source"):
+        new_task["source"] = arguments["source"]
+    if arguments.get("prd_path"):
+        new_task["prd_path"] = arguments["prd_path"]
+    if arguments.get("commit_refs"):
+        new_task["commit_refs"] = arguments["commit_refs"]
+    if arguments.get("issue_ref"):
+        new_task["issue_ref"] = arguments["issue_ref"]
+
+    # Allocate the ID and insert in one transaction
+    try:
+        result = await asyncio.to_thread(sb_add_task_with_id, new_task, task_type)
+    except RuntimeError as e:
+        if "PGRST202" not in str(e):
+            raise
+        # RPC not deployed on this project yet: allocate the ID client-side
+        task_id = await asyncio.to_thread(get_next_task_id, task_type)
+        result = await asyncio.to_thread(sb_add_task, {"id": task_id, **new_task})
+    new_id = result["id"]
+
+    # Record initial status in history
+    await asyncio.to_thread(_record_status_change, new_id, None, "created", "system",
+                            f"Task created: {description[:80]}")
+
+    return [TextContent(type="text", text=f"Task created successfully:\n{_receipt(result, new_task, arguments)}")]
+
+
+async def _handle_complete_task(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    task_id = arguments["task_id"]
+    completion_notes = arguments.get("notes")
+
+    existing_task = await asyncio.to_thread(sb_get_task_by_id, task_id, "status,notes")
+    if not existing_task:
+        return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+    current_status = existing_task.get("status")
+    if current_status not in ("ready-for-manual-review", "user-testing"):
+        return [TextContent(type="text", text=(
+            f"Task {task_id} cannot be completed: status is '{current_status}', "
+            f"must be 'ready-for-manual-review' or 'user-testing'. Use force_complete for manual override."
+        ))]
+
+    now_iso = datetime.now().isoformat()
+    updates = {
+        "status": "complete",
+        "completed_at": now_iso,
+        "updated_at": now_iso,
+    }
+
+    if completion_notes:
+        existing_notes = existing_task.get("notes", "") or ""
+        if existing_notes:
+            updates["completion_notes"] = completion_notes
+            updates["notes"] = f"{existing_notes}\n\n[Completed] {completion_notes}"
+        else:
+            updates["completion_notes"] = completion_notes
+            updates["notes"] = f"[Completed] {completion_notes}"
+
+    result = await asyncio.to_thread(sb_update_task, task_id, updates)
+    if result:
+        await asyncio.to_thread(_record_status_change, task_id, current_status, "complete",
+                                "nishad", completion_notes)
+        return [TextContent(type="text", text=f"Task {task_id} marked as complete:\n{_receipt(result, updates, arguments)}")]
+    return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+
+async def _handle_update_task_status(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    task_id = arguments["task_id"]
+    new_status = arguments["status"]
+
+    if new_status not in _STATUSES:
+        return [TextContent(type="text", text=(
+            f"Invalid status: {new_status}. "
+            f"Must be one of: {', '.join(VALID_STATUSES)}"
+        ))]
+
+    # Get current status for history
+    existing = await asyncio.to_thread(sb_get_task_by_id, task_id, "status")
+    old_status = existing.get("status") if existing else None
+
+    now_iso = datetime.now().isoformat()
+    updates = {
+        "status": new_status,
+        "updated_at": now_iso,
+    }
+    if new_status == "complete":
+        updates["completed_at"] = now_iso
+
+    result = await asyncio.to_thread(sb_update_task, task_id, updates)
+    if result:
+        await asyncio.to_thread(_record_status_change, task_id, old_status, new_status, "manual")
+        return [TextContent(type="text", text=f"Task {task_id} status updated to {new_status}:\n{_receipt(result, updates, arguments)}")]
+    return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+
+async def _handle_update_task(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    task_id = arguments["task_id"]
+
+    updates = {}
+    updated_fields = []
+
+    for field in _UPDATABLE:
+        value = arguments.get(field)
+        # Empty values are ignored, except numeric fields where 0 is meaningful
+        if value or (value is not None and field in _NUMERIC_UPDATABLE):
+            updates[field] = value
+            updated_fields.append(field)
+
+    if "priority" in updates and updates["priority"] not in _PRIORITIES:
+        return [TextContent(type="text", text=f"Invalid priority: {updates['priority']}. Must be one of: {', '.join(VALID_PRIORITIES)}")]
+
+    if arguments.get("project_code"):
+        try:
+            project_uuid = await asyncio.to_thread(resolve_project_code, arguments["project_code"])
+            updates["project_id"] = project_uuid
+            updated_fields.append("project_id")
+        except ValueError as e:
+            return [TextContent(type="text", text=f"Error: {e}")]
+
+    if not updates:
+        return [TextContent(type="text", text=f"No updates provided for task {task_id}")]
+
+    updates["updated_at"] = datetime.now().isoformat()
+    result = await asyncio.to_thread(sb_update_task, task_id, updates)
+
+    if result:
+        return [TextContent(type="text", text=f"Task {task_id} updated successfully.\nUpdated fields: {', '.join(updated_fields)}\n\n{_receipt(result, updates, arguments)}")]
+    return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+
+async def _handle_force_complete(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    task_id = arguments["task_id"]
+    force_notes = arguments.get("notes", "")
+
+    existing_task = await asyncio.to_thread(sb_get_task_by_id, task_id, "status,notes")
+    if not existing_task:
+        return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+    old_status = existing_task.get("status")
+    timestamp = datetime.now().isoformat()
+    override_note = f"[Force Complete at {timestamp}]"
+    if force_notes:
+        override_note += f" {force_notes}"
+
+    existing_notes = existing_task.get("notes", "") or ""
+    new_notes = f"{existing_notes}\n\n{override_note}".strip() if existing_notes else override_note
+
+    updates = {
+        "status": "complete",
+        "completed_at": timestamp,
+        "updated_at": timestamp,
+        "notes": new_notes,
+        "completion_notes": force_notes or "Force completed via Owner Portal",
+    }
+
+    result = await asyncio.to_thread(sb_update_task, task_id, updates)
+    if result:
+        await asyncio.to_thread(_record_status_change, task_id, old_status, "complete",
+                                "nishad", f"Force complete: {force_notes}")
+        return [TextContent(type="text", text=f"Task {task_id} force-completed:\n{_dumps(result)}")]
+    return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+
+async def _handle_advance_task(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    task_id = arguments["task_id"]
+    changed_by = arguments["changed_by"]
+    notes = arguments.get("notes", "")
+    target_status = arguments.get("target_status")
+    review_passed = arguments.get("review_passed", False)
+    docs_passed = arguments.get("docs_passed", False)
+
+    existing = await asyncio.to_thread(sb_get_task_by_id, task_id, "status")
+    if not existing:
+        return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+    current_status = existing.get("status")
+    transitions = STATUS_TRANSITIONS.get(current_status, [])
+
+    if not transitions:
+        return [TextContent(type="text", text=(
+            f"Task {task_id} at '{current_status}' has no valid next status. "
+            f"It may already be complete."
+        ))]
+
+    # Filter to transitions this actor can make
+    valid = [(s, who) for s, who in transitions if who == changed_by]
+
+    if not valid:
+        # Show who CAN advance
+        needed_by = set(who for _, who in transitions)
+        return [TextContent(type="text", text=(
+            f"Task {task_id} at '{current_status}' cannot be advanced by {changed_by}. "
+            f"This transition requires: {', '.join(needed_by)}. "
+            f"Valid next statuses: {', '.join(s for s, _ in transitions)}"
+        ))]
+
+    # Determine target
+    if target_status:
+        match = [(s, who) for s, who in valid if s == target_status]
+        if not match:
+            return [TextContent(type="text", text=(
+                f"Invalid target '{target_status}' for {changed_by}. "
+                f"Valid options from '{current_status}': {', '.join(s for s, _ in valid)}"
+            ))]
+        next_status = target_status
+    elif len(valid) == 1:
+        next_status = valid[0][0]
+    else:
+        options = ", ".join(f"'{s}'" for s, _ in valid)
+        return [TextContent(type="text", text=(
+            f"Task {task_id} at '{current_status}' has multiple valid next statuses for {changed_by}: {options}. "
+            f"Specify target_status to choose."
+        ))]
+
+    # SDLC gate enforcement for ready-for-manual-review
+    if next_status == "ready-for-manual-review":
+        if not review_passed:
+            return [TextContent(type="text", text=(
+                f"Cannot advance {task_id} to ready-for-manual-review: "
+                f"review_passed=true is required. Run review/SKILL.md first."
+            ))]
+        if not docs_passed:
+            return [TextContent(type="text", text=(
+                f"Cannot advance {task_id} to ready-for-manual-review: "
+                f"docs_passed=true is required. Run project-documentation/SKILL.md first."
+            ))]
+
+    # Execute the transition
+    now_iso = datetime.now().isoformat()
+    updates = {
+        "status": next_status,
+        "updated_at": now_iso,
+    }
+    if next_status == "complete":
+        updates["completed_at"] = now_iso
+
+    result = await asyncio.to_thread(sb_update_task, task_id, updates)
+    if result:
+        await asyncio.to_thread(_record_status_change, task_id, current_status, next_status,
+                                changed_by, notes)
+        return [TextContent(type="text", text=(
+            f"Task {task_id} advanced: {current_status} -> {next_status}\n"
+            f"Changed by: {changed_by}\n"
+            f"Notes: {notes or '(none)'}\n\n"
+            f"{_dumps(result)}"
+        ))]
+    return [TextContent(type="text", text=f"Task {task_id} not found")]
+
+
+async def _handle_get_task_history(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    task_id = arguments["task_id"]
+
+    client = get_supabase_client()
+    if not client:
+        return [TextContent(type="text", text="Supabase not available")]
+
+    try:
+        query = (client.table("task_status_history")
+                 .select("*")
+                 .eq("task_id", task_id)
+                 .order("created_at"))
+        result = await asyncio.to_thread(query.execute)
+
+        if not result.data:
+            return [TextContent(type="text", text=f"No history found for {task_id}")]
+
+        lines = [f"Status History for {task_id} ({len(result.data)} transitions):\n"]
+        for h in result.data:
+            from_s = h.get("from_status") or "(created)"
+            to_s = h.get("to_status")
+            by = h.get("changed_by", "?")
+            at = h.get("created_at", "?")[:19]
+            dur = h.get("duration_minutes")
+            dur_str = f" ({dur}min in prev status)" if dur else ""
+            note = h.get("notes", "")
+            note_str = f"\n    Notes: {note}" if note else ""
+            lines.append(f"  {at} | {from_s} -> {to_s} | by {by}{dur_str}{note_str}")
+
+        return [TextContent(type="text", text="\n".join(lines))]
+    except Exception as e:
+        return [TextContent(type="text", text=f"Error fetching history: {e}")]
+
+
+async def _handle_get_schedule(arguments: dict) -> list[TextContent]:
+    _require_supabase()
+    days = min(arguments.get("days", 7), 30)
+    project_code = arguments.get("project_code")
+
+    client = get_supabase_client()
+    if not client:
+        return [TextContent(type="text", text="Supabase not available")]
+
+    try:
+        from datetime import timedelta
+        today = datetime.now().date()
+        end_date = today + timedelta(days=days)
+
+        query = (client.table("tasks")
+                 .select("id, description, priority, status, due, owner, project_id")
+                 .neq("status", "complete")
+                 .not_.is_("due", "null")
+                 .lte("due", end_date.isoformat())
+                 .order("due"))
+
+        result = await asyncio.to_thread(query.execute)
+        tasks = result.data or []
+
+        # Filter by project if specified
+        if project_code and tasks:
+            try:
+                project_uuid = await asyncio.to_thread(resolve_project_code, project_code)
+                tasks = [t for t in tasks if t.get("project_id") == project_uuid]
+            except ValueError:
+                pass
+
+        if not tasks:
+            return [TextContent(type="text", text=f"No tasks with due dates in the next {days} days.")]
+
+        # Group by date
+        from collections import defaultdict
+        by_date: dict[str, list] = defaultdict(list)
+        overdue = []
+
+        for t in tasks:
+            due = t.get("due", "")
+            if due and due < today.isoformat():
+                overdue.append(t)
+            else:
+                by_date[due].append(t)
+
+        lines = [f"Schedule — next {days} days ({len(tasks)} tasks):\n"]
+
+        if overdue:
+            lines.append("OVERDUE:")
+            for t in overdue:
+                lines.append(f"  {t['id']} [{t.get('priority','?')}] ({t.get('status','?')}) due {t['due']} — {t.get('description','')[:60]}")
+            lines.append("")
+
+        for date_str in sorted(by_date.keys()):
+            label = date_str
+            if date_str == today.isoformat():
+                label = f"{date_str} (TODAY)"
+            elif date_str == (today + timedelta(days=1)).isoformat():
+                label = f"{date_str} (TOMORROW)"
+            lines.append(f"{label}:")
+            for t in by_date[date_str]:
+                lines.append(f"  {t['id']} [{t.get('priority','?')}] ({t.get('status','?')}) — {t.get('description','')[:60]}")
+            lines.append("")
+
+        return [TextContent(type="text", text="\n".join(lines))]
+    except Exception as e:
+        return [TextContent(type="text", text=f"Error fetching schedule: {e}")]
+
+
+_DISPATCH = {
+    "get_pending_tasks": _handle_get_pending_tasks,
+    "get_task_queue": _handle_get_task_queue,
+    "add_task": _handle_add_task,
+    "complete_task": _handle_complete_task,
+    "update_task_status": _handle_update_task_status,
+    "update_task": _handle_update_task,
+    "force_complete": _handle_force_complete,
+    "advance_task": _handle_advance_task,
+    "get_task_history": _handle_get_task_history,
+    "get_schedule": _handle_get_schedule,
+}
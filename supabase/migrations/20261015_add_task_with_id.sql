@@ -0,0 +1,48 @@
+-- Owner Portal Supabase (tasks table).
+-- Atomic ID allocation + insert for the add_task MCP tool: one PostgREST
+-- round-trip instead of get_next_task_id's scans plus an insert, and no two
+-- concurrent callers can be handed the same ID. TASK/DEV/ISSUE share one
+-- counter. Other writers (the client-side fallback, Cortex, the Owner Portal)
+-- still allocate max+1 without touching the sequence, so every call takes the
+-- larger of nextval and the current max suffix + 1 and advances the sequence
+-- to match, serialized by a transaction-scoped advisory lock.
+
+CREATE SEQUENCE IF NOT EXISTS tasks_id_seq;
+
+CREATE OR REPLACE FUNCTION add_task_with_id(task JSONB, prefix TEXT)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    next_num BIGINT;
+    cols TEXT;
+    created tasks;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('tasks_id_seq'));
+
+    SELECT GREATEST(nextval('tasks_id_seq'), COALESCE(MAX(split_part(id, '-', 2)::bigint), 0) + 1)
+    INTO next_num
+    FROM tasks
+    WHERE id ~ '^(TASK|DEV|ISSUE)-[0-9]+$';
+    PERFORM setval('tasks_id_seq', next_num);
+
+    task := task || jsonb_build_object('id', prefix || '-' || lpad(next_num::text, 3, '0'));
+
+    -- Insert only the keys the caller sent, so omitted columns get their DEFAULT
+    SELECT string_agg(quote_ident(c.column_name), ', ' ORDER BY c.ordinal_position)
+    INTO cols
+    FROM information_schema.columns AS c
+    WHERE c.table_schema = current_schema()
+      AND c.table_name = 'tasks'
+      AND task ? c.column_name;
+
+    EXECUTE format(
+        'INSERT INTO tasks (%1$s) SELECT %1$s FROM jsonb_populate_record(NULL::tasks, $1) RETURNING *',
+        cols
+    )
+    INTO created
+    USING task;
+
+    RETURN to_jsonb(created);
+END;
+$$;
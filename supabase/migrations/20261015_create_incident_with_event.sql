@@ -0,0 +1,29 @@
+-- Om Cortex Supabase (prodsupport_* tables), not the Owner Portal project.
+-- Atomic incident + audit event insert for the incident_create MCP tool:
+-- one PostgREST round-trip instead of two, and no incident without its
+-- "created" event. Columns are typed via jsonb_populate_record; columns not
+-- listed (id, timestamps, counters) keep their table defaults.
+
+CREATE OR REPLACE FUNCTION create_incident_with_event(incident JSONB, event JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    created prodsupport_incidents;
+BEGIN
+    INSERT INTO prodsupport_incidents (
+        fingerprint, title, project, source, severity, category,
+        status, assigned_to, metadata, component, diagnosis
+    )
+    SELECT i.fingerprint, i.title, i.project, i.source, i.severity, i.category,
+           i.status, i.assigned_to, COALESCE(i.metadata, '{}'::jsonb), i.component, i.diagnosis
+    FROM jsonb_populate_record(NULL::prodsupport_incidents, incident) AS i
+    RETURNING * INTO created;
+
+    INSERT INTO prodsupport_events (incident_id, event_type, actor, details)
+    SELECT created.id, e.event_type, e.actor, e.details
+    FROM jsonb_populate_record(NULL::prodsupport_events, event) AS e;
+
+    RETURN to_jsonb(created);
+END;
+$$;
@@ -0,0 +1,8 @@
+-- Indexes for get_handoff_history: rows are always filtered by project_code,
+-- optionally by created_by, and read newest-first with a LIMIT, so each
+-- form of the query can be served by an index scan.
+CREATE INDEX IF NOT EXISTS idx_handoff_history_project_created_by
+  ON session_handoff_history (project_code, created_by, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_handoff_history_project_created_at
+  ON session_handoff_history (project_code, created_at DESC);
@@ -0,0 +1,51 @@
+-- Owner Portal Supabase (tasks table).
+-- Server-side get_task_queue: filters, the top-N-per-project cut, ordering and
+-- description truncation all happen in Postgres, so the MCP tool receives only
+-- the rows it returns (instead of the 200 newest rows, grouped in Python).
+-- Filter semantics match the PostgREST query it replaces: ILIKE for text
+-- filters, non-complete and non-manual tasks by default.
+
+CREATE INDEX IF NOT EXISTS idx_tasks_queue_project_updated
+    ON tasks (project_id, updated_at DESC)
+    WHERE status <> 'complete';
+
+CREATE OR REPLACE FUNCTION get_task_queue(
+    p_limit INT DEFAULT 10,
+    p_per_project INT DEFAULT 2,
+    p_owner TEXT DEFAULT NULL,
+    p_priority TEXT DEFAULT NULL,
+    p_status TEXT DEFAULT NULL,
+    p_company TEXT DEFAULT NULL,
+    p_source TEXT DEFAULT NULL,
+    p_task_type TEXT DEFAULT NULL
+)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH ranked AS (
+        SELECT id,
+               CASE WHEN length(description) > 80 THEN left(description, 77) || '...'
+                    ELSE description END AS description,
+               priority, status, owner, company, updated_at, project_id, task_type,
+               row_number() OVER (PARTITION BY project_id ORDER BY updated_at DESC) AS rn,
+               max(updated_at) OVER (PARTITION BY project_id) AS project_latest
+        FROM tasks
+        WHERE (CASE WHEN p_status IS NULL THEN status <> 'complete' ELSE status ILIKE p_status END)
+          AND (CASE WHEN p_task_type IS NULL THEN task_type <> 'manual' ELSE task_type = p_task_type END)
+          AND (p_owner IS NULL OR owner ILIKE p_owner)
+          AND (p_priority IS NULL OR priority ILIKE p_priority)
+          AND (p_company IS NULL OR company ILIKE p_company)
+          AND (p_source IS NULL OR source ILIKE p_source)
+    ), top AS (
+        SELECT * FROM ranked
+        WHERE rn <= p_per_project
+        ORDER BY project_latest DESC, project_id, updated_at DESC
+        LIMIT p_limit
+    )
+    SELECT COALESCE(
+        jsonb_agg(to_jsonb(top) - 'rn' - 'project_latest' ORDER BY project_latest DESC, project_id, updated_at DESC),
+        '[]'::jsonb
+    )
+    FROM top;
+$$;
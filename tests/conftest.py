@@ -0,0 +1,51 @@
+"""
+Shared fixtures for Om Apex MCP Server tests
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def json_data():
+    """Return a loader that parses each data file once per test session."""
+    from om_apex_mcp.tools.helpers import load_json
+
+    cache = {}
+
+    def _get(name):
+        if name not in cache:
+            cache[name] = load_json(name)
+        return cache[name]
+
+    return _get
+
+
+@pytest.fixture
+def local_backend(tmp_path):
+    """A LocalStorage rooted at tmp_path with an empty mcp-data directory."""
+    from om_apex_mcp.storage import LocalStorage
+
+    data_dir = tmp_path / "mcp-data"
+    data_dir.mkdir()
+    return LocalStorage(data_dir=data_dir, shared_drive_root=tmp_path)
+
+
+@pytest.fixture(scope="module")
+def empty_backend(tmp_path_factory):
+    """A LocalStorage over one empty directory, shared by read-only tests in a module."""
+    from om_apex_mcp.storage import LocalStorage
+
+    root = tmp_path_factory.mktemp("empty")
+    return LocalStorage(data_dir=root, shared_drive_root=root)
+
+
+@pytest.fixture(scope="session")
+def registered_modules():
+    """Tool modules exercised by the registration tests, each registered once per session."""
+    from om_apex_mcp.tools import dns_sentinel, documents, incidents
+
+    return {
+        "documents": documents.register(),
+        "dns_sentinel": dns_sentinel.register(),
+        "incidents": incidents.register(),
+    }
@@ -2,63 +2,65 @@
 Tests for Om Apex MCP Server
 """
 
+import importlib
 import json
 import pytest
-from pathlib import Path
-import sys
+from itertools import chain
 
-# Add src to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+import httpx
+from mcp.server import Server
 
-from om_apex_mcp.tools.helpers import load_json, save_json, init_storage, get_backend
+from om_apex_mcp.auth import DEMO_MODE_TOOLS, load_api_keys
+from om_apex_mcp.server import create_server
+from om_apex_mcp.tools.helpers import save_json, init_storage, get_backend
 from om_apex_mcp.storage import LocalStorage
 
 
 class TestDataLoading:
     """Test JSON data loading functionality."""
 
-    def test_load_company_structure(self):
+    def test_load_company_structure(self, json_data):
         """Test loading company structure."""
-        data = load_json("company_structure.json")
+        data = json_data("company_structure.json")
         assert data.get("holding_company", {}).get("name") == "Om Apex Holdings LLC"
         assert len(data.get("subsidiaries", [])) == 2
 
-    def test_load_technology_decisions(self):
+    def test_load_technology_decisions(self, json_data):
         """Test loading technology decisions."""
-        data = load_json("technology_decisions.json")
+        data = json_data("technology_decisions.json")
         assert "decisions" in data
         assert len(data["decisions"]) > 0
 
-    def test_load_domain_inventory(self):
+    def test_load_domain_inventory(self, json_data):
         """Test loading domain inventory."""
-        data = load_json("domain_inventory.json")
+        data = json_data("domain_inventory.json")
         # Domain count varies by environment (live data, 20+ domains)
         assert data.get("summary", {}).get("total_domains", 0) >= 20
 
-    def test_load_pending_tasks(self):
+    def test_load_pending_tasks(self, json_data):
         """Test loading pending tasks file doesn't crash.
 
         Tasks have moved to Supabase — this JSON file may be empty ({}) or absent.
         Test only verifies the load call succeeds.
         """
-        data = load_json("pending_tasks.json")
+        data = json_data("pending_tasks.json")
         assert isinstance(data, dict)
 
 
 class TestCompanyContext:
     """Test company context data."""
 
-    def test_subsidiaries(self):
+    def test_subsidiaries(self, json_data):
         """Test that subsidiaries are properly defined."""
-        data = load_json("company_structure.json")
+        data = json_data("company_structure.json")
         subsidiaries = data.get("subsidiaries", [])
         names = [s.get("name") for s in subsidiaries]
         assert "Om Luxe Properties LLC" in names
         assert "Om AI Solutions LLC" in names
 
-    def test_ownership(self):
+    def test_ownership(self, json_data):
         """Test ownership structure."""
-        data = load_json("company_structure.json")
+        data = json_data("company_structure.json")
         ownership = data.get("holding_company", {}).get("ownership", {})
         assert "nishad_tambe" in ownership
         assert "sumedha_tambe" in ownership
@@ -67,9 +69,9 @@ class TestCompanyContext:
 class TestTasks:
     """Test task data structure."""
 
-    def test_task_structure(self):
+    def test_task_structure(self, json_data):
         """Test that tasks have required fields."""
-        data = load_json("pending_tasks.json")
+        data = json_data("pending_tasks.json")
         for task in data.get("tasks", []):
             assert "id" in task
             assert "description" in task
@@ -79,14 +81,9 @@ class TestTasks:
 class TestModuleRegistration:
     """Test that all tool modules register correctly."""
 
-    def test_remaining_modules_load(self):
+    def test_remaining_modules_load(self, registered_modules):
         """Test that remaining modules (post-Cortex migration) register correctly."""
-        from om_apex_mcp.tools import documents
-
-        documents_mod = documents.register()
-
-        all_tools = []
-        all_tools.extend(t.name for t in documents_mod.tools)
+        all_tools = [t.name for t in registered_modules["documents"].tools]
 
         # Documents: 10 tools (previously also had context, tasks, progress — migrated to Cortex)
         assert len(all_tools) == 10
@@ -95,11 +92,9 @@ class TestModuleRegistration:
         assert "generate_branded_html" in all_tools
         assert "list_company_configs" in all_tools
 
-    def test_dns_sentinel_module_loads(self):
+    def test_dns_sentinel_module_loads(self, registered_modules):
         """Test that dns_sentinel module registers its 10 tools."""
-        from om_apex_mcp.tools import dns_sentinel
-        mod = dns_sentinel.register()
-        tool_names = [t.name for t in mod.tools]
+        tool_names = [t.name for t in registered_modules["dns_sentinel"].tools]
         assert len(tool_names) == 10
         assert "dns_audit" in tool_names
         assert "dns_snapshot" in tool_names
@@ -108,15 +103,475 @@ class TestModuleRegistration:
         assert "dns_approve" in tool_names
         assert "dns_reject" in tool_names
 
-    def test_incidents_module_loads(self):
-        """Test that incidents module registers its 2 tools."""
-        from om_apex_mcp.tools import incidents
-        mod = incidents.register()
-        tool_names = [t.name for t in mod.tools]
-        assert len(tool_names) == 2
+    def test_incidents_module_loads(self, registered_modules):
+        """Test that incidents module registers its 3 tools."""
+        tool_names = [t.name for t in registered_modules["incidents"].tools]
+        assert len(tool_names) == 3
         assert "incident_create" in tool_names
+        assert "incident_create_batch" in tool_names
         assert "incident_list" in tool_names
 
+    def test_tool_names_unique_and_classified(self, registered_modules):
+        """Test tool names don't collide across modules and each is a reading or writing tool."""
+        mods = registered_modules.values()
+        all_tools = [t.name for t in chain.from_iterable(m.tools for m in mods)]
+        assert len(all_tools) == len(set(all_tools))
+        classified = set(chain.from_iterable(chain(m.reading_tools, m.writing_tools) for m in mods))
+        assert set(all_tools) <= classified
+
+
+class TestDocumentHelpers:
+    """Test pure helpers in the documents module."""
+
+    def test_slugify(self):
+        """Test template/config names normalize to lowercase dashed IDs."""
+        from om_apex_mcp.tools.documents import _slugify
+        assert _slugify("Operating Agreement Template") == "operating-agreement-template"
+        assert _slugify("Om AI Solutions") == "om-ai-solutions"
+
+    def test_extract_variables_first_seen_order(self):
+        """Test template variables are deduplicated in first-seen order."""
+        from om_apex_mcp.tools.documents import _extract_variables
+        content = "{{date}} {{company_name}} {{date}} {{ein}}"
+        assert _extract_variables(content) == ["date", "company_name", "ein"]
+
+    def test_load_json_cached_reloads_on_change(self, tmp_path):
+        """Test the config cache returns the parsed dict until the file changes."""
+        from om_apex_mcp.tools.documents import _load_json_cached
+        config_path = tmp_path / "company-config.json"
+        config_path.write_text('{"company": {"name": "A"}}')
+        first = _load_json_cached(config_path)
+        assert _load_json_cached(config_path) is first
+
+        config_path.write_text('{"company": {"name": "Bee"}}')
+        assert _load_json_cached(config_path)["company"]["name"] == "Bee"
+
+    def test_branded_css_memoized_by_brand(self):
+        """Test CSS is reused for an identical brand and rebuilt when it changes."""
+        from om_apex_mcp.tools.documents import _build_branded_css
+        brand = {
+            "primary_color": "#111111", "accent_color": "#222222", "body_text_color": "#333333",
+            "secondary_text_color": "#444444", "heading_font": "Serif", "body_font": "Sans",
+        }
+        css = _build_branded_css({"brand": brand})
+        assert _build_branded_css({"brand": dict(brand)}) is css
+        recolored = _build_branded_css({"brand": {**brand, "primary_color": "#999999"}})
+        assert "#999999" in recolored and "#999999" not in css
+
+    def test_postprocess_html_anchors_links_and_wraps_toc(self):
+        """Test headings get ids, TOC rows link to them and the TOC is wrapped."""
+        from om_apex_mcp.tools.documents import _postprocess_html
+        html = (
+            "<h2>Table of Contents</h2>"
+            "<table><tr><td>1</td><td>Intro</td><td>3</td></tr></table>"
+            "<h2>Section 1: Intro</h2><h3>2.1 Scope</h3><h2 id=\"x\">Kept</h2>"
+        )
+        out = _postprocess_html(html)
+        assert out.startswith('<div class="toc-section"><h2 id="table-of-contents">')
+        assert '</table></div><h2 id="section-1">' in out
+        assert '<td><a href="#section-1">Intro</a></td>' in out
+        assert '<h3 id="section-2-1">' in out
+        assert '<h2 id="x">Kept</h2>' in out
+
+    def test_walk_for_artifacts_finds_nearest_configs(self, tmp_path):
+        """Test a single ascent finds the nearest configs and stops once both are found."""
+        from om_apex_mcp.tools.documents import _walk_for_artifacts
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+        (tmp_path / "company-config.json").write_text("{}")
+        (tmp_path / "a" / "company-config.json").write_text("{}")
+        (tmp_path / "document-config.json").write_text("{}")
+        md_file = nested / "doc.md"
+        md_file.write_text("# Doc")
+
+        company_file, doc_file, levels = _walk_for_artifacts(str(md_file))
+        assert company_file == (tmp_path / "a" / "company-config.json").resolve()
+        assert doc_file == (tmp_path / "document-config.json").resolve()
+        assert levels[0] == (nested.resolve(), {"doc.md": "doc.md"})
+        assert levels[-1][0] == tmp_path.resolve()
+
+    def test_logo_walk_continues_past_levels_and_ignores_case(self, tmp_path):
+        """Test logo lookup extends a stopped walk and matches names case-insensitively."""
+        from om_apex_mcp.tools.documents import _resolve_logo_path, _walk_for_artifacts
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+        (nested / "Company-Config.json").write_text("{}")
+        (nested / "document-config.json").write_text("{}")
+        (tmp_path / "Brand-Assets").mkdir()
+        (tmp_path / "Brand-Assets" / "om-logo.png").write_bytes(b"\x89PNG")
+
+        company_file, _, levels = _walk_for_artifacts(str(nested))
+        assert company_file == nested.resolve() / "Company-Config.json"
+        assert [level for level, _ in levels] == [nested.resolve()]
+        config = {"brand": {"logo": "om-logo.png", "logo_dir": "brand-assets"}}
+        logo = _resolve_logo_path(config, str(nested), levels)
+        assert logo == str((tmp_path / "Brand-Assets" / "om-logo.png").resolve())
+
+    def test_logo_absolute_dir_and_nested_name(self, tmp_path):
+        """Test an absolute logo_dir and a logo name with a path separator both resolve."""
+        from om_apex_mcp.tools.documents import _resolve_logo_path
+        assets = tmp_path / "assets"
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+        (tmp_path / "brand").mkdir()
+        (tmp_path / "brand" / "om-logo.png").write_bytes(b"\x89PNG")
+        assets.mkdir()
+        (assets / "mark.png").write_bytes(b"\x89PNG")
+
+        config = {"brand": {"logo": "mark.png", "logo_dir": str(assets)}}
+        assert _resolve_logo_path(config, str(nested)) == str((assets / "mark.png").resolve())
+        config = {"brand": {"logo": "brand/om-logo.png", "logo_dir": "missing"}}
+        assert _resolve_logo_path(config, str(nested)) == str((tmp_path / "brand" / "om-logo.png").resolve())
+
+    def test_logo_data_uri(self, tmp_path):
+        """Test image logos are embedded as data URIs; other paths pass through."""
+        from om_apex_mcp.tools.documents import _logo_data_uri
+        logo = tmp_path / "logo.png"
+        logo.write_bytes(b"\x89PNG")
+        assert _logo_data_uri(str(logo)) == "data:image/png;base64,iVBORw=="
+        assert _logo_data_uri("om-logo.png") == "om-logo.png"
+
+    def test_find_company_config_by_name_index(self, tmp_path, local_backend):
+        """Test name lookup by exact and partial name, and pickup of new configs."""
+        from om_apex_mcp.tools.documents import _find_company_config_by_name
+        init_storage(local_backend)
+        (tmp_path / "company-config.json").write_text(
+            json.dumps({"company": {"name": "Om Apex Holdings LLC", "short_name": "Om Apex Holdings"}})
+        )
+        assert _find_company_config_by_name("om apex holdings")["company"]["name"] == "Om Apex Holdings LLC"
+        assert _find_company_config_by_name("Apex") is not None
+        assert _find_company_config_by_name("Om Luxe") is None
+
+        (tmp_path / "om-luxe").mkdir()
+        (tmp_path / "om-luxe" / "company-config.json").write_text(
+            json.dumps({"company": {"name": "Om Luxe Properties LLC", "short_name": "Om Luxe"}})
+        )
+        assert _find_company_config_by_name("Om Luxe")["company"]["short_name"] == "Om Luxe"
+
+    def test_name_index_rebuilds_only_when_configs_change(self, tmp_path, local_backend, monkeypatch):
+        """Test a miss over unchanged configs skips the rescan and rebuilds swap in a new dict."""
+        from om_apex_mcp.tools import documents
+        init_storage(local_backend)
+        (tmp_path / "company-config.json").write_text(json.dumps({"company": {"name": "Om Apex Holdings LLC"}}))
+        assert documents._find_company_config_by_name("Om Apex") is not None
+        index = documents._NAME_INDEX
+
+        builds = []
+        real_build = documents._build_name_index
+        monkeypatch.setattr(documents, "_build_name_index", lambda root: builds.append(root) or real_build(root))
+        assert documents._find_company_config_by_name("Om Luxe") is None
+        assert builds == []
+
+        (tmp_path / "company-config.json").write_text(json.dumps({"company": {"name": "Om Luxe Properties LLC"}}))
+        assert documents._find_company_config_by_name("Om Luxe") is not None
+        assert builds == [tmp_path]
+        assert index == {"om apex holdings llc": tmp_path / "company-config.json"}
+
+
+class TestProgressHelpers:
+    """Test pure helpers in the progress module."""
+
+    def test_last_session_number(self):
+        """Test the last session heading wins and non-numeric headings are skipped."""
+        from om_apex_mcp.tools.progress import _last_session_number
+        content = "# Daily Progress\n\n## Session 1 (code)\n\n## Session 2 (chat)\n- ## Session notes\n"
+        assert _last_session_number(content) == 2
+        assert _last_session_number("# Daily Progress\n") == 0
+
+    def test_file_contains_across_chunks(self, tmp_path, local_backend):
+        """Test a case-insensitive match spanning a chunk boundary is found."""
+        from om_apex_mcp.tools.progress import _compile_search, _file_contains
+        (tmp_path / "log.md").write_text("## Session 1\nFixed the MCP Server bug\n", encoding="utf-8")
+        assert _file_contains(local_backend, "log.md", _compile_search("mcp server"), 9, chunk_size=4)
+        assert not _file_contains(local_backend, "log.md", _compile_search("quorum"), 5, chunk_size=4)
+        assert not _file_contains(local_backend, "missing.md", _compile_search("mcp"), 2)
+
+    def test_read_and_match_skips_large_nonmatching_files(self, tmp_path, local_backend):
+        """Test large files are rejected from their bytes without being read or cached."""
+        from om_apex_mcp.tools import progress
+        (tmp_path / "big.md").write_text("x" * LocalStorage.MMAP_MIN_SIZE + "\nMCP server\n", encoding="utf-8")
+        for text, expected in (("quorum", False), ("mcp server", True)):
+            matcher, bytes_matcher = progress._compile_search(text), progress._compile_bytes_search(text)
+            content, matched = progress._read_and_match(local_backend, "big.md", matcher, len(text) - 1, bytes_matcher)
+            assert matched is expected and (content is not None) is expected
+
+    def test_snippet_windows_first_match(self):
+        """Test snippets keep a window around the first match and mark cut ends."""
+        from om_apex_mcp.tools.progress import _compile_search, _snippet
+        content = "a" * 50 + "MCP" + "b" * 50
+        assert _snippet(content, _compile_search("mcp"), radius=5) == "...aaaaaMCPbbbbb..."
+        assert _snippet("short MCP", _compile_search("mcp"), radius=10) == "short MCP"
+
+    def test_read_and_match_revalidates_on_mtime(self, tmp_path, local_backend):
+        """Test cached file text is reused until the file's mtime or size changes."""
+        import os
+        from om_apex_mcp.tools.progress import _compile_search, _read_and_match
+        log = tmp_path / "log.md"
+        log.write_text("Fixed the MCP server\n", encoding="utf-8")
+        mcp, quorum = _compile_search("mcp"), _compile_search("quorum")
+        assert _read_and_match(local_backend, "log.md", mcp, 2) == ("Fixed the MCP server\n", True)
+        assert _read_and_match(local_backend, "log.md", quorum, 5) == ("Fixed the MCP server\n", False)
+        log.write_text("AI Quorum release\n", encoding="utf-8")
+        os.utime(log, ns=(1, 1))
+        assert _read_and_match(local_backend, "log.md", quorum, 5) == ("AI Quorum release\n", True)
+        # A rewrite within the same mtime tick is caught by the size change
+        log.write_text("AI Quorum release 2\n", encoding="utf-8")
+        os.utime(log, ns=(1, 1))
+        assert _read_and_match(local_backend, "log.md", quorum, 5) == ("AI Quorum release 2\n", True)
+
+    def test_read_and_match_reads_non_streaming_backends_once(self, local_backend):
+        """Test backends without mtimes or streaming are read once per file, match or not."""
+        from om_apex_mcp.storage import StorageBackend
+        from om_apex_mcp.tools.progress import _compile_search, _read_and_match
+        reads = []
+
+        class RemoteStorage(LocalStorage):
+            iter_text = StorageBackend.iter_text
+            mtime_ns = StorageBackend.mtime_ns
+
+            def read_text(self, path):
+                reads.append(path)
+                return super().read_text(path)
+
+        backend = RemoteStorage(local_backend.data_dir, shared_drive_root=local_backend.shared_drive_root)
+        (backend.shared_drive_root / "a.md").write_text("MCP server\n", encoding="utf-8")
+        (backend.shared_drive_root / "b.md").write_text("AI Quorum\n", encoding="utf-8")
+        mcp = _compile_search("mcp")
+        assert _read_and_match(backend, "a.md", mcp, 2) == ("MCP server\n", True)
+        assert _read_and_match(backend, "b.md", mcp, 2) == ("AI Quorum\n", False)
+        assert reads == ["a.md", "b.md"]
+
+    async def test_search_scans_listing_after_token_hits(self, local_backend):
+        """Test substring matches the backend's token search missed are still found."""
+        from om_apex_mcp.tools import progress
+        from om_apex_mcp.tools.helpers import DAILY_PROGRESS_REL
+
+        class TokenSearchStorage(LocalStorage):
+            def search_files(self, directory, needle, pattern="*.md"):
+                return [f"{directory}/2026-01-01.md"]  # only the whole-word "handoff"
+
+        backend = TokenSearchStorage(local_backend.data_dir, shared_drive_root=local_backend.shared_drive_root)
+        logs = backend.shared_drive_root / DAILY_PROGRESS_REL
+        logs.mkdir(parents=True)
+        (logs / "2026-01-01.md").write_text("Saved the handoff\n", encoding="utf-8")
+        (logs / "2026-01-02.md").write_text("Reviewed handoffs\n", encoding="utf-8")
+        (logs / "2026-01-03.md").write_text("Unrelated\n", encoding="utf-8")
+        init_storage(backend)
+
+        result = await progress.register().handler("search_daily_progress", {"search_text": "handoff"})
+        found = json.loads(result[0].text.split("\n\n", 1)[1])
+        assert [r["file"] for r in found] == ["2026-01-01.md", "2026-01-02.md"]
+
+
+class TestIncidentHelpers:
+    """Test incident tool helpers that don't need a live Cortex connection."""
+
+    async def test_cortex_call_retries_once_on_401(self, monkeypatch):
+        """Test a stale-key 401 resets the client and retries the call once."""
+        from om_apex_mcp.tools import incidents
+        resets = []
+        monkeypatch.setattr(incidents, "reset_cortex_client", lambda: resets.append(1))
+        monkeypatch.setattr(incidents, "is_cortex_available", lambda: True)
+        calls = []
+
+        def flaky(value):
+            calls.append(value)
+            if len(calls) == 1:
+                raise Exception("401 Unauthorized")
+            return value
+
+        assert await incidents._cortex_call(flaky, "ok") == "ok"
+        assert calls == ["ok", "ok"] and resets == [1]
+
+    async def test_incident_list_clamps_limit(self, monkeypatch):
+        """Test an oversized limit is capped and a non-positive one is rejected."""
+        from om_apex_mcp.tools import incidents
+        limits = []
+        monkeypatch.setattr(incidents, "is_cortex_available", lambda: True)
+        monkeypatch.setattr(incidents, "list_incidents", lambda **kw: limits.append(kw["limit"]) or [])
+        await incidents._handler("incident_list", {"limit": 500})
+        assert limits == [incidents._LIST_LIMIT_MAX]
+        result = await incidents._handler("incident_list", {"limit": 0})
+        assert result[0].text.startswith("Error: invalid incident_list arguments")
+        assert limits == [incidents._LIST_LIMIT_MAX]
+
+    async def test_incident_create_batch_uses_two_inserts(self, monkeypatch):
+        """Test a batch writes all incidents in one insert and all events in another."""
+        from om_apex_mcp.tools import incidents
+        inserts = []
+
+        def bulk_incidents(rows):
+            inserts.append(("incidents", rows))
+            return [{"id": i, **row} for i, row in enumerate(rows, 1)]
+
+        def bulk_events(rows):
+            inserts.append(("events", rows))
+            return rows
+
+        monkeypatch.setattr(incidents, "is_cortex_available", lambda: True)
+        monkeypatch.setattr(incidents, "create_incidents_bulk", bulk_incidents)
+        monkeypatch.setattr(incidents, "create_incident_events_bulk", bulk_events)
+        result = await incidents._handler("incident_create_batch", {"incidents": [
+            {"title": "A", "severity": "SEV-2"},
+            {"title": "B", "severity": "SEV-3", "category": "performance"},
+        ]})
+        assert [kind for kind, _ in inserts] == ["incidents", "events"]
+        assert [e["incident_id"] for e in inserts[1][1]] == [1, 2]
+        assert "Created 2 incidents." in result[0].text
+
+    async def test_incident_create_batch_reports_row_count_mismatch(self, monkeypatch):
+        """Test a short insert result skips the audit events instead of misattributing them."""
+        from om_apex_mcp.tools import incidents
+        events = []
+        monkeypatch.setattr(incidents, "is_cortex_available", lambda: True)
+        monkeypatch.setattr(incidents, "create_incidents_bulk", lambda rows: [{"id": 1, **rows[1]}])
+        monkeypatch.setattr(incidents, "create_incident_events_bulk", events.append)
+        result = await incidents._handler("incident_create_batch", {"incidents": [
+            {"title": "A", "severity": "SEV-2"},
+            {"title": "B", "severity": "SEV-3"},
+        ]})
+        assert events == []
+        assert "sent 2 incidents but 1 rows came back" in result[0].text
+
+
+class TestHandoffHelpers:
+    """Test handoff tool helpers that don't need a live Supabase connection."""
+
+    def test_history_cache_bounded_and_drops_expired(self, monkeypatch):
+        """Test the history cache evicts its oldest entry when full and drops expired ones."""
+        from om_apex_mcp.tools import handoff
+        monkeypatch.setattr(handoff, "_history_cache", {})
+        monkeypatch.setattr(handoff, "_HISTORY_CACHE_MAX", 2)
+        monkeypatch.setattr(handoff, "sb_get_history", lambda **kw: [kw])
+        for project in ("a", "b", "c"):
+            handoff._get_history_cached(project, 5, None)
+        assert [k[0] for k in handoff._history_cache] == ["b", "c"]
+
+        monkeypatch.setattr(handoff, "sb_get_history", lambda **kw: [])
+        monkeypatch.setattr(handoff, "_HISTORY_TTL", 0.0)
+        assert handoff._get_history_cached("b", 5, None) == []
+        assert [k[0] for k in handoff._history_cache] == ["c"]
+
+    async def test_resave_after_other_person_is_written(self, monkeypatch):
+        """Test a repeat save is only skipped while it is still the project's latest handoff."""
+        from om_apex_mcp.tools import handoff
+        saved = []
+        monkeypatch.setattr(handoff, "_last_saved_hash", {})
+        monkeypatch.setattr(handoff, "is_supabase_available", lambda: True)
+        monkeypatch.setattr(handoff, "sb_save_handoff", lambda *args: saved.append(args) or {"id": len(saved)})
+        monkeypatch.setattr(handoff, "sb_get_history", lambda **kw: [
+            {"content": content, "created_by": person, "interface": interface}
+            for content, person, interface, _ in reversed(saved)
+        ][:kw["limit"]])
+
+        async def save(person, interface, content):
+            await handoff._handler("save_session_handoff", {
+                "project_code": "mcp-server", "person": person, "interface": interface, "content": content,
+            })
+
+        for person, interface, content in (("Nishad", "code", "A"), ("Sumedha", "chat", "B"),
+                                           ("Nishad", "code", "A"), ("Nishad", "code", "A")):
+            await save(person, interface, content)
+        assert [args[0] for args in saved] == ["A", "B", "A"]
+
+        # A handoff written by another process, outside this server's hash cache
+        saved.append(("C", "Cortex", "agent", "mcp-server"))
+        await save("Nishad", "code", "A")
+        assert [args[0] for args in saved] == ["A", "B", "A", "C", "A"]
+
+
+class TestTaskHelpers:
+    """Test task tool helpers that don't need a live Supabase connection."""
+
+    async def test_reads_cached_until_a_write(self, monkeypatch):
+        """Test repeat queue reads hit the cache and a write clears it."""
+        from om_apex_mcp.tools import tasks
+        calls = []
+
+        async def fake(arguments):
+            calls.append(dict(arguments))
+            return [len(calls)]
+
+        monkeypatch.setattr(tasks, "_read_cache", {})
+        monkeypatch.setitem(tasks._DISPATCH, "get_task_queue", fake)
+        monkeypatch.setitem(tasks._DISPATCH, "update_task", fake)
+        assert await tasks._handler("get_task_queue", {"limit": 5, "owner": None}) == [1]
+        assert await tasks._handler("get_task_queue", {"limit": 5}) == [1]
+        await tasks._handler("update_task", {"task_id": "TASK-001"})
+        assert await tasks._handler("get_task_queue", {"limit": 5}) == [3]
+
+    def test_supabase_ok_caches_only_success(self, monkeypatch):
+        """Test a failed availability check is retried and a success is remembered."""
+        from om_apex_mcp.tools import tasks
+        answers = [False, True]
+        monkeypatch.setattr(tasks, "_supabase_seen_ok", False)
+        monkeypatch.setattr(tasks, "is_supabase_available", lambda: answers.pop(0))
+        assert tasks._supabase_ok() is False
+        assert tasks._supabase_ok() is True
+        assert tasks._supabase_ok() is True and answers == []
+
+    def test_receipt_compact_unless_verbose(self):
+        """Test write receipts carry only the id and changed columns by default."""
+        from om_apex_mcp.tools import tasks
+        row = {"id": "TASK-001", "status": "complete", "notes": "n", "description": "d"}
+        assert json.loads(tasks._receipt(row, ["status"], {})) == {"id": "TASK-001", "status": "complete"}
+        assert json.loads(tasks._receipt(row, ["status"], {"verbose": True})) == row
+
+
+class TestSupabaseClients:
+    """Test Supabase client construction without a live project."""
+
+    @pytest.mark.parametrize("module_name, getter, config_path_fn, client_attr, url_env, key_env", [
+        ("supabase_client", "get_supabase_client", "_get_config_path", "_supabase_client",
+         "SUPABASE_URL", "SUPABASE_SERVICE_KEY"),
+        ("cortex_supabase", "get_cortex_client", "_get_cortex_config_path", "_cortex_client",
+         "CORTEX_SUPABASE_URL", "CORTEX_SUPABASE_SERVICE_KEY"),
+    ])
+    def test_postgrest_requests_use_pooled_client(self, monkeypatch, tmp_path, module_name, getter,
+                                                  config_path_fn, client_attr, url_env, key_env):
+        """Test PostgREST requests go through the module's shared httpx client."""
+        module = importlib.import_module(f"om_apex_mcp.{module_name}")
+        seen = []
+
+        def respond(request):
+            seen.append(str(request.url))
+            return httpx.Response(200, json=[])
+
+        monkeypatch.setenv(url_env, "https://example.supabase.co")
+        monkeypatch.setenv(key_env, "test-key")
+        monkeypatch.setattr(module, config_path_fn, lambda: tmp_path / "missing.env")
+        monkeypatch.setattr(module, "_http_client", httpx.Client(transport=httpx.MockTransport(respond)))
+        monkeypatch.setattr(module, client_attr, None)
+
+        assert getattr(module, getter)() is not None
+        # The connection check issued on creation reached the mock transport
+        assert seen and seen[0].startswith("https://example.supabase.co/rest/v1/")
+
+    def test_pool_limits_apply_to_request_client(self, monkeypatch, tmp_path):
+        """Test SUPABASE_MAX_* size the httpx client that Supabase requests actually use."""
+        from om_apex_mcp import supabase_client
+        made, seen = [], []
+        real_client = httpx.Client
+
+        def make_client(**kwargs):
+            made.append(kwargs)
+            return real_client(transport=httpx.MockTransport(
+                lambda request: seen.append(request) or httpx.Response(200, json=[])))
+
+        monkeypatch.setattr(httpx, "Client", make_client)
+        monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+        monkeypatch.setenv("SUPABASE_SERVICE_KEY", "test-key")
+        monkeypatch.setattr(supabase_client, "_get_config_path", lambda: tmp_path / "missing.env")
+        monkeypatch.setattr(supabase_client, "SUPABASE_MAX_CONNECTIONS", 7)
+        monkeypatch.setattr(supabase_client, "SUPABASE_MAX_KEEPALIVE", 3)
+        monkeypatch.setattr(supabase_client, "_http_client", None)
+        monkeypatch.setattr(supabase_client, "_supabase_client", None)
+
+        assert supabase_client.get_supabase_client() is not None
+        limits = made[0]["limits"]
+        assert (limits.max_connections, limits.max_keepalive_connections) == (7, 3)
+        assert seen
+
 
 class TestStorageBackend:
     """Test storage backend abstraction."""
@@ -135,55 +590,57 @@ class TestStorageBackend:
         assert backend.data_dir == data_dir
         assert backend.shared_drive_root == tmp_path
 
-    def test_local_storage_json_roundtrip(self, tmp_path):
+    def test_local_storage_json_roundtrip(self, local_backend):
         """Test save/load JSON with LocalStorage."""
-        data_dir = tmp_path / "mcp-data"
-        data_dir.mkdir()
-        backend = LocalStorage(data_dir=data_dir)
-
         test_data = {"key": "value", "number": 42}
-        backend.save_json("test.json", test_data)
-        loaded = backend.load_json("test.json")
+        local_backend.save_json("test.json", test_data)
+        loaded = local_backend.load_json("test.json")
         assert loaded == test_data
 
-    def test_local_storage_load_missing(self, tmp_path):
+    def test_local_storage_load_missing(self, empty_backend):
         """Test loading non-existent file returns empty dict."""
-        backend = LocalStorage(data_dir=tmp_path)
-        assert backend.load_json("nonexistent.json") == {}
+        assert empty_backend.load_json("nonexistent.json") == {}
 
-    def test_local_storage_text_roundtrip(self, tmp_path):
+    def test_local_storage_text_roundtrip(self, local_backend):
         """Test read/write/append text with LocalStorage."""
-        # LocalStorage.__init__ auto-creates the data dir — no need to mkdir manually
-        backend = LocalStorage(data_dir=tmp_path / "data", shared_drive_root=tmp_path)
+        local_backend.write_text("test.md", "Hello\n")
+        assert local_backend.read_text("test.md") == "Hello\n"
 
-        backend.write_text("test.md", "Hello\n")
-        assert backend.read_text("test.md") == "Hello\n"
+        local_backend.append_text("test.md", "World\n")
+        assert local_backend.read_text("test.md") == "Hello\nWorld\n"
 
-        backend.append_text("test.md", "World\n")
-        assert backend.read_text("test.md") == "Hello\nWorld\n"
+    def test_local_storage_append_text_with(self, local_backend):
+        """Test append_text_with passes existing content to build and appends its result."""
+        seen = []
 
-    def test_local_storage_read_missing(self, tmp_path):
+        def build(existing):
+            seen.append(existing)
+            return "Header\n" if not existing else "More\n"
+
+        local_backend.append_text_with("logs/new.md", build)
+        local_backend.append_text_with("logs/new.md", build)
+        assert seen == ["", "Header\n"]
+        assert local_backend.read_text("logs/new.md") == "Header\nMore\n"
+
+    def test_local_storage_read_missing(self, empty_backend):
         """Test reading non-existent text file returns None."""
-        backend = LocalStorage(data_dir=tmp_path, shared_drive_root=tmp_path)
-        assert backend.read_text("missing.md") is None
+        assert empty_backend.read_text("missing.md") is None
 
-    def test_local_storage_file_exists(self, tmp_path):
+    def test_local_storage_file_exists(self, local_backend):
         """Test file_exists check."""
-        backend = LocalStorage(data_dir=tmp_path, shared_drive_root=tmp_path)
-        assert not backend.file_exists("nope.md")
-        (tmp_path / "yep.md").write_text("hi")
-        assert backend.file_exists("yep.md")
+        assert not local_backend.file_exists("nope.md")
+        (local_backend.shared_drive_root / "yep.md").write_text("hi")
+        assert local_backend.file_exists("yep.md")
 
-    def test_local_storage_list_files(self, tmp_path):
+    def test_local_storage_list_files(self, local_backend):
         """Test listing files with glob pattern."""
-        subdir = tmp_path / "logs"
+        subdir = local_backend.shared_drive_root / "logs"
         subdir.mkdir()
         (subdir / "2026-01-01.md").write_text("day 1")
         (subdir / "2026-01-02.md").write_text("day 2")
         (subdir / "notes.txt").write_text("other")
 
-        backend = LocalStorage(data_dir=tmp_path, shared_drive_root=tmp_path)
-        md_files = backend.list_files("logs", "*.md")
+        md_files = local_backend.list_files("logs", "*.md")
         assert len(md_files) == 2
         assert all(f.endswith(".md") for f in md_files)
 
@@ -191,13 +648,10 @@ class TestStorageBackend:
 class TestInitStorage:
     """Test storage initialization through helpers."""
 
-    def test_init_and_get_backend(self, tmp_path):
+    def test_init_and_get_backend(self, local_backend):
         """Test init_storage sets the global backend."""
-        data_dir = tmp_path / "mcp-data"
-        data_dir.mkdir()
-        backend = LocalStorage(data_dir=data_dir)
-        init_storage(backend)
-        assert get_backend() is backend
+        init_storage(local_backend)
+        assert get_backend() is local_backend
 
     def test_lazy_init(self):
         """Test get_backend auto-initializes if not set."""
@@ -209,21 +663,19 @@ class TestInitStorage:
 class TestCreateServer:
     """Test server factory function."""
 
-    def test_create_server_returns_server(self, tmp_path):
+    def test_create_server_returns_server(self, local_backend):
         """Test create_server returns an MCP Server instance."""
-        from om_apex_mcp.server import create_server
-        from mcp.server import Server
-
-        data_dir = tmp_path / "mcp-data"
-        data_dir.mkdir()
         # Write minimal JSON files so tools don't error
-        (data_dir / "company_structure.json").write_text('{"holding_company": {"name": "Test"}, "subsidiaries": []}')
-        (data_dir / "technology_decisions.json").write_text('{"decisions": []}')
-        (data_dir / "domain_inventory.json").write_text('{"summary": {}}')
-        (data_dir / "pending_tasks.json").write_text('{"tasks": []}')
-
-        backend = LocalStorage(data_dir=data_dir, shared_drive_root=tmp_path)
-        server = create_server(backend)
+        seeds = [
+            ("company_structure.json", b'{"holding_company": {"name": "Test"}, "subsidiaries": []}'),
+            ("technology_decisions.json", b'{"decisions": []}'),
+            ("domain_inventory.json", b'{"summary": {}}'),
+            ("pending_tasks.json", b'{"tasks": []}'),
+        ]
+        for name, payload in seeds:
+            (local_backend.data_dir / name).write_bytes(payload)
+
+        server = create_server(local_backend)
         assert isinstance(server, Server)
 
 
@@ -232,7 +684,6 @@ class TestAuth:
 
     def test_demo_mode_tools_list(self):
         """Test that demo mode tools are all reading tools (most migrated to Cortex)."""
-        from om_apex_mcp.auth import DEMO_MODE_TOOLS
         assert "list_company_configs" in DEMO_MODE_TOOLS
         # Migrated tools should no longer be in demo mode
         assert "get_full_context" not in DEMO_MODE_TOOLS
@@ -242,7 +693,6 @@ class TestAuth:
 
     def test_load_api_keys_empty(self, monkeypatch):
         """Test load_api_keys with no env vars set."""
-        from om_apex_mcp.auth import load_api_keys
         monkeypatch.delenv("OM_APEX_API_KEY_NISHAD", raising=False)
         monkeypatch.delenv("OM_APEX_API_KEY_SUMEDHA", raising=False)
         keys = load_api_keys()
@@ -250,7 +700,6 @@ class TestAuth:
 
     def test_load_api_keys_with_env(self, monkeypatch):
         """Test load_api_keys with env vars set."""
-        from om_apex_mcp.auth import load_api_keys
         monkeypatch.setenv("OM_APEX_API_KEY_NISHAD", "test-key-123")
         monkeypatch.setenv("OM_APEX_API_KEY_SUMEDHA", "test-key-456")
         keys = load_api_keys()